@@ -51,9 +51,18 @@ def create_app(config_class=None):
     try:
         from .views.submit2 import submit_bp  # USING submit2.py which has the working /submit-job endpoint
         from .views.admin import admin_bp
-        
+        from .routes.breaks import breaks_bp
+        from .breaks_api import breaks_bp as breaks_api_bp
+        from .views.search import search_bp
+        from .views.metrics import metrics_bp
+
         app.register_blueprint(submit_bp)
         app.register_blueprint(admin_bp, url_prefix='/admin')
+        app.register_blueprint(breaks_bp, url_prefix='/breaks')
+        # Both break blueprints are named 'breaks', so the API one is registered under its own name.
+        app.register_blueprint(breaks_api_bp, url_prefix='/api/breaks', name='breaks_api')
+        app.register_blueprint(search_bp)
+        app.register_blueprint(metrics_bp)
         
     except ImportError as e:
         logger.error(f"Failed to import blueprints: {e}")
@@ -1,8 +1,37 @@
-from flask import Blueprint, jsonify, request
+import os
+import re
+import threading
+from collections import OrderedDict
+from flask import Blueprint, jsonify, request, current_app, url_for, send_from_directory, abort
+
+from .utils.break_engine import get_break_engine
+from .utils.preview_clips import clip_window, get_clip_renderer
+from .utils.waveform_peaks import get_peak_index, read_peak_tile
+
+CLIP_RETRY_AFTER_SEC = 2
+PRERENDER_TOP_N = 5          # clips rendered by /detect for the best-scoring breaks; the rest on first preview
+MAX_DETECTED_BREAKS = 4096
+_CONTENT_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
 
 # Define the Blueprint for the Intelligent Commercial Break System
 breaks_bp = Blueprint('breaks', __name__)
 
+# Breaks returned by /detect, keyed by their public id, so /preview can look them up (LRU-bounded).
+_detected_breaks = OrderedDict()
+_detected_breaks_lock = threading.Lock()
+
+def _format_ms(ms):
+    total_seconds = int(ms // 1000)
+    return f"{total_seconds // 3600:02d}:{(total_seconds % 3600) // 60:02d}:{total_seconds % 60:02d}"
+
+def _resolve_upload_path(audio_path):
+    """Only allow analysis of files inside the upload folder."""
+    upload_root = os.path.realpath(current_app.config['UPLOAD_FOLDER'])
+    candidate = os.path.realpath(os.path.join(upload_root, audio_path))
+    if os.path.commonpath([upload_root, candidate]) != upload_root:
+        return None
+    return candidate
+
 @breaks_bp.route('/')
 def index():
     """
@@ -14,63 +43,91 @@ def index():
 @breaks_bp.route('/detect', methods=['POST'])
 def detect_breaks():
     """
-    Placeholder route for detecting commercial breaks within an audio/video file.
-    This route would typically receive an audio/video file path or stream,
-    process it, and return detected break timings.
+    Detects commercial breaks in an uploaded recording using the shared break engine.
+    Expects JSON: {"audio_path": "<path relative to the upload folder>", "settings": {...}}
+    where settings follow the break engine schema (legacy key names are accepted).
     """
-    # In a real implementation, you would process the input data (e.g., from request.json or request.files)
-    # and use AI/ML models to detect breaks.
-    
-    # Example of expected input/output (conceptual):
-    # input_data = request.json
-    # audio_file_path = input_data.get('audio_path')
-    #
-    # # Placeholder for break detection logic
-    # detected_breaks = [
-    #     {"start_time": "00:05:00", "end_time": "00:05:30", "type": "commercial"},
-    #     {"start_time": "00:10:15", "end_time": "00:11:00", "type": "promo"}
-    # ]
-
-    # For now, just return a mock response
-    mock_breaks = [
-        {"id": "break_1", "start_ms": 300000, "end_ms": 330000, "label": "Commercial Break 1"},
-        {"id": "break_2", "start_ms": 615000, "end_ms": 660000, "label": "Commercial Break 2"}
-    ]
+    input_data = request.get_json(silent=True) or {}
+    audio_path = input_data.get('audio_path')
+    if not audio_path:
+        return jsonify({"status": "error", "message": "audio_path is required."}), 400
+
+    audio_file_path = _resolve_upload_path(audio_path)
+    if not audio_file_path or not os.path.exists(audio_file_path):
+        return jsonify({"status": "error", "message": f"Audio file '{audio_path}' not found."}), 404
+
+    try:
+        engine = get_break_engine()
+        analysis = engine.analyze(audio_file_path)
+        breaks = engine.detect(analysis, input_data.get('settings') or {})
+    except Exception as e:
+        current_app.logger.error(f"Error in detect_breaks: {e}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    # Start rendering the most likely breaks' clips right away, in parallel. Without a break_count
+    # every silence candidate is returned, so the others are rendered when first previewed.
+    top_breaks = sorted(breaks, key=lambda b: b['score'], reverse=True)[:PRERENDER_TOP_N]
+    get_clip_renderer().render_breaks(audio_file_path, analysis.content_hash, top_breaks, analysis.duration_ms)
+
+    detected = []
+    with _detected_breaks_lock:
+        for brk in breaks:
+            break_id = f"{analysis.content_hash[:12]}_{brk['id']}"
+            _detected_breaks[break_id] = dict(brk, id=break_id, audio_file_path=audio_file_path,
+                                              content_hash=analysis.content_hash, duration_ms=analysis.duration_ms)
+            _detected_breaks.move_to_end(break_id)
+            detected.append({"id": break_id, "start_ms": brk['start_ms'], "end_ms": brk['end_ms'],
+                             "time_ms": brk['time_ms'], "label": brk['label'],
+                             "sources": brk['sources'], "score": brk['score'],
+                             "preview_url": url_for('.preview_break', break_id=break_id)})
+        while len(_detected_breaks) > MAX_DETECTED_BREAKS:
+            _detected_breaks.popitem(last=False)
+
     return jsonify({
         "status": "success",
-        "message": "Commercial break detection initiated (placeholder).",
-        "detected_breaks": mock_breaks
+        "message": f"Detected {len(detected)} commercial break(s).",
+        "duration_ms": analysis.duration_ms,
+        "waveform_url": url_for('.waveform_index', content_hash=analysis.content_hash),
+        "detected_breaks": detected
     })
 
 @breaks_bp.route('/preview/<string:break_id>', methods=['GET'])
 def preview_break(break_id):
     """
-    Placeholder route for generating a preview of a detected commercial break.
-    This might involve playing a snippet or showing a transcript/summary.
+    Returns the details of a break previously returned by /detect. The preview clip is
+    rendered in the background (starting with the first request for it); while it is,
+    the response is a 202 with a poll URL, so no request thread waits on ffmpeg.
     """
-    # In a real implementation, you would use the break_id to retrieve details
-    # about the break from a database or a processing result.
-    # Then, you might generate a short audio/video clip or summary.
-
-    # For now, just return a mock response
-    mock_break_details = {
-        "break_1": {
-            "start_time_str": "00:05:00",
-            "end_time_str": "00:05:30",
-            "audio_url": "/static/previews/break_1_preview.mp3", # Example static URL
-            "transcript_snippet": "This is a sample of the detected commercial content."
-        },
-        "break_2": {
-            "start_time_str": "00:10:15",
-            "end_time_str": "00:11:00",
-            "audio_url": "/static/previews/break_2_preview.mp3",
-            "transcript_snippet": "Another snippet from the second commercial break."
-        }
-    }
+    with _detected_breaks_lock:
+        brk = _detected_breaks.get(break_id)
+        if brk:
+            _detected_breaks.move_to_end(break_id)
 
-    details = mock_break_details.get(break_id)
+    if brk:
+        # Re-submitting a finished or in-flight clip is free, and retries failed renders.
+        clip_name, clip_future = get_clip_renderer().submit(
+            brk['audio_file_path'], brk['content_hash'], *clip_window(brk, brk['duration_ms']))
+        details = {
+            "start_time_str": _format_ms(brk['start_ms']),
+            "end_time_str": _format_ms(brk['end_ms']),
+            "break_time_str": _format_ms(brk['time_ms']),
+            "audio_url": None,
+            "sources": brk['sources']
+        }
+        if not clip_future.done():
+            response = jsonify({
+                "status": "pending",
+                "message": "Preview clip is still rendering; poll status_url.",
+                "status_url": url_for('.preview_break', break_id=break_id),
+                "details": details
+            })
+            response.headers['Retry-After'] = str(CLIP_RETRY_AFTER_SEC)
+            return response, 202
+        if clip_future.exception() is None:
+            details['audio_url'] = url_for('.serve_clip', clip_name=clip_name)
+        else:
+            current_app.logger.error(f"Preview clip for break '{break_id}' failed: {clip_future.exception()}")
 
-    if details:
         return jsonify({
             "status": "success",
             "message": f"Preview details for break ID '{break_id}'.",
@@ -80,4 +137,36 @@ def preview_break(break_id):
         return jsonify({
             "status": "error",
             "message": f"Break ID '{break_id}' not found for preview."
-        }), 404
\ No newline at end of file
+        }), 404
+
+@breaks_bp.route('/clips/<string:clip_name>', methods=['GET'])
+def serve_clip(clip_name):
+    """Serves a rendered preview clip from the clip cache."""
+    renderer = get_clip_renderer()
+    if not os.path.exists(renderer.clip_path(clip_name)):
+        abort(404)
+    return send_from_directory(renderer.cache_dir, clip_name, mimetype='audio/mpeg', max_age=24 * 3600)
+
+@breaks_bp.route('/waveform/<string:content_hash>', methods=['GET'])
+def waveform_index(content_hash):
+    """
+    Describes the precomputed peak levels of an analyzed recording. Clients pick the
+    coarsest level that still gives one peak per pixel and fetch only the visible tiles.
+    """
+    index = get_peak_index(content_hash) if _CONTENT_HASH_RE.match(content_hash) else None
+    if index is None:
+        return jsonify({"status": "error", "message": "No waveform peaks for this recording; run /detect first."}), 404
+    index['tile_url_template'] = url_for('.waveform_tile', content_hash=content_hash,
+                                         samples_per_pixel=0, tile=0).replace('/0/0.dat', '/{samples_per_pixel}/{tile}.dat')
+    return jsonify(index)
+
+@breaks_bp.route('/waveform/<string:content_hash>/<int:samples_per_pixel>/<int:tile>.dat', methods=['GET'])
+def waveform_tile(content_hash, samples_per_pixel, tile):
+    """Serves one tile of peaks as an audiowaveform .dat (v1, 8-bit) blob."""
+    data = read_peak_tile(content_hash, samples_per_pixel, tile) if _CONTENT_HASH_RE.match(content_hash) else None
+    if data is None:
+        abort(404)
+    response = current_app.response_class(data, mimetype='application/octet-stream')
+    # Peaks are keyed by content hash, so a tile never changes.
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
@@ -1,34 +1,149 @@
+import hashlib
+import json
 import os
 import tempfile
-from flask import Blueprint, request, jsonify, current_app
+import threading
+import time
+from flask import Blueprint, request, jsonify, current_app, url_for, Response, stream_with_context
 from werkzeug.utils import secure_filename
-# Corrected import path
-from ..utils.enhanced_audio_processor import analyze_audio_for_breaks
+from ..utils.preview_jobs import get_preview_job_manager
 
 breaks_bp = Blueprint('breaks', __name__)
 
+# Preview uploads are only needed while the preview (and its clips) are in use.
+PREVIEW_UPLOAD_TTL_SEC = 24 * 60 * 60
+PREVIEW_UPLOADS_MAX_BYTES = int(float(os.environ.get('PREVIEW_UPLOADS_MAX_MB', '2048')) * 1024 * 1024)
+PREVIEW_UPLOAD_MIN_AGE_SEC = 10 * 60   # never evicted for size: may still be analyzing
+_PRUNE_INTERVAL_SEC = 10 * 60
+_last_prune = 0.0
+_prune_lock = threading.Lock()
+
+def _prune_preview_uploads(preview_dir):
+    """
+    Deletes preview uploads (and abandoned .part files) unused for PREVIEW_UPLOAD_TTL_SEC,
+    then the least recently used ones until the folder fits PREVIEW_UPLOADS_MAX_BYTES.
+    Runs at most once per _PRUNE_INTERVAL_SEC.
+    """
+    global _last_prune
+    now = time.time()
+    with _prune_lock:
+        if now - _last_prune < _PRUNE_INTERVAL_SEC:
+            return
+        _last_prune = now
+
+    entries = []
+    for entry in os.scandir(preview_dir):
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        if entry.is_file():
+            entries.append((st.st_mtime, st.st_size, entry.path))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in entries:
+        expired = now - mtime > PREVIEW_UPLOAD_TTL_SEC
+        if not expired and (total <= PREVIEW_UPLOADS_MAX_BYTES or now - mtime < PREVIEW_UPLOAD_MIN_AGE_SEC):
+            break
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        current_app.logger.info(f"Pruned {removed} preview upload(s); {total / (1024 * 1024):.1f} MB left.")
+
+def _save_upload_by_hash(file):
+    """
+    Streams the upload to disk while hashing it and stores it as <sha256><ext> in the
+    preview folder, so re-uploads of the same recording share one file and one cache entry.
+    """
+    preview_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'previews')
+    os.makedirs(preview_dir, exist_ok=True)
+    extension = os.path.splitext(secure_filename(file.filename))[1].lower()
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=preview_dir, suffix='.part', delete=False) as tf:
+        for chunk in iter(lambda: file.stream.read(1024 * 1024), b''):
+            digest.update(chunk)
+            tf.write(chunk)
+        temp_path = tf.name
+    content_hash = digest.hexdigest()
+    final_path = os.path.join(preview_dir, f"{content_hash}{extension}")
+    if os.path.exists(final_path):
+        os.unlink(temp_path)
+        os.utime(final_path)  # mark it recently used for pruning
+    else:
+        os.replace(temp_path, final_path)
+    _prune_preview_uploads(preview_dir)
+    return final_path, content_hash
+
+def _job_payload(job):
+    payload = {
+        "token": job['token'],
+        "status": job['status'],
+        "status_url": url_for('.preview_status_route', token=job['token']),
+        "events_url": url_for('.preview_events_route', token=job['token'])
+    }
+    if job['status'] == 'done':
+        payload.update(job['result'])
+        payload['cache_hit'] = job['cache_hit']
+        payload['waveform_url'] = url_for('breaks_api.waveform_index', content_hash=job['result']['content_hash'])
+    elif job['status'] == 'failed':
+        payload['error'] = job['error']
+    return payload
+
 @breaks_bp.route('/preview', methods=['POST'])
 def preview_breaks_route():
     if 'audio_file' not in request.files:
         return jsonify({"error": "No audio file part"}), 400
-    
+
     file = request.files['audio_file']
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
 
-    filename = secure_filename(file.filename)
-    # Use a temporary directory for safety
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = os.path.join(temp_dir, filename)
-        file.save(temp_path)
+    try:
+        settings = {
+            'silence_threshold': request.form.get('silence_threshold', -40, type=int),
+            'min_silence_len': request.form.get('min_silence_len', 1500, type=int)
+        }
+        audio_path, content_hash = _save_upload_by_hash(file)
+        manager = get_preview_job_manager()
+        token = manager.submit(audio_path, content_hash, settings)
+        job = manager.get(token)
+        # 200 when the answer is already known (cache hit / cached analysis), 202 while it is queued.
+        return jsonify(_job_payload(job)), 200 if job['status'] == 'done' else 202
+    except Exception as e:
+        current_app.logger.error(f"Error in preview_breaks_route: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
 
-        try:
-            settings = {
-                'silence_threshold': request.form.get('silence_threshold', -40, type=int),
-                'min_silence_len': request.form.get('min_silence_len', 1500, type=int)
-            }
-            timestamps = analyze_audio_for_breaks(temp_path, settings)
-            return jsonify({"breaks": timestamps})
-        except Exception as e:
-            current_app.logger.error(f"Error in preview_breaks_route: {e}", exc_info=True)
-            return jsonify({"error": str(e)}), 500
\ No newline at end of file
+@breaks_bp.route('/preview/<string:token>', methods=['GET'])
+def preview_status_route(token):
+    job = get_preview_job_manager().get(token)
+    if not job:
+        return jsonify({"error": f"Unknown preview token '{token}'"}), 404
+    return jsonify(_job_payload(job))
+
+@breaks_bp.route('/preview/<string:token>/events', methods=['GET'])
+def preview_events_route(token):
+    """Server-sent events: one event per status change, closing once the job is done or failed."""
+    manager = get_preview_job_manager()
+    job = manager.get(token)
+    if not job:
+        return jsonify({"error": f"Unknown preview token '{token}'"}), 404
+
+    def stream(job):
+        yield f"event: status\ndata: {json.dumps(_job_payload(job))}\n\n"
+        while job['status'] not in ('done', 'failed'):
+            next_job = manager.wait(token, last_status=job['status'])
+            if next_job is None:
+                return
+            if next_job['status'] == job['status']:
+                yield ": keep-alive\n\n"
+                continue
+            job = next_job
+            yield f"event: status\ndata: {json.dumps(_job_payload(job))}\n\n"
+
+    return Response(stream_with_context(stream(job)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -52,7 +52,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
         const formData = new FormData();
-        formData.append('audioFile', audioFile);
+        formData.append('audio_file', audioFile);
         formData.append('commercialLength', commercialLength);
         formData.append('commercialFrequency', commercialFrequency);
         formData.append('initialBreakOffset', initialBreakOffset);
@@ -80,7 +80,20 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error(errorMessage);
             }
 
-            const data = await response.json();
+            // The server analyzes in the background: 202 + token, then poll until done.
+            let data = await response.json();
+            while (data.status === 'queued' || data.status === 'running') {
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                const statusResponse = await fetch(data.status_url);
+                if (!statusResponse.ok) {
+                    throw new Error(`HTTP error! Status: ${statusResponse.status}`);
+                }
+                data = await statusResponse.json();
+            }
+            if (data.status === 'failed') {
+                throw new Error(data.error || 'Break analysis failed.');
+            }
+            data.timestamps = data.breaks;
 
             if (data.timestamps && Array.isArray(data.timestamps)) {
                 if (data.timestamps.length > 0) {
@@ -0,0 +1,147 @@
+"""
+Process-wide pool of loaded ASR models.
+
+Loading a Whisper model costs tens of seconds and a large transient allocation, so a
+long-lived worker (`cron_job_runner.py --worker`) loads each configured model once and
+runs every job on a thread of its own process, where the job borrows the model from
+here. Models are unloaded after `idle_timeout_sec` without use and transparently
+reloaded on the next request.
+
+Models are only shared within a process. The ASR runtimes (CTranslate2's and torch's
+thread pools) do not survive a fork, so nothing forks after loading one: the worker runs
+jobs on threads, and the chunked transcription pool spawns its processes. openai-whisper
+checkpoints are loaded with `torch.load(mmap=True)`, so spawned workers that load the
+same checkpoint share its file-backed pages. CTranslate2 (faster-whisper) keeps its
+weights in its own allocator, and every spawned worker holds a private copy.
+
+CTranslate2 models accept concurrent calls from several threads. openai-whisper models
+do not (decoding installs hooks on the shared module), so their engine serializes calls
+with `exclusive(key)`.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IDLE_TIMEOUT_SEC = int(os.environ.get('ASR_MODEL_IDLE_TIMEOUT_SEC', 15 * 60))
+
+
+class ASRModelPool:
+    """Loads models on first use, shares them between callers and unloads idle ones."""
+
+    def __init__(self, idle_timeout_sec: float = DEFAULT_IDLE_TIMEOUT_SEC):
+        self.idle_timeout_sec = idle_timeout_sec
+        self._models: Dict[Hashable, Any] = {}
+        self._last_used: Dict[Hashable, float] = {}
+        self._in_use: Dict[Hashable, int] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._call_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._stats = {'loads': 0, 'hits': 0, 'unloads': 0}
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Only reached if something forks anyway (e.g. ASR_MP_START_METHOD=fork): a lock held by
+        # another thread at fork time would stay locked forever in the child.
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._call_locks = {}
+        self._reaper = None
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns the model for `key`, calling `loader()` only if it is not loaded yet."""
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._last_used[key] = time.monotonic()
+                self._stats['hits'] += 1
+                return model
+        # Per-key lock: two jobs asking for the same model load it once, different models load in parallel.
+        with self._key_lock(key):
+            with self._lock:
+                model = self._models.get(key)
+            if model is None:
+                start = time.perf_counter()
+                model = loader()
+                logger.info(f"ASR model pool loaded {key} in {time.perf_counter() - start:.1f}s (pid {os.getpid()}).")
+                with self._lock:
+                    self._models[key] = model
+                    self._stats['loads'] += 1
+            with self._lock:
+                self._last_used[key] = time.monotonic()
+        self._ensure_reaper()
+        return model
+
+    def exclusive(self, key: Hashable) -> threading.Lock:
+        """A lock for models that must not run two calls at once; hold it around each call."""
+        with self._lock:
+            return self._call_locks.setdefault(key, threading.Lock())
+
+    def hold(self, key: Hashable):
+        """Marks a model as busy so the reaper will not unload it mid-transcription."""
+        with self._lock:
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+
+    def release(self, key: Hashable):
+        with self._lock:
+            self._in_use[key] = max(0, self._in_use.get(key, 0) - 1)
+            self._last_used[key] = time.monotonic()
+
+    def unload_idle(self) -> List[Hashable]:
+        """Drops every model unused for idle_timeout_sec; returns the unloaded keys."""
+        cutoff = time.monotonic() - self.idle_timeout_sec
+        with self._lock:
+            idle = [key for key, used in self._last_used.items()
+                    if used < cutoff and not self._in_use.get(key) and key in self._models]
+            for key in idle:
+                del self._models[key]
+                del self._last_used[key]
+                self._stats['unloads'] += 1
+        for key in idle:
+            logger.info(f"ASR model pool unloaded idle model {key}.")
+        return idle
+
+    def _ensure_reaper(self):
+        if self.idle_timeout_sec <= 0:
+            return
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reap, name='asr-model-reaper', daemon=True)
+            self._reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(max(1.0, self.idle_timeout_sec / 4))
+            self.unload_idle()
+            with self._lock:
+                if not self._models:
+                    self._reaper = None
+                    return
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, loaded=[str(key) for key in self._models])
+
+
+_pool: Optional[ASRModelPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_asr_model_pool() -> ASRModelPool:
+    """Returns the process-wide model pool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ASRModelPool()
+    return _pool
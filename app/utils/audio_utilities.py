@@ -2,13 +2,19 @@
 Audio processing utility functions.
 """
 import logging
-from typing import List, Tuple
+import os
+import subprocess
+import threading
+from typing import Iterable, List, Tuple
 from pydub import AudioSegment
 from pydub.silence import split_on_silence
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+_PCM_READ_SIZE = 64 * 1024
+
 def audio_segment_to_whisper_input(audio: AudioSegment) -> np.ndarray:
     """Converts a pydub AudioSegment to a NumPy array suitable for Whisper."""
     audio = audio.set_channels(1).set_frame_rate(16000)
@@ -50,4 +56,67 @@ def remove_segments_from_audio(audio: AudioSegment, segments_to_remove_ms: List[
     if last_end < len(audio): clean_audio += audio[last_end:]
     
     logger.info(f"Audio segments removed: original {len(audio)}ms -> processed {len(clean_audio)}ms")
-    return clean_audio if len(clean_audio) > 0 else audio # Return original if result is empty
\ No newline at end of file
+    return clean_audio if len(clean_audio) > 0 else audio # Return original if result is empty
+
+def decode_audio_stream(chunks: Iterable[bytes], sample_rate: int = 44100, channels: int = 1,
+                        timeout_sec: float = 120.0) -> np.ndarray:
+    """
+    Decodes compressed audio (MP3 etc.) arriving as byte chunks without a temp file.
+    The chunks are piped into an ffmpeg process as they arrive, so decoding overlaps the
+    download. Returns int16 PCM of shape (frames, channels) at `sample_rate`.
+    An exception raised by `chunks` (e.g. a dropped connection) is re-raised here.
+    """
+    command = [FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'error',
+               '-i', 'pipe:0', '-vn', '-ac', str(channels), '-ar', str(sample_rate), '-f', 's16le', 'pipe:1']
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    feed_error: List[BaseException] = []
+    stderr_parts: List[bytes] = []
+
+    def feed():
+        try:
+            for chunk in chunks:
+                if chunk:
+                    process.stdin.write(chunk)
+        except BrokenPipeError:
+            pass  # ffmpeg exited early; its return code and stderr tell why
+        except BaseException as e:
+            feed_error.append(e)
+            process.kill()
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=feed, name='audio-decode-feed', daemon=True)
+    drainer = threading.Thread(target=lambda: stderr_parts.append(process.stderr.read()),
+                               name='audio-decode-stderr', daemon=True)
+    feeder.start()
+    drainer.start()
+    pcm = bytearray()
+    try:
+        for block in iter(lambda: process.stdout.read(_PCM_READ_SIZE), b''):
+            pcm.extend(block)
+        process.wait(timeout=timeout_sec)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        raise
+    finally:
+        process.stdout.close()
+        feeder.join(timeout=timeout_sec)
+        drainer.join(timeout=timeout_sec)
+    if feed_error:
+        raise feed_error[0]
+    if process.returncode != 0:
+        stderr = b''.join(stderr_parts).decode(errors='replace').strip()
+        raise RuntimeError(f"ffmpeg decode failed ({process.returncode}): {stderr}")
+
+    frame_bytes = 2 * channels
+    usable = len(pcm) - len(pcm) % frame_bytes
+    return np.frombuffer(bytes(pcm[:usable]), dtype=np.int16).reshape(-1, channels)
+
+def pcm_to_audio_segment(samples: np.ndarray, sample_rate: int) -> AudioSegment:
+    """Wraps int16 PCM of shape (frames, channels) as a pydub AudioSegment (no re-encode)."""
+    samples = np.ascontiguousarray(samples, dtype=np.int16)
+    channels = samples.shape[1] if samples.ndim == 2 else 1
+    return AudioSegment(data=samples.tobytes(), sample_width=2, frame_rate=sample_rate, channels=channels)
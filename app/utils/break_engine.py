@@ -0,0 +1,526 @@
+"""
+Unified commercial-break detection engine.
+
+A recording is decoded exactly once into an `AudioAnalysis` (16 kHz mono PCM plus a
+10 ms loudness envelope and zero-crossing rate). Break detectors are plugins that turn an analysis into
+candidate break points; the engine merges their candidates and selects the final
+breaks according to a single settings schema (see `normalize_break_settings`).
+Routes and the job runner share the analysis through `get_break_engine()`.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydub import AudioSegment
+
+from .audio_utilities import audio_segment_to_whisper_input
+from .cache_utils import file_sha256, get_cache_dir, text_sha256
+from .transcript_index import TranscriptIndex
+from .waveform_peaks import write_peak_pyramid
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_SAMPLE_RATE = 16000
+FRAME_MS = 10
+SILENCE_FLOOR_DB = -120.0
+JINGLE_FLOOR_DB = -60.0
+ANALYSIS_CACHE_VERSION = 3
+
+# One settings schema for every caller. Values are the defaults used when a key is missing.
+DEFAULT_BREAK_SETTINGS = {
+    'detectors': None,                  # None = derive from the other settings (silence is always on)
+    'silence_threshold': -40,           # dBFS below which a frame counts as silent
+    'min_silence_len': 1500,            # ms of continuous silence needed for a silence candidate
+    'break_count': None,                # None = return every candidate (previews only; see job_break_settings)
+    'min_duration_between_sec': 0,      # spacing between breaks (and from the episode start)
+    'max_duration_between_sec': None,
+    'cue_phrases': [],                  # e.g. ["commercial break", "we'll be right back"]
+    'audio_keys': [],                   # paths to jingles/stingers that mark a break
+    'jingle_match_threshold': 0.9,      # normalized correlation needed for a jingle match
+    'fixed_interval_sec': None,         # place a break every N seconds...
+    'snap_window_sec': 30,              # ...snapped to the nearest silence within this window
+    'merge_window_ms': 2000,            # candidates closer than this are merged
+}
+
+# Breaks a job inserts when it does not set a count (the job runner's historical default).
+DEFAULT_JOB_BREAK_COUNT = 2
+
+# Historical names for the same settings (job columns, template keys, old routes).
+_SETTING_ALIASES = {
+    'silence_thresh': 'silence_threshold',
+    'commercial_breaks_min_silence_ms': 'min_silence_len',
+    'min_silence_for_break_ms': 'min_silence_len',
+    'commercial_breaks_count': 'break_count',
+    'commercial_breaks_min_duration_between_sec': 'min_duration_between_sec',
+    'min_duration_between_breaks_sec': 'min_duration_between_sec',
+    'commercial_breaks_max_duration_between_sec': 'max_duration_between_sec',
+    'max_duration_between_breaks_sec': 'max_duration_between_sec',
+    'commercial_breaks_cue_phrases': 'cue_phrases',
+    'commercial_breaks_audio_keys': 'audio_keys',
+    'commercial_audio_keys': 'audio_keys',
+}
+
+
+def _as_list(value) -> List[str]:
+    """Accepts a list or a comma-separated string and returns a list of non-empty strings."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def _as_optional_float(value) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    return float(value)
+
+
+def normalize_break_settings(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Maps any of the historical settings dicts onto the engine schema.
+
+    Unknown keys are ignored, aliases are resolved, CSV strings become lists and the
+    detector list is derived from the settings when it is not given explicitly.
+    """
+    normalized = dict(DEFAULT_BREAK_SETTINGS)
+    for key, value in (settings or {}).items():
+        key = _SETTING_ALIASES.get(key, key)
+        if key in normalized and value is not None:
+            normalized[key] = value
+
+    normalized['silence_threshold'] = float(normalized['silence_threshold'])
+    normalized['min_silence_len'] = int(normalized['min_silence_len'])
+    normalized['break_count'] = int(normalized['break_count']) if normalized['break_count'] not in (None, '') else None
+    normalized['min_duration_between_sec'] = float(normalized['min_duration_between_sec'] or 0)
+    normalized['max_duration_between_sec'] = _as_optional_float(normalized['max_duration_between_sec'])
+    normalized['fixed_interval_sec'] = _as_optional_float(normalized['fixed_interval_sec'])
+    normalized['snap_window_sec'] = float(normalized['snap_window_sec'])
+    normalized['jingle_match_threshold'] = float(normalized['jingle_match_threshold'])
+    normalized['merge_window_ms'] = int(normalized['merge_window_ms'])
+    normalized['cue_phrases'] = [p.lower() for p in _as_list(normalized['cue_phrases'])]
+    normalized['audio_keys'] = _as_list(normalized['audio_keys'])
+
+    if normalized['detectors'] is None:
+        detectors = ['silence']
+        if normalized['cue_phrases']: detectors.append('cue_phrase')
+        if normalized['audio_keys']: detectors.append('jingle')
+        if normalized['fixed_interval_sec']: detectors.append('fixed_interval')
+        normalized['detectors'] = detectors
+    else:
+        normalized['detectors'] = _as_list(normalized['detectors'])
+    return normalized
+
+
+def job_break_settings(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """A job's break settings with DEFAULT_JOB_BREAK_COUNT applied when no count is set."""
+    settings = dict(settings or {})
+    if normalize_break_settings(settings)['break_count'] is None:
+        settings['break_count'] = DEFAULT_JOB_BREAK_COUNT
+    return settings
+
+
+class AudioAnalysis:
+    """Decoded/analyzed representation of one recording, shared by every consumer."""
+
+    def __init__(self, envelope_db: np.ndarray, duration_ms: int,
+                 samples: Optional[np.ndarray] = None, sample_rate: int = ANALYSIS_SAMPLE_RATE,
+                 frame_ms: int = FRAME_MS, source_path: Optional[str] = None,
+                 content_hash: Optional[str] = None, zcr: Optional[np.ndarray] = None):
+        self.envelope_db = envelope_db
+        # Per-frame zero-crossing rate (fraction of sample pairs changing sign), used by the VAD.
+        self.zcr = zcr
+        self.duration_ms = int(duration_ms)
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.source_path = source_path
+        self.content_hash = content_hash
+        # Optional word-level transcript ({'word', 'start', 'end'} in seconds) for cue detection.
+        self.words: Optional[List[Dict[str, Any]]] = None
+
+    @classmethod
+    def from_samples(cls, samples: np.ndarray, sample_rate: int = ANALYSIS_SAMPLE_RATE,
+                     keep_samples: bool = True, **kwargs) -> 'AudioAnalysis':
+        """Builds the analysis from mono float32 samples in [-1.0, 1.0]."""
+        samples = np.asarray(samples, dtype=np.float32)
+        frame_len = int(sample_rate * FRAME_MS / 1000)
+        n_frames = int(np.ceil(len(samples) / frame_len)) if len(samples) else 0
+        padded = np.zeros(n_frames * frame_len, dtype=np.float32)
+        padded[:len(samples)] = samples
+        frames = padded.reshape(n_frames, frame_len)
+        rms = np.sqrt(np.mean(np.square(frames), axis=1)) if n_frames else np.zeros(0)
+        with np.errstate(divide='ignore'):
+            envelope_db = np.maximum(20.0 * np.log10(rms), SILENCE_FLOOR_DB).astype(np.float32)
+        zcr = np.zeros(n_frames, dtype=np.float32)
+        block = 6000  # frames per block (one minute) keeps the sign/diff temporaries small
+        for start in range(0, n_frames, block):
+            signs = np.signbit(frames[start:start + block])
+            zcr[start:start + block] = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_len - 1)
+        duration_ms = int(round(len(samples) * 1000 / sample_rate))
+        return cls(envelope_db, duration_ms, samples if keep_samples else None, sample_rate, FRAME_MS,
+                   zcr=zcr, **kwargs)
+
+    @classmethod
+    def from_segment(cls, audio: AudioSegment, keep_samples: bool = True, **kwargs) -> 'AudioAnalysis':
+        return cls.from_samples(audio_segment_to_whisper_input(audio), ANALYSIS_SAMPLE_RATE, keep_samples, **kwargs)
+
+    @classmethod
+    def from_file(cls, audio_file_path: str, keep_samples: bool = True,
+                  content_hash: Optional[str] = None) -> 'AudioAnalysis':
+        audio = AudioSegment.from_file(audio_file_path)
+        return cls.from_segment(audio, keep_samples, source_path=audio_file_path, content_hash=content_hash)
+
+    def save(self, file_path: str):
+        """Persists everything except the PCM samples (the envelope is all detectors need)."""
+        with open(file_path, 'wb') as f:
+            np.savez(f, envelope_db=self.envelope_db, zcr=self.zcr if self.zcr is not None else np.zeros(0),
+                     meta=np.array([ANALYSIS_CACHE_VERSION, self.duration_ms, self.sample_rate, self.frame_ms]))
+
+    @classmethod
+    def load(cls, file_path: str, **kwargs) -> Optional['AudioAnalysis']:
+        with np.load(file_path) as data:
+            version, duration_ms, sample_rate, frame_ms = (int(v) for v in data['meta'])
+            if version != ANALYSIS_CACHE_VERSION:
+                return None
+            zcr = data['zcr'] if len(data['zcr']) else None
+            return cls(data['envelope_db'], duration_ms, None, sample_rate, frame_ms, zcr=zcr, **kwargs)
+
+    def silent_runs(self, threshold_db: float, min_len_ms: int) -> List[Tuple[int, int]]:
+        """Returns (start_ms, end_ms) for every run of frames below threshold_db lasting min_len_ms+."""
+        silent = np.concatenate(([0], (self.envelope_db < threshold_db).astype(np.int8), [0]))
+        edges = np.diff(silent)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        min_frames = max(1, int(np.ceil(min_len_ms / self.frame_ms)))
+        keep = (ends - starts) >= min_frames
+        return [(int(s * self.frame_ms), min(int(e * self.frame_ms), self.duration_ms))
+                for s, e in zip(starts[keep], ends[keep])]
+
+
+# --- Detector plugins ---
+
+_DETECTOR_REGISTRY: Dict[str, type] = {}
+
+
+def register_detector(cls):
+    """Class decorator registering a BreakDetector subclass under its `name`."""
+    _DETECTOR_REGISTRY[cls.name] = cls
+    return cls
+
+
+def get_detector(name: str) -> Optional['BreakDetector']:
+    detector_cls = _DETECTOR_REGISTRY.get(name)
+    return detector_cls() if detector_cls else None
+
+
+class BreakDetector:
+    """
+    Base class for break detectors. `detect` returns candidate dicts with
+    'start_ms', 'end_ms', 'time_ms' (where the break goes) and a 'score' in [0, 1].
+    """
+    name: str = ''
+
+    def detect(self, analysis: AudioAnalysis, settings: Dict[str, Any]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _candidate(self, start_ms: int, end_ms: int, time_ms: int, score: float) -> Dict[str, Any]:
+        return {'start_ms': int(start_ms), 'end_ms': int(end_ms), 'time_ms': int(time_ms),
+                'score': float(score), 'sources': [self.name]}
+
+
+@register_detector
+class SilenceDetector(BreakDetector):
+    """Breaks in the middle of long silences (the classic behaviour)."""
+    name = 'silence'
+
+    def detect(self, analysis, settings):
+        min_len = settings['min_silence_len']
+        return [self._candidate(start, end, (start + end) // 2, min(1.0, (end - start) / (2.0 * min_len)))
+                for start, end in analysis.silent_runs(settings['silence_threshold'], min_len)]
+
+
+@register_detector
+class CuePhraseDetector(BreakDetector):
+    """Breaks right after a spoken cue phrase; needs `analysis.words`."""
+    name = 'cue_phrase'
+
+    def detect(self, analysis, settings):
+        if not analysis.words:
+            logger.info("Cue phrase detection skipped: no word-level transcript attached to the analysis.")
+            return []
+        index = TranscriptIndex.from_words(analysis.words)
+        return [self._candidate(start_ms, end_ms, end_ms, 1.0)
+                for phrase in settings['cue_phrases'] for start_ms, end_ms in index.phrase_spans(phrase)]
+
+
+@register_detector
+class JingleDetector(BreakDetector):
+    """Finds occurrences of known jingles by correlating loudness envelopes."""
+    name = 'jingle'
+
+    def detect(self, analysis, settings):
+        candidates = []
+        for jingle_path in settings['audio_keys']:
+            if not os.path.exists(jingle_path):
+                logger.warning(f"Jingle detection: audio file not found, skipping: {jingle_path}")
+                continue
+            jingle = get_break_engine().analyze(jingle_path, keep_samples=False)
+            for start_ms, score in self._match(analysis.envelope_db, jingle.envelope_db,
+                                               settings['jingle_match_threshold'], analysis.frame_ms):
+                end_ms = start_ms + jingle.duration_ms
+                candidates.append(self._candidate(start_ms, end_ms, end_ms, score))
+        return candidates
+
+    @staticmethod
+    def _match(signal: np.ndarray, template: np.ndarray, threshold: float, frame_ms: int) -> List[Tuple[int, float]]:
+        n, m = len(signal), len(template)
+        if m < 2 or n < m:
+            return []
+        # Clip to a practical floor so digital silence doesn't dominate the correlation.
+        template = np.maximum(template.astype(np.float64), JINGLE_FLOOR_DB)
+        template = (template - template.mean()) / (template.std() or 1.0)
+        signal = np.maximum(signal.astype(np.float64), JINGLE_FLOOR_DB)
+        # Sliding mean/std of the signal over windows of length m, via cumulative sums.
+        csum = np.concatenate(([0.0], np.cumsum(signal)))
+        csum2 = np.concatenate(([0.0], np.cumsum(signal * signal)))
+        win_mean = (csum[m:] - csum[:-m]) / m
+        win_std = np.sqrt(np.maximum((csum2[m:] - csum2[:-m]) / m - win_mean ** 2, 1e-12))
+        size = 1 << int(np.ceil(np.log2(n + m)))
+        corr = np.fft.irfft(np.fft.rfft(signal, size) * np.conj(np.fft.rfft(template, size)), size)[:n - m + 1]
+        # Flat windows (silence, steady tones) have no shape to match against.
+        scores = np.where(win_std >= 1.0, corr / (m * win_std), 0.0)
+        matches = []
+        for idx in np.argsort(scores)[::-1]:
+            if scores[idx] < threshold:
+                break
+            if all(abs(idx - other) >= m for other, _ in matches):
+                matches.append((int(idx), float(scores[idx])))
+        return [(idx * frame_ms, min(1.0, score)) for idx, score in sorted(matches)]
+
+
+@register_detector
+class FixedIntervalDetector(BreakDetector):
+    """Breaks every `fixed_interval_sec`, snapped to the nearest silence when one is close."""
+    name = 'fixed_interval'
+
+    def detect(self, analysis, settings):
+        interval_ms = int(settings['fixed_interval_sec'] * 1000)
+        if interval_ms <= 0:
+            return []
+        snap_ms = int(settings['snap_window_sec'] * 1000)
+        # Shorter silences are acceptable here; the interval, not the pause, drives placement.
+        runs = analysis.silent_runs(settings['silence_threshold'], max(FRAME_MS, settings['min_silence_len'] // 3))
+        mids = np.array([(s + e) // 2 for s, e in runs], dtype=np.int64)
+        candidates = []
+        for target in range(interval_ms, analysis.duration_ms, interval_ms):
+            if len(mids):
+                nearest = int(mids[np.argmin(np.abs(mids - target))])
+                if abs(nearest - target) <= snap_ms:
+                    candidates.append(self._candidate(nearest, nearest, nearest, 0.6))
+                    continue
+            candidates.append(self._candidate(target, target, target, 0.4))
+        return candidates
+
+
+# --- Engine ---
+
+def _merge_candidates(candidates: List[Dict[str, Any]], merge_window_ms: int) -> List[Dict[str, Any]]:
+    """Merges candidates that land within merge_window_ms of each other, keeping the best score."""
+    merged: List[Dict[str, Any]] = []
+    for cand in sorted(candidates, key=lambda c: c['time_ms']):
+        if merged and cand['time_ms'] - merged[-1]['time_ms'] <= merge_window_ms:
+            best = merged[-1]
+            sources = sorted(set(best['sources']) | set(cand['sources']))
+            if cand['score'] > best['score']:
+                merged[-1] = dict(cand)
+            merged[-1]['sources'] = sources
+            # Agreement between detectors is worth more than either alone.
+            merged[-1]['score'] = min(1.0, max(best['score'], cand['score']) + 0.1)
+        else:
+            merged.append(dict(cand))
+    return merged
+
+
+def select_breaks(candidates: List[Dict[str, Any]], settings: Dict[str, Any], duration_ms: int) -> List[Dict[str, Any]]:
+    """Applies break_count and the min/max spacing rules to merged candidates."""
+    if settings['break_count'] is None:
+        chosen = candidates
+    else:
+        min_gap = int(settings['min_duration_between_sec'] * 1000)
+        max_gap = int(settings['max_duration_between_sec'] * 1000) if settings['max_duration_between_sec'] else None
+        chosen, last_ms = [], 0
+        for _ in range(settings['break_count']):
+            eligible = [c for c in candidates if c['time_ms'] >= last_ms + min_gap and c['time_ms'] < duration_ms
+                        and not any(c is prev for prev in chosen)]
+            if not eligible:
+                break
+            in_window = [c for c in eligible if max_gap is None or c['time_ms'] <= last_ms + max_gap]
+            pick = max(in_window or eligible, key=lambda c: (c['score'], -c['time_ms']))
+            chosen.append(pick)
+            last_ms = pick['time_ms']
+
+    breaks = []
+    for i, cand in enumerate(chosen, start=1):
+        brk = dict(cand)
+        brk.update({'id': f"break_{i}", 'label': f"Commercial Break {i}", 'time_sec': cand['time_ms'] / 1000.0})
+        breaks.append(brk)
+    return breaks
+
+
+class BreakEngine:
+    """Decodes/analyzes recordings once (memory + disk cache) and runs the detector plugins."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_in_memory: int = 4):
+        self.cache_dir = cache_dir or get_cache_dir('analysis')
+        self.max_in_memory = max_in_memory
+        self._analyses: 'OrderedDict[str, AudioAnalysis]' = OrderedDict()
+        self._hash_by_stat: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stat_key(audio_file_path: str) -> Tuple[str, int, int]:
+        st = os.stat(audio_file_path)
+        return os.path.abspath(audio_file_path), st.st_size, st.st_mtime_ns
+
+    def _stat_index_path(self, stat_key: Tuple[str, int, int]) -> str:
+        return os.path.join(self.cache_dir, f"stat_{text_sha256(*stat_key)[:32]}")
+
+    def known_content_hash(self, audio_file_path: str) -> Optional[str]:
+        """
+        The file's SHA-256 if it was computed before for the same (path, size, mtime), from
+        memory or the on-disk index next to the analyses; None otherwise. Never reads the file.
+        """
+        stat_key = self._stat_key(audio_file_path)
+        digest = self._hash_by_stat.get(stat_key)
+        if digest is None:
+            try:
+                with open(self._stat_index_path(stat_key), 'r') as f:
+                    digest = f.read().strip() or None
+            except OSError:
+                return None
+            if digest:
+                self._hash_by_stat[stat_key] = digest
+        return digest
+
+    def _remember_hash(self, audio_file_path: str, digest: str):
+        """Memoizes the file's hash in memory and in the on-disk (path, size, mtime) index."""
+        stat_key = self._stat_key(audio_file_path)
+        if self._hash_by_stat.get(stat_key) == digest:
+            return
+        self._hash_by_stat[stat_key] = digest
+        index_path = self._stat_index_path(stat_key)
+        try:
+            temp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.part"
+            with open(temp_path, 'w') as f:
+                f.write(digest)
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            logger.warning(f"Could not write content-hash index for {audio_file_path}: {e}")
+
+    def content_hash(self, audio_file_path: str) -> str:
+        """SHA-256 of the file, memoized on (path, size, mtime) so repeat calls don't re-read it."""
+        digest = self.known_content_hash(audio_file_path)
+        if digest is None:
+            digest = file_sha256(audio_file_path)
+            self._remember_hash(audio_file_path, digest)
+        return digest
+
+    def _cache_path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.npz")
+
+    def get_cached(self, content_hash: str) -> Optional[AudioAnalysis]:
+        """Returns an analysis from memory or disk without decoding anything, or None."""
+        with self._lock:
+            analysis = self._analyses.get(content_hash)
+            if analysis is not None:
+                self._analyses.move_to_end(content_hash)
+                return analysis
+        cache_path = self._cache_path(content_hash)
+        if os.path.exists(cache_path):
+            try:
+                analysis = AudioAnalysis.load(cache_path, content_hash=content_hash)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable analysis cache {cache_path}: {e}")
+                analysis = None
+            if analysis is not None:
+                self._remember(analysis)
+            return analysis
+        return None
+
+    def _remember(self, analysis: AudioAnalysis):
+        with self._lock:
+            self._analyses[analysis.content_hash] = analysis
+            self._analyses.move_to_end(analysis.content_hash)
+            while len(self._analyses) > self.max_in_memory:
+                self._analyses.popitem(last=False)
+
+    def analyze(self, audio_file_path: str, keep_samples: bool = False,
+                content_hash: Optional[str] = None) -> AudioAnalysis:
+        """
+        Returns the analysis for a recording, decoding it only if no cached analysis exists
+        (or if PCM samples are requested and the cached copy was loaded without them).
+        Callers that already hashed the file while receiving it pass `content_hash`.
+        """
+        if content_hash is None:
+            content_hash = self.content_hash(audio_file_path)
+        else:
+            self._remember_hash(audio_file_path, content_hash)  # so dry runs can find the analysis
+        analysis = self.get_cached(content_hash)
+        if analysis is not None and (analysis.samples is not None or not keep_samples):
+            if analysis.source_path is None:
+                analysis.source_path = audio_file_path
+            return analysis
+
+        logger.info(f"Decoding and analyzing '{audio_file_path}' (sha256 {content_hash[:12]}).")
+        fresh = AudioAnalysis.from_file(audio_file_path, keep_samples=True, content_hash=content_hash)
+        try:
+            # The PCM is in memory only now, so this is the one cheap moment to build the peaks.
+            write_peak_pyramid(content_hash, fresh.samples, fresh.sample_rate, fresh.duration_ms)
+        except OSError as e:
+            logger.warning(f"Could not write waveform peaks for {audio_file_path}: {e}")
+        if not keep_samples:
+            fresh.samples = None
+        if analysis is not None:
+            fresh.words = analysis.words
+        try:
+            fresh.save(self._cache_path(content_hash))
+        except OSError as e:
+            logger.warning(f"Could not write analysis cache for {audio_file_path}: {e}")
+        self._remember(fresh)
+        return fresh
+
+    def detect(self, analysis: AudioAnalysis, settings: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Runs the configured detectors over an analysis and returns the selected breaks."""
+        settings = normalize_break_settings(settings)
+        candidates = []
+        for name in settings['detectors']:
+            detector = get_detector(name)
+            if detector is None:
+                logger.warning(f"Unknown break detector '{name}' ignored.")
+                continue
+            found = detector.detect(analysis, settings)
+            logger.info(f"Break detector '{name}' produced {len(found)} candidate(s).")
+            candidates.extend(found)
+        merged = _merge_candidates(candidates, settings['merge_window_ms'])
+        return select_breaks(merged, settings, analysis.duration_ms)
+
+    def detect_file(self, audio_file_path: str, settings: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return self.detect(self.analyze(audio_file_path), settings)
+
+
+_default_engine: Optional[BreakEngine] = None
+_default_engine_lock = threading.Lock()
+
+
+def get_break_engine() -> BreakEngine:
+    """Returns the process-wide engine so every route and the job runner share one cache."""
+    global _default_engine
+    if _default_engine is None:
+        with _default_engine_lock:
+            if _default_engine is None:
+                _default_engine = BreakEngine()
+    return _default_engine
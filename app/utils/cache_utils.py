@@ -0,0 +1,41 @@
+"""
+Shared helpers for the on-disk artifact caches (analysis, previews, transcripts, ...).
+"""
+import hashlib
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Root directory for every local cache. Cloud Run only gives us ephemeral disk, so this
+# defaults to the temp dir; point PODCAST_CACHE_DIR at a persistent volume where one exists.
+CACHE_ROOT = os.environ.get('PODCAST_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'podcastpro_cache'))
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_cache_dir(name: str) -> str:
+    """Returns (and creates if needed) the cache sub-directory for `name`."""
+    path = os.path.join(CACHE_ROOT, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_sha256(file_path: str) -> str:
+    """Streams a file through SHA-256 and returns the hex digest."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def text_sha256(*parts) -> str:
+    """Returns a SHA-256 hex digest over the string form of `parts`, joined unambiguously."""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = str(part).encode('utf-8')
+        digest.update(len(encoded).to_bytes(8, 'big'))
+        digest.update(encoded)
+    return digest.hexdigest()
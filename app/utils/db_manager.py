@@ -174,6 +174,7 @@ add_podcast_project = db_podcasts.add_podcast_project
 get_podcast_project = db_podcasts.get_podcast_project
 get_all_podcast_projects = db_podcasts.get_all_podcast_projects
 update_podcast_project = db_podcasts.update_podcast_project
+is_cover_art_in_use = db_podcasts.is_cover_art_in_use
 
 # Job Processing Management
 add_processing_job = db_jobs.add_processing_job
@@ -1,35 +1,25 @@
-from pydub import AudioSegment
-from pydub.silence import detect_silence
 import logging
 
+from .break_engine import get_break_engine
+
 logger = logging.getLogger(__name__)
 
 def analyze_audio_for_breaks(audio_file_path, settings):
     """
     Analyzes an audio file to find suitable break points based on silence.
-    This is the real implementation.
+    Thin wrapper over the shared break engine; returns break times in seconds.
     """
     logger.info(f"--- Starting break analysis for: {audio_file_path} ---")
-    
-    silence_thresh = settings.get('silence_threshold', -40)
-    min_silence_len = settings.get('min_silence_len', 1500)
 
     try:
-        audio = AudioSegment.from_file(audio_file_path)
-        logger.info(f"Audio loaded successfully. Duration: {len(audio) / 1000.0:.2f}s")
-
-        silences = detect_silence(
-            audio,
-            min_silence_len=int(min_silence_len),
-            silence_thresh=int(silence_thresh)
-        )
+        breaks = get_break_engine().detect_file(audio_file_path, settings)
 
-        if not silences:
+        if not breaks:
             logger.info("--- No periods of silence found matching the criteria. ---")
             return []
 
-        timestamps = [((start + end) / 2) / 1000.0 for start, end in silences]
-        
+        timestamps = [brk['time_sec'] for brk in breaks]
+
         logger.info(f"--- Found {len(timestamps)} potential breaks at: {timestamps} ---")
         return timestamps
 
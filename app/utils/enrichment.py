@@ -0,0 +1,226 @@
+"""
+Concurrent enrichment stage for a podcast job.
+
+The poster lookup (OMDb), the AI intro (ElevenLabs TTS) and the show notes (Gemini) are
+network-bound and do not depend on the audio work. `run_job` therefore starts them on a
+thread pool as soon as their inputs are known: OMDb and TTS once the job settings are
+resolved. Gemini needs the transcript, so transcription and the Gemini call run together
+as one background task (`prefetch_after`). Decoding and analysis keep running on the main
+thread meanwhile.
+
+Client methods marked `@prefetchable` consult the active stage first. When the audio
+pipeline later makes the same call (same kind, same key), it receives the prefetched
+result, waiting at most for the rest of that task's timeout, and no second request is
+made. A task that times out or fails yields the method's usual failure value. At the end
+the stage logs how much network time was overlapped with other work.
+
+The active stage is a context variable, so jobs running on different threads of the same
+worker process each see only their own stage.
+"""
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUTS_SEC = {
+    'omdb': 20.0,
+    'tts': 60.0,
+    'gemini': 120.0,
+}
+
+_active: contextvars.ContextVar = contextvars.ContextVar('enrichment_stage', default=None)
+
+
+def prefetchable(kind: str, key: Callable[..., Hashable], default: Any = None):
+    """
+    Marks a client method whose result an EnrichmentStage may compute ahead of time.
+    `key(self, *args, **kwargs)` identifies equivalent calls; `default` (a value, or a
+    callable taking the same arguments) is returned when the prefetched task times out or fails.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            stage = _active.get()
+            if stage is not None:
+                found, value = stage.claim(kind, key(self, *args, **kwargs))
+                if found:
+                    return value
+            return method(self, *args, **kwargs)
+        wrapper.prefetch_kind = kind
+        wrapper.prefetch_key = key
+        wrapper.prefetch_default = default
+        return wrapper
+    return decorator
+
+
+class _Task:
+    def __init__(self, future: Optional[Future], timeout: float, default: Callable[[], Any]):
+        self.future = future
+        self.timeout = timeout
+        self.default = default  # called only if the task times out or fails
+        self.submitted = time.perf_counter()
+        self.key_known = threading.Event()  # set once a prefetch_after task knows its arguments
+        self.run_sec: Optional[float] = None
+        self.waited_sec = 0.0
+        self.claimed = False
+        self.outcome = 'pending'
+
+
+class EnrichmentStage:
+    """Thread pool of prefetched client calls for one job; `start` it (or use it as a context manager), then `close`."""
+
+    def __init__(self, timeouts: Optional[Dict[str, float]] = None, max_workers: int = 3):
+        self.timeouts = dict(DEFAULT_TIMEOUTS_SEC, **(timeouts or {}))
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='enrichment')
+        self._tasks: Dict[Tuple[str, Hashable], _Task] = {}
+        self._deferred: Dict[str, List[_Task]] = {}  # prefetch_after tasks whose key is not known yet
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _default_for(bound_method, args, kwargs) -> Callable[[], Any]:
+        default = bound_method.__func__.prefetch_default
+        if callable(default):
+            return lambda: default(bound_method.__self__, *args, **kwargs)
+        return lambda: default
+
+    def prefetch(self, bound_method, *args, **kwargs) -> bool:
+        """Starts `bound_method(*args, **kwargs)` (a @prefetchable client method) in the background."""
+        method = bound_method.__func__
+        kind = method.prefetch_kind
+        task_key = (kind, method.prefetch_key(bound_method.__self__, *args, **kwargs))
+        raw = method.__wrapped__
+        with self._lock:
+            if task_key in self._tasks:
+                return False
+            task = _Task(None, self.timeouts.get(kind, 60.0), self._default_for(bound_method, args, kwargs))
+            task.key_known.set()
+
+            def run():
+                start = time.perf_counter()
+                try:
+                    return raw(bound_method.__self__, *args, **kwargs)
+                finally:
+                    task.run_sec = time.perf_counter() - start
+
+            # Run in a copy of the caller's context, so the task's log records are attributed to its job.
+            task.future = self._pool.submit(contextvars.copy_context().run, run)
+            self._tasks[task_key] = task
+        logger.info(f"Enrichment: started {kind} in the background (timeout {task.timeout:.0f}s).")
+        return True
+
+    def prefetch_after(self, prepare: Callable[[], Tuple[tuple, dict]], bound_method) -> None:
+        """
+        Starts one background task that first runs `prepare()` (e.g. transcription), which
+        returns the (args, kwargs) for `bound_method`, and then calls the method with them. The
+        result is claimable under the key of those arguments once they are known; the kind's
+        timeout counts from that moment.
+        """
+        method = bound_method.__func__
+        kind = method.prefetch_kind
+        raw = method.__wrapped__
+        task = _Task(None, self.timeouts.get(kind, 60.0), lambda: None)
+
+        def run():
+            start = time.perf_counter()
+            try:
+                try:
+                    args, kwargs = prepare()
+                    task_key = (kind, method.prefetch_key(bound_method.__self__, *args, **kwargs))
+                    task.default = self._default_for(bound_method, args, kwargs)
+                    with self._lock:
+                        self._tasks.setdefault(task_key, task)
+                    task.submitted = time.perf_counter()
+                except Exception as e:
+                    logger.error(f"Enrichment: could not prepare {kind}; it will run when needed instead: {e}")
+                    raise
+                finally:
+                    with self._lock:
+                        self._deferred[kind].remove(task)
+                    task.key_known.set()
+                logger.info(f"Enrichment: {kind} inputs ready after {task.submitted - start:.1f}s; calling it now.")
+                return raw(bound_method.__self__, *args, **kwargs)
+            finally:
+                task.run_sec = time.perf_counter() - start
+
+        with self._lock:
+            self._deferred.setdefault(kind, []).append(task)
+            task.future = self._pool.submit(contextvars.copy_context().run, run)
+        logger.info(f"Enrichment: started {kind} and the work it depends on in the background.")
+
+    def _wait_for_deferred(self, kind: str, timeout: float):
+        """Waits (up to `timeout`) until no prefetch_after task of `kind` is still preparing its arguments."""
+        deadline = time.perf_counter() + timeout
+        while True:
+            with self._lock:
+                pending = list(self._deferred.get(kind, ()))
+            if not pending:
+                return
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not pending[0].key_known.wait(remaining):
+                return
+
+    def claim(self, kind: str, key: Hashable) -> Tuple[bool, Any]:
+        """(True, result) for a prefetched call, waiting for it if needed; (False, None) if none was started."""
+        with self._lock:
+            task = self._tasks.get((kind, key))
+        if task is None:
+            self._wait_for_deferred(kind, self.timeouts.get(kind, 60.0))
+            with self._lock:
+                task = self._tasks.get((kind, key))
+        if task is None:
+            return False, None
+        start = time.perf_counter()
+        remaining = task.timeout - (start - task.submitted)
+        try:
+            value = task.future.result(timeout=max(0.0, remaining))
+            task.outcome = 'ok'
+        except FutureTimeoutError:
+            logger.warning(f"Enrichment: {kind} did not finish within {task.timeout:.0f}s; continuing without it.")
+            value, task.outcome = task.default(), 'timeout'
+        except Exception as e:
+            logger.error(f"Enrichment: {kind} failed: {e}")
+            value, task.outcome = task.default(), 'error'
+        task.waited_sec += time.perf_counter() - start
+        task.claimed = True
+        return True, value
+
+    def report(self) -> str:
+        """One-line summary: per-task run and wait times and the wall-clock time saved."""
+        parts, saved = [], 0.0
+        with self._lock:
+            tasks = list(self._tasks.items())
+        for (kind, _), task in tasks:
+            run_sec = task.run_sec if task.run_sec is not None else time.perf_counter() - task.submitted
+            if task.claimed:
+                # Serially the caller would have waited the whole run; it only waited `waited_sec`.
+                saved += max(0.0, min(run_sec, task.timeout) - task.waited_sec)
+                parts.append(f"{kind} {run_sec:.1f}s (waited {task.waited_sec:.1f}s, {task.outcome})")
+            else:
+                parts.append(f"{kind} {run_sec:.1f}s (unused)")
+        return f"{'; '.join(parts) or 'no tasks'}. ~{saved:.1f}s of network time overlapped with audio work."
+
+    def start(self) -> 'EnrichmentStage':
+        """Makes this the stage that @prefetchable methods called from this context consult."""
+        _active.set(self)
+        return self
+
+    def close(self):
+        """Deactivates the stage and logs its report."""
+        if _active.get() is self:
+            _active.set(None)
+        logger.info(f"Enrichment stage: {self.report()}")
+        # Do not hold the job on requests nobody is waiting for any more.
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> 'EnrichmentStage':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -3,9 +3,12 @@ Clients for interacting with external APIs: OMDb, Google Gemini, ElevenLabs.
 """
 import os
 import re
-import requests
+import shutil
+import threading
+import time
+import httpx
 import logging
-import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, Tuple, List
 from datetime import datetime
 from pydub import AudioSegment
@@ -15,25 +18,51 @@ try:
 except ImportError:
     SpellChecker = None
 
-logger = logging.getLogger(__name__)
+from .cache_utils import get_cache_dir, text_sha256
+from .audio_utilities import decode_audio_stream, pcm_to_audio_segment
+from .enrichment import prefetchable
+from .fake_services import api_base_url
+from .http_client import get_http_client
+from .image_pipeline import get_image_pipeline
+from .rate_limiter import RateLimitTimeout, acquire as acquire_rate_limit
+from .resilience import CircuitOpenError, call_with_timeout, guard, timeout_for
+from .tts_cache import get_tts_cache, normalize_tts_text
+from .ttl_cache import TTLCache
 
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
+logger = logging.getLogger(__name__)
 
-try:
-    import elevenlabs
-except ImportError:
-    elevenlabs = None
+OMDB_BASE_URL = "https://www.omdbapi.com/"
+OMDB_HIT_TTL_SEC = 7 * 24 * 3600
+OMDB_MISS_TTL_SEC = 24 * 3600  # "not found" can change once OMDb adds the film
 
 class OMDbClient:
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key
+        self.lookup_cache = TTLCache('omdb', OMDB_HIT_TTL_SEC)
 
     def set_api_key(self, api_key: str):
         self.api_key = api_key
 
+    def _probe_year(self, title: str, year: str) -> Tuple[Optional[str], bool]:
+        """One OMDb lookup: (poster URL or None, whether the request itself succeeded)."""
+        params = {'apikey': self.api_key, 't': title, 'y': year, 'plot': 'long', 'r': 'json'}
+        try:
+            logger.info(f"OMDb search: Title='{title}', Year='{year}'")
+            acquire_rate_limit('omdb')
+            with guard('omdb.search'):
+                response = get_http_client().request('GET', api_base_url('omdb', OMDB_BASE_URL), params=params,
+                                                     timeout=timeout_for('omdb.search'))
+                response.raise_for_status()
+            data = response.json()
+            if data.get('Response') == 'True' and data.get('Poster') and data['Poster'] != 'N/A':
+                return data['Poster'], True
+            return None, True
+        except (httpx.HTTPError, ValueError, RateLimitTimeout, CircuitOpenError) as e:
+            logger.error(f"OMDb API error during search for '{title}' (year: {year}): {e}")
+            return None, False
+
+    @prefetchable('omdb', key=lambda self, movie_title: (movie_title or '').strip().lower(),
+                  default=lambda self, movie_title: (None, movie_title))
     def search_movie_poster(self, movie_title: str) -> Tuple[Optional[str], Optional[str]]:
         if not self.api_key:
             logger.warning("OMDb API key not set.")
@@ -47,47 +76,77 @@ class OMDbClient:
         year_match = re.match(r'^(.*?)\s*\((\d{4})\)$', final_search_title)
         if year_match: final_search_title = year_match.group(1).strip()
 
-        base_url = "https://www.omdbapi.com/"
+        cache_key = TTLCache.key('poster_lookup', final_search_title.lower())
+        found, poster_url = self.lookup_cache.get(cache_key)
+        if found:
+            logger.info(f"OMDb cache {'hit' if poster_url else 'hit (not found)'} for '{final_search_title}'.")
+            return (poster_url, final_search_title) if poster_url else (None, original_title_for_return)
+
         current_year = datetime.now().year
         years_to_try = [str(current_year), str(current_year - 1), str(current_year - 2)]
 
-        for year_to_attempt in years_to_try:
-            params = {'apikey': self.api_key, 't': final_search_title, 'y': year_to_attempt, 'plot': 'long', 'r': 'json'}
-            try:
-                logger.info(f"OMDb search: Title='{final_search_title}', Year='{year_to_attempt}'")
-                response = requests.get(base_url, params=params); response.raise_for_status()
-                data = response.json()
-                if data.get('Response') == 'True' and data.get('Poster') and data['Poster'] != 'N/A':
-                    return data['Poster'], final_search_title # Return found poster and the title used for search
-            except requests.exceptions.RequestException as e:
-                logger.error(f"OMDb API error during search for '{final_search_title}' (year: {year_to_attempt}): {e}")
+        # Probe all years at once, then pick as the sequential lookup did: the most recent year with a poster.
+        with ThreadPoolExecutor(max_workers=len(years_to_try), thread_name_prefix='omdb') as pool:
+            results = list(pool.map(lambda year: self._probe_year(final_search_title, year), years_to_try))
+        for poster_url, _ in results:
+            if poster_url:
+                self.lookup_cache.put(cache_key, poster_url)
+                return poster_url, final_search_title # Return found poster and the title used for search
+        all_answered = all(answered for _, answered in results)
         logger.warning(f"OMDb search failed for '{final_search_title}' across attempted years.")
+        if all_answered:  # only remember a genuine "not found", never a network error
+            self.lookup_cache.put(cache_key, None, ttl_sec=OMDB_MISS_TTL_SEC)
         return None, original_title_for_return # Return None for poster, and the title that was searched
 
-class GeminiClient:
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key
-        self.model = None
-        if self.api_key and genai:
-            try:
-                genai.configure(api_key=self.api_key)
-                self.model = genai.GenerativeModel('gemini-2.0-flash')
-                logger.info("Gemini client initialized successfully.")
-            except Exception as e:
-                logger.warning(f"Google Gemini initialization failed: {e}")
-                self.model = None
-        elif not genai:
-            logger.warning("Google Generative AI SDK not installed.")
+    def download_poster(self, poster_url: str, destination_path: str) -> Optional[str]:
+        """
+        Saves the poster at `poster_url` to `destination_path`, downloading it only the first
+        time a URL is seen (images are cached by URL). The poster is stored as the image
+        pipeline's 'upload' derivative, a metadata-free JPEG, so the extension of the path
+        becomes .jpg. Returns the path written, or None.
+        """
+        if not poster_url:
+            return None
+        cache_dir = get_cache_dir('posters')
+        cached_path = os.path.join(cache_dir, text_sha256(poster_url)[:32] + (os.path.splitext(poster_url.split('?')[0])[1] or '.jpg'))
+        try:
+            if os.path.exists(cached_path):
+                logger.info(f"Poster cache hit for {poster_url}.")
+            else:
+                temp_path = f"{cached_path}.{os.getpid()}.{threading.get_ident()}.part"
+                try:
+                    with guard('posters.download'):
+                        with open(temp_path, 'wb') as f:
+                            for chunk in get_http_client().stream('GET', poster_url, timeout=timeout_for('posters.download')):
+                                f.write(chunk)
+                    os.replace(temp_path, cached_path)
+                finally:
+                    if os.path.exists(temp_path):  # the download failed part way: drop the fragment
+                        os.unlink(temp_path)
+            jpeg_path = f"{os.path.splitext(destination_path)[0]}.jpg"
+            exported_path = get_image_pipeline().export_variant(cached_path, 'upload', jpeg_path)
+            if exported_path == cached_path:  # not processable; hand over the original as before
+                os.makedirs(os.path.dirname(os.path.abspath(destination_path)), exist_ok=True)
+                shutil.copyfile(cached_path, destination_path)
+                return destination_path
+            return exported_path
+        except (httpx.HTTPError, OSError, CircuitOpenError) as e:
+            logger.error(f"Poster download failed for {poster_url}: {e}")
+            return None
 
-    def generate_content(self, transcript_text: str, episode_title: str, episode_movie_title: Optional[str] = None) -> Tuple[Optional[str], List[str]]:
-        if not self.model: logger.warning("Gemini model not available."); return None, []
-        
-        full_ep_title = f"{episode_title}" + (f": {episode_movie_title}" if episode_movie_title else "")
-        prompt = f"""You are an assistant for the "Cinema IRL" podcast.
-For the episode titled "{full_ep_title}", based on the following transcript:
-Transcript:
+GEMINI_API_BASE_URL = "https://generativelanguage.googleapis.com"
+GEMINI_MODEL_NAME = 'gemini-2.0-flash'
+# Bump when a prompt below changes, so cached show notes are regenerated.
+GEMINI_PROMPT_VERSION = 2
+GEMINI_CHUNK_TOKENS = 24000
+GEMINI_MAP_WORKERS = 4
+GEMINI_CACHE_TTL_SEC = 90 * 24 * 3600
+CHARS_PER_TOKEN = 4  # conservative estimate for English text; avoids a count_tokens round trip
+
+SHOW_NOTES_PROMPT = """You are an assistant for the "Cinema IRL" podcast.
+For the episode titled "{title}", based on the following {source_label}:
 ---
-{transcript_text}
+{source}
 ---
 Please provide:
 1. A concise and engaging episode introduction (50-150 words) for the podcast's show notes.
@@ -97,37 +156,189 @@ SUMMARY:
 [Your summary here]
 TAGS:
 [tag1, tag2, tag3, ...]"""
+
+CHUNK_NOTES_PROMPT = """You are an assistant for the "Cinema IRL" podcast.
+Below is part {part} of {parts} of the transcript of the episode titled "{title}".
+---
+{chunk}
+---
+Write concise notes (at most 200 words) on what is discussed in this part: films, people,
+topics and notable opinions or moments. Output only the notes."""
+
+def split_transcript_for_tokens(text: str, max_tokens: int) -> List[str]:
+    """Splits a transcript into chunks of at most ~max_tokens, breaking between sentences where possible."""
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return [text] if text.strip() else []
+    chunks, current, size = [], [], 0
+    for sentence in re.split(r'(?<=[.!?])\s+', text):
+        pieces = [sentence] if len(sentence) <= max_chars else \
+            [sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars)]
+        for piece in pieces:
+            if current and size + len(piece) + 1 > max_chars:
+                chunks.append(' '.join(current)); current, size = [], 0
+            current.append(piece); size += len(piece) + 1
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+def _parse_show_notes(text_content: str) -> Tuple[Optional[str], List[str]]:
+    summary_match = re.search(r"SUMMARY:\s*(.*?)\s*TAGS:", text_content, re.DOTALL | re.IGNORECASE)
+    tags_match = re.search(r"TAGS:\s*(.*)", text_content, re.DOTALL | re.IGNORECASE)
+    summary = summary_match.group(1).strip() if summary_match else None
+    tags_str = tags_match.group(1).strip() if tags_match else ""
+    tags_list = [tag.strip() for tag in tags_str.split(',') if tag.strip() and len(tag.strip()) <= 30][:20]
+    if not summary: logger.warning("Gemini: Could not parse summary.")
+    if not tags_list: logger.warning("Gemini: Could not parse tags.")
+    return summary, tags_list
+
+
+def _full_episode_title(episode_title: str, episode_movie_title: Optional[str] = None) -> str:
+    return f"{episode_title}" + (f": {episode_movie_title}" if episode_movie_title else "")
+
+class GeminiClient:
+    def __init__(self, api_key: Optional[str] = None, model_name: str = GEMINI_MODEL_NAME,
+                 fallback_summary: Optional[str] = None):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.fallback_summary = fallback_summary  # used when Gemini fails; '{episode_title}' is filled in
+        self.base_url = api_base_url('gemini', GEMINI_API_BASE_URL)
+        self.notes_cache = TTLCache('gemini', GEMINI_CACHE_TTL_SEC)
+        self._usage_lock = threading.Lock()
+
+    # A prefetched result is only used for the same episode title and the exact same transcript
+    # text (its SHA-256, whitespace included); any other call runs on its own.
+    @prefetchable('gemini',
+                  key=lambda self, transcript_text, episode_title, episode_movie_title=None:
+                      (_full_episode_title(episode_title, episode_movie_title), text_sha256(transcript_text or '')),
+                  default=lambda self, transcript_text, episode_title, episode_movie_title=None:
+                      self._fallback(_full_episode_title(episode_title, episode_movie_title)))
+    def generate_content(self, transcript_text: str, episode_title: str, episode_movie_title: Optional[str] = None) -> Tuple[Optional[str], List[str]]:
+        """
+        Show notes (summary, tags) for a transcript. Transcripts over GEMINI_CHUNK_TOKENS are
+        summarized map-reduce style: chunk notes in parallel, then one SUMMARY/TAGS pass over
+        the notes. Results are cached by transcript hash, title, model and prompt version.
+        """
+        full_ep_title = _full_episode_title(episode_title, episode_movie_title)
+        transcript_text = transcript_text or ''
+        cache_key = TTLCache.key(GEMINI_PROMPT_VERSION, self.model_name, full_ep_title, text_sha256(transcript_text))
+        found, cached = self.notes_cache.get(cache_key)
+        if found and cached:
+            logger.info(f"Gemini show notes cache hit for '{full_ep_title}'; no API call made.")
+            return cached['summary'], cached['tags']
+        if not self.api_key: logger.warning("Gemini API key not set."); return self._fallback(full_ep_title)
+
+        started = time.perf_counter()
+        usage = {'calls': 0, 'prompt_tokens': 0, 'output_tokens': 0}
+        chunks = split_transcript_for_tokens(transcript_text, GEMINI_CHUNK_TOKENS)
+        complete = True  # every chunk made it into the notes
         try:
-            response = self.model.generate_content(prompt)
-            text_content = response.text.strip()
-            summary_match = re.search(r"SUMMARY:\s*(.*?)\s*TAGS:", text_content, re.DOTALL | re.IGNORECASE)
-            tags_match = re.search(r"TAGS:\s*(.*)", text_content, re.DOTALL | re.IGNORECASE)
-            summary = summary_match.group(1).strip() if summary_match else None
-            tags_str = tags_match.group(1).strip() if tags_match else ""
-            tags_list = [tag.strip() for tag in tags_str.split(',') if tag.strip() and len(tag.strip()) <= 30][:20]
-            if not summary: logger.warning("Gemini: Could not parse summary.")
-            if not tags_list: logger.warning("Gemini: Could not parse tags.")
-            return summary, tags_list
-        except Exception as e: logger.error(f"Gemini content generation error: {e}", exc_info=True); return None, []
+            if len(chunks) <= 1:
+                text_content = self._generate(SHOW_NOTES_PROMPT.format(title=full_ep_title, source_label="transcript",
+                                                                       source=transcript_text), usage)
+            else:
+                chunk_notes = self._map_chunks(chunks, full_ep_title, usage)
+                notes = [n for n in chunk_notes if n]
+                complete = len(notes) == len(chunks)
+                if not notes:
+                    logger.error("Gemini: every transcript chunk failed to summarize."); return self._fallback(full_ep_title)
+                text_content = self._generate(SHOW_NOTES_PROMPT.format(title=full_ep_title, source_label="notes on the transcript, in order",
+                                                                       source="\n\n".join(notes)), usage)
+        except CircuitOpenError as e: logger.warning(f"Gemini skipped: {e}"); return self._fallback(full_ep_title)
+        except Exception as e: logger.error(f"Gemini content generation error: {e}", exc_info=True); return self._fallback(full_ep_title)
+        finally:
+            logger.info(f"Gemini show notes: {len(chunks)} chunk(s), {usage['calls']} call(s), "
+                        f"{usage['prompt_tokens']} prompt + {usage['output_tokens']} output tokens, "
+                        f"{time.perf_counter() - started:.1f}s.")
+
+        summary, tags_list = _parse_show_notes(text_content)
+        if not summary:
+            return self._fallback(full_ep_title)
+        if complete:
+            self.notes_cache.put(cache_key, {'summary': summary, 'tags': tags_list})
+        else:
+            logger.warning(f"Gemini: show notes for '{full_ep_title}' cover {len(notes)}/{len(chunks)} transcript "
+                           f"parts; not caching them, so the next run retries the missing parts.")
+        return summary, tags_list
+
+    def _fallback(self, full_ep_title: str) -> Tuple[Optional[str], List[str]]:
+        if not self.fallback_summary:
+            return None, []
+        logger.info("Gemini: using the template's fallback summary.")
+        return self.fallback_summary.replace('{episode_title}', full_ep_title), []
+
+    def _generate(self, prompt: str, usage: dict) -> str:
+        acquire_rate_limit('gemini')
+        with guard('gemini.generate'):
+            response = get_http_client().request(
+                'POST', f"{self.base_url}/v1beta/models/{self.model_name}:generateContent",
+                headers={'x-goog-api-key': self.api_key},
+                json={'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]},
+                timeout=timeout_for('gemini.generate'))
+            response.raise_for_status()
+        data = response.json()
+        metadata = data.get('usageMetadata') or {}
+        with self._usage_lock:
+            usage['calls'] += 1
+            usage['prompt_tokens'] += metadata.get('promptTokenCount', 0) or 0
+            usage['output_tokens'] += metadata.get('candidatesTokenCount', 0) or 0
+        candidates = data.get('candidates') or []
+        if not candidates:
+            raise ValueError(f"Gemini returned no candidates: {data.get('promptFeedback')}")
+        return ''.join(part.get('text', '') for part in candidates[0].get('content', {}).get('parts', [])).strip()
+
+    def _map_chunks(self, chunks: List[str], full_ep_title: str, usage: dict) -> List[Optional[str]]:
+        """
+        Summarizes the chunks concurrently (at most GEMINI_MAP_WORKERS at a time); returns the
+        notes in chunk order, None for each chunk that failed.
+        """
+        notes: List[Optional[str]] = [None] * len(chunks)
+        with ThreadPoolExecutor(max_workers=min(GEMINI_MAP_WORKERS, len(chunks)), thread_name_prefix='gemini-map') as pool:
+            futures = {pool.submit(self._generate, CHUNK_NOTES_PROMPT.format(title=full_ep_title, part=i + 1,
+                                                                              parts=len(chunks), chunk=chunk), usage): i
+                       for i, chunk in enumerate(chunks)}
+            for future in as_completed(futures):
+                try:
+                    notes[futures[future]] = future.result()
+                except Exception as e:
+                    logger.warning(f"Gemini: summarizing transcript part {futures[future] + 1}/{len(chunks)} failed: {e}")
+        return notes
+
+ELEVENLABS_API_BASE_URL = "https://api.elevenlabs.io"
 
 class ElevenLabsClient:
-    def __init__(self, api_key: Optional[str] = None):
-        self.client = None
-        if api_key and elevenlabs:
-            try:
-                self.client = elevenlabs.ElevenLabs(api_key=api_key)
-                logger.info("ElevenLabs client initialized successfully.")
-            except Exception as e:
-                logger.warning(f"ElevenLabs client initialization failed: {e}")
-        elif not elevenlabs:
-            logger.warning("ElevenLabs SDK not installed.")
+    DEFAULT_MODEL_ID = "eleven_monolingual_v1"
+    OUTPUT_FORMAT = "mp3_44100_128"
+    SAMPLE_RATE = 44100
 
+    def __init__(self, api_key: Optional[str] = None, model_id: str = DEFAULT_MODEL_ID):
+        self.api_key = api_key
+        self.model_id = model_id
+        self.base_url = api_base_url('elevenlabs', ELEVENLABS_API_BASE_URL)
+
+    @prefetchable('tts', key=lambda self, text, voice_id: (normalize_tts_text(text), voice_id))
     def generate_audio(self, text: str, voice_id: str) -> Optional[AudioSegment]:
-        if not self.client: logger.warning("ElevenLabs client not available."); return None
+        cache = get_tts_cache()
+        audio_bytes = cache.get(text, voice_id, self.model_id)
+        if audio_bytes is not None:
+            try:
+                return pcm_to_audio_segment(decode_audio_stream([audio_bytes], self.SAMPLE_RATE), self.SAMPLE_RATE)
+            except Exception as e: logger.error(f"ElevenLabs audio decoding error: {e}"); return None
+        if not self.api_key: logger.warning("ElevenLabs API key not set."); return None
+        received: List[bytes] = []
+
+        def stream():
+            # Tee the MP3 bytes for the cache while ffmpeg decodes them as they arrive.
+            for chunk in get_http_client().stream(
+                    'POST', f"{self.base_url}/v1/text-to-speech/{voice_id}/stream",
+                    params={'output_format': self.OUTPUT_FORMAT}, headers={'xi-api-key': self.api_key},
+                    json={'text': text, 'model_id': self.model_id}, timeout=timeout_for('elevenlabs.tts')):
+                received.append(chunk)
+                yield chunk
+
         try:
-            audio_generator = self.client.text_to_speech.convert(voice_id=voice_id, text=text, model_id="eleven_monolingual_v1")
-            audio_bytes = b''.join(audio_generator)
-            with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tf: tf.write(audio_bytes); temp_path = tf.name
-            audio = AudioSegment.from_mp3(temp_path); os.unlink(temp_path)
-            return audio
-        except Exception as e: logger.error(f"ElevenLabs audio generation error: {e}"); return None
\ No newline at end of file
+            acquire_rate_limit('elevenlabs')
+            samples = call_with_timeout('elevenlabs.tts', decode_audio_stream, stream(), self.SAMPLE_RATE)
+        except Exception as e: logger.error(f"ElevenLabs audio generation error: {e}"); return None
+        cache.put(text, voice_id, self.model_id, b''.join(received))
+        return pcm_to_audio_segment(samples, self.SAMPLE_RATE)
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+Local stand-ins for the paid external APIs (OMDb, Gemini, ElevenLabs, Spreaker).
+
+`python -m app.utils.fake_services --port 8765` serves all four from one process, with
+configurable latency, error rate and rate limiting per service (see behaviour.py). Setting
+FAKE_SERVICES_URL=http://127.0.0.1:8765 then points every client at it, so jobs and
+benchmarks run offline and reproducibly. <PROVIDER>_API_BASE_URL overrides one provider.
+"""
+import os
+from typing import Optional
+
+# Where each service lives on the fake server. Gemini's paths (/v1beta/models/...) are served at the root.
+SERVICE_PREFIXES = {
+    'omdb': '/omdb/',
+    'gemini': '',
+    'elevenlabs': '/elevenlabs',
+    'spreaker': '/spreaker/v2',
+}
+
+
+def api_base_url(provider: str, default: Optional[str] = None) -> Optional[str]:
+    """The base URL a client should use for `provider`: an explicit override, the fake server, or `default`."""
+    override = os.environ.get(f'{provider.upper()}_API_BASE_URL')
+    if override:
+        return override
+    fake = os.environ.get('FAKE_SERVICES_URL')
+    if fake:
+        return fake.rstrip('/') + SERVICE_PREFIXES[provider]
+    return default
+
+
+def start_fake_services(*args, **kwargs):
+    """See server.start_fake_services (imported lazily so clients do not pull in the fakes)."""
+    from .server import start_fake_services as start
+    return start(*args, **kwargs)
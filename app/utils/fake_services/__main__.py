@@ -0,0 +1,41 @@
+import argparse
+import json
+import logging
+import time
+
+from .server import start_fake_services
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve fake OMDb, Gemini, ElevenLabs and Spreaker APIs. "
+                    "Point the app at them with FAKE_SERVICES_URL=http://<host>:<port>.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request (all services).")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the latency.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second before 429s (0 = unlimited).")
+    parser.add_argument("--burst", type=float, default=1.0, help="Token-bucket burst for --rate-limit.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency jitter and injected errors.")
+    parser.add_argument("--tts-chunk-delay-ms", type=float, default=0.0,
+                        help="Delay between streamed TTS chunks, to mimic synthesis speed.")
+    parser.add_argument("--config", help='JSON with per-service overrides, e.g. \'{"gemini": {"latency_ms": 2000}}\'.')
+    args = parser.parse_args()
+
+    default = {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'error_rate': args.error_rate,
+               'rate_limit_per_sec': args.rate_limit, 'burst': args.burst}
+    services = start_fake_services(args.host, args.port, json.loads(args.config) if args.config else None,
+                                   default, args.seed, tts_chunk_delay_ms=args.tts_chunk_delay_ms)
+    print(f"export FAKE_SERVICES_URL={services.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        services.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Latency, error and rate-limit behaviour shared by the fake services.
+
+Each service gets a Behaviour: every request sleeps `latency_ms` (plus uniform jitter), is
+refused with 429 when the service's token bucket is empty, and otherwise fails with 503 at
+`error_rate`. The random draws come from a seeded generator, so a run with the same
+settings and request order behaves the same way every time.
+"""
+import functools
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from flask import jsonify
+
+
+@dataclass
+class Behaviour:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_per_sec: float = 0.0   # 0 = unlimited
+    burst: float = 1.0
+    seed: int = 0
+    stats: Dict[str, int] = field(default_factory=lambda: {'requests': 0, 'ok': 0, 'rate_limited': 0, 'errors': 0})
+
+    def __post_init__(self):
+        self._random = random.Random(self.seed)
+        self._tokens = max(1.0, self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _admit(self) -> Tuple[Optional[str], float]:
+        """(None to serve the request, or 'rate_limited' / 'error'; seconds of latency to apply)."""
+        with self._lock:
+            self.stats['requests'] += 1
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            outcome = None
+            if self.rate_limit_per_sec > 0:
+                now = time.monotonic()
+                self._tokens = min(max(1.0, self.burst), self._tokens + (now - self._updated) * self.rate_limit_per_sec)
+                self._updated = now
+                if self._tokens < 1.0:
+                    outcome = 'rate_limited'
+                else:
+                    self._tokens -= 1.0
+            if outcome is None and self._random.random() < self.error_rate:
+                outcome = 'error'
+            self.stats[outcome or 'ok'] = self.stats.get(outcome or 'ok', 0) + 1
+        return outcome, delay
+
+    def apply(self, view):
+        """Decorates a Flask view with this behaviour."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            outcome, delay = self._admit()
+            if outcome == 'rate_limited':
+                response = jsonify({'error': {'code': 429, 'message': 'Rate limit exceeded (fake service).'}})
+                response.status_code = 429
+                response.headers['Retry-After'] = f"{1.0 / self.rate_limit_per_sec:.3f}"
+                return response
+            time.sleep(delay)
+            if outcome == 'error':
+                response = jsonify({'error': {'code': 503, 'message': 'Service unavailable (injected by fake service).'}})
+                response.status_code = 503
+                return response
+            return view(*args, **kwargs)
+        return wrapper
+
+
+def behaviours_from_config(config: Optional[Dict[str, Dict[str, Any]]] = None,
+                           default: Optional[Dict[str, Any]] = None, seed: int = 0) -> Dict[str, Behaviour]:
+    """{'omdb': {...}, ...} (missing services use `default`) -> a Behaviour per service."""
+    from . import SERVICE_PREFIXES
+    config, default = config or {}, default or {}
+    return {name: Behaviour(**{'seed': seed + i, **default, **config.get(name, {})})
+            for i, name in enumerate(SERVICE_PREFIXES)}
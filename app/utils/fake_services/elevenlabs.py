@@ -0,0 +1,40 @@
+"""Fake ElevenLabs: text-to-speech returning a streamed MP3 of silence as long as the text would take to read."""
+import time
+
+from flask import Blueprint, Response, request
+
+from .behaviour import Behaviour
+
+# One MPEG-1 Layer III frame, 128 kbps, 44.1 kHz, mono, with all-zero side info (decodes to silence).
+_FRAME = bytes([0xFF, 0xFB, 0x90, 0xC0]) + bytes(413)
+_FRAME_SEC = 1152 / 44100.0
+CHARS_PER_SEC = 15.0
+STREAM_CHUNK_FRAMES = 40   # ~1 s of audio per chunk
+
+
+def silent_mp3(duration_sec: float) -> bytes:
+    return _FRAME * max(1, int(duration_sec / _FRAME_SEC))
+
+
+def create_blueprint(behaviour: Behaviour, stream_chunk_delay_ms: float = 0.0) -> Blueprint:
+    bp = Blueprint('fake_elevenlabs', __name__)
+
+    @bp.route('/elevenlabs/v1/text-to-speech/<voice_id>', methods=['POST'])
+    @bp.route('/elevenlabs/v1/text-to-speech/<voice_id>/stream', methods=['POST'])
+    @behaviour.apply
+    def text_to_speech(voice_id):
+        if not request.headers.get('xi-api-key'):
+            return {'detail': {'status': 'invalid_api_key', 'message': 'Missing xi-api-key.'}}, 401
+        body = request.get_json(silent=True) or {}
+        audio = silent_mp3(len(body.get('text', '')) / CHARS_PER_SEC)
+        chunk = len(_FRAME) * STREAM_CHUNK_FRAMES
+
+        def generate():
+            for start in range(0, len(audio), chunk):
+                if start and stream_chunk_delay_ms:
+                    time.sleep(stream_chunk_delay_ms / 1000.0)
+                yield audio[start:start + chunk]
+
+        return Response(generate(), mimetype='audio/mpeg')
+
+    return bp
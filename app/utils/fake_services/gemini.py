@@ -0,0 +1,38 @@
+"""Fake Gemini: the REST generateContent call the google-generativeai SDK makes for GeminiClient."""
+import re
+
+from flask import Blueprint, jsonify, request
+
+from .behaviour import Behaviour
+
+CHARS_PER_TOKEN = 4
+
+
+def _reply(prompt: str) -> str:
+    title = re.search(r'titled "([^"]*)"', prompt)
+    title = title.group(1) if title else 'this episode'
+    if 'SUMMARY:' in prompt:
+        return (f"SUMMARY:\nIn {title}, the hosts talk through the film scene by scene, trade favourite "
+                f"moments and argue about the ending.\nTAGS:\nmovies, film review, podcast, cinema, {title[:30]}")
+    return f"- The hosts discuss part of {title}.\n- Opinions differ on the pacing."
+
+
+def create_blueprint(behaviour: Behaviour) -> Blueprint:
+    bp = Blueprint('fake_gemini', __name__)
+
+    @bp.route('/<api_version>/models/<model>:generateContent', methods=['POST'])
+    @behaviour.apply
+    def generate_content(api_version, model):
+        body = request.get_json(silent=True) or {}
+        prompt = ' '.join(part.get('text', '') for content in body.get('contents', [])
+                          for part in content.get('parts', []))
+        text = _reply(prompt)
+        prompt_tokens, output_tokens = len(prompt) // CHARS_PER_TOKEN + 1, len(text) // CHARS_PER_TOKEN + 1
+        return jsonify({
+            'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'},
+                            'finishReason': 'STOP', 'index': 0, 'safetyRatings': []}],
+            'usageMetadata': {'promptTokenCount': prompt_tokens, 'candidatesTokenCount': output_tokens,
+                              'totalTokenCount': prompt_tokens + output_tokens},
+        })
+
+    return bp
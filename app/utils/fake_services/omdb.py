@@ -0,0 +1,44 @@
+"""Fake OMDb: GET /omdb/?t=&y= as used by OMDbClient, plus the poster images it links to."""
+import base64
+import zlib
+
+from flask import Blueprint, jsonify, request, url_for
+
+from .behaviour import Behaviour
+
+# 1x1 PNG, so poster downloads and image processing have a real image to work with.
+POSTER_PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==')
+
+
+def release_year_offset(title: str) -> int:
+    """Deterministic 'release year' for a title: 0, 1 or 2 years ago, or -1 for titles OMDb does not know."""
+    if title.lower().startswith('unknown'):
+        return -1
+    return zlib.crc32(title.lower().encode('utf-8')) % 3
+
+
+def create_blueprint(behaviour: Behaviour, current_year: int) -> Blueprint:
+    bp = Blueprint('fake_omdb', __name__)
+
+    @bp.route('/omdb/')
+    @behaviour.apply
+    def search():
+        if not request.args.get('apikey'):
+            return jsonify({'Response': 'False', 'Error': 'No API key provided.'}), 401
+        title = request.args.get('t', '').strip()
+        offset = release_year_offset(title)
+        year = request.args.get('y')
+        if not title or offset < 0 or (year and year != str(current_year - offset)):
+            return jsonify({'Response': 'False', 'Error': 'Movie not found!'})
+        slug = f"{zlib.crc32(title.lower().encode('utf-8')):08x}"
+        return jsonify({'Title': title, 'Year': str(current_year - offset), 'Plot': f"A film called {title}.",
+                        'Poster': url_for('fake_omdb.poster', slug=slug, _external=True),
+                        'imdbID': f"tt{slug}", 'Response': 'True'})
+
+    @bp.route('/omdb/posters/<slug>.png')
+    @behaviour.apply
+    def poster(slug):
+        return POSTER_PNG, 200, {'Content-Type': 'image/png'}
+
+    return bp
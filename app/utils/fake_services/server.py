@@ -0,0 +1,69 @@
+"""Composes the fake services into one Flask app and runs it (in a thread, or from the command line)."""
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from flask import Flask, jsonify
+from werkzeug.serving import make_server
+
+from . import elevenlabs, gemini, omdb, spreaker
+from .behaviour import Behaviour, behaviours_from_config
+
+logger = logging.getLogger(__name__)
+
+
+def create_app(behaviours: Optional[Dict[str, Behaviour]] = None, current_year: Optional[int] = None,
+               tts_chunk_delay_ms: float = 0.0) -> Flask:
+    """One app serving every fake service; GET /_fake/stats reports per-service request outcomes."""
+    behaviours = behaviours or behaviours_from_config()
+    app = Flask(__name__)
+    app.register_blueprint(omdb.create_blueprint(behaviours['omdb'], current_year or datetime.now().year))
+    app.register_blueprint(gemini.create_blueprint(behaviours['gemini']))
+    app.register_blueprint(elevenlabs.create_blueprint(behaviours['elevenlabs'], tts_chunk_delay_ms))
+    app.register_blueprint(spreaker.create_blueprint(behaviours['spreaker']))
+
+    @app.route('/_fake/stats')
+    def stats():
+        return jsonify({name: dict(b.stats) for name, b in behaviours.items()})
+
+    app.config['FAKE_BEHAVIOURS'] = behaviours
+    return app
+
+
+class FakeServices:
+    """A running fake server; `url` is what FAKE_SERVICES_URL should be set to."""
+
+    def __init__(self, app: Flask, host: str, port: int):
+        self.app = app
+        self._server = make_server(host, port, app, threaded=True)
+        self.url = f"http://{host}:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-services', daemon=True)
+
+    @property
+    def behaviours(self) -> Dict[str, Behaviour]:
+        return self.app.config['FAKE_BEHAVIOURS']
+
+    def start(self) -> 'FakeServices':
+        self._thread.start()
+        logger.info(f"Fake external services listening on {self.url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._thread.join(timeout=5)
+
+    def __enter__(self) -> 'FakeServices':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def start_fake_services(host: str = '127.0.0.1', port: int = 0,
+                        config: Optional[Dict[str, Dict[str, Any]]] = None,
+                        default: Optional[Dict[str, Any]] = None, seed: int = 0, **app_kwargs) -> FakeServices:
+    """Starts the fake services on a background thread (port 0 picks a free port)."""
+    app = create_app(behaviours_from_config(config, default, seed), **app_kwargs)
+    return FakeServices(app, host, port).start()
@@ -0,0 +1,45 @@
+"""Fake Spreaker: the episode upload and update calls made by SpreakerClient."""
+import itertools
+import threading
+
+from flask import Blueprint, jsonify, request
+
+from .behaviour import Behaviour
+
+
+def create_blueprint(behaviour: Behaviour) -> Blueprint:
+    bp = Blueprint('fake_spreaker', __name__)
+    episodes = {}
+    ids = itertools.count(90000001)
+    lock = threading.Lock()
+
+    def authorized() -> bool:
+        return request.headers.get('Authorization', '').startswith('Bearer ')
+
+    @bp.route('/spreaker/v2/shows/<show_id>/episodes', methods=['POST'])
+    @behaviour.apply
+    def upload_episode(show_id):
+        if not authorized():
+            return jsonify({'response': {'error': {'code': 401, 'messages': ['Unauthorized']}}}), 401
+        media = request.files.get('media_file')
+        if media is None or not request.form.get('title'):
+            return jsonify({'response': {'error': {'code': 400, 'messages': ['media_file and title are required']}}}), 400
+        size = len(media.read())
+        with lock:
+            episode_id = next(ids)
+            episode = dict(request.form.items(), episode_id=episode_id, show_id=show_id, media_bytes=size,
+                           has_image='image_file' in request.files)
+            episodes[episode_id] = episode
+        return jsonify({'response': {'episode': episode}})
+
+    @bp.route('/spreaker/v2/episodes/<int:episode_id>', methods=['PUT', 'POST'])
+    @behaviour.apply
+    def update_episode(episode_id):
+        if not authorized():
+            return jsonify({'response': {'error': {'code': 401, 'messages': ['Unauthorized']}}}), 401
+        with lock:
+            episode = episodes.setdefault(episode_id, {'episode_id': episode_id})
+            episode.update(request.form.items())
+        return jsonify({'response': {'episode': episode}})
+
+    return bp
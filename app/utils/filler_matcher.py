@@ -0,0 +1,142 @@
+"""
+Multi-word filler detection.
+
+The filler list (`custom_filler_words_csv`, single words and phrases such as "you know")
+is compiled into an Aho-Corasick automaton over normalized tokens, and the transcript is
+scanned once, however many fillers there are. Matches then go through two filters:
+
+  - confidence: a match whose words the ASR was unsure about is not cut;
+  - context rules: words that are often *not* fillers ("I like it", "so much",
+    "do you know") are kept when their neighbours say they carry meaning.
+
+Overlapping matches are resolved in favour of the longest phrase, and the survivors are
+returned as cut intervals in milliseconds.
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from .transcript_index import TranscriptIndex, normalize_token
+
+DEFAULT_MIN_CONFIDENCE = 0.4
+
+# filler -> {'not_after': tokens that make it meaningful when they precede it,
+#            'not_before': tokens that make it meaningful when they follow it}
+DEFAULT_CONTEXT_RULES: Dict[str, Dict[str, FrozenSet[str]]] = {
+    'like': {'not_after': frozenset({'i', 'you', 'we', 'they', 'he', 'she', 'would', "i'd", "you'd", "we'd",
+                                     'really', "don't", "didn't", 'do', 'does', 'did', 'to', 'looks', 'look',
+                                     'feel', 'feels', 'felt', 'just', 'more', 'nothing', 'something', 'anything'}),
+             'not_before': frozenset({'it', 'that', 'this', 'them', 'him', 'her', 'to'})},
+    'so': {'not_before': frozenset({'much', 'many', 'far', 'good', 'bad', 'long', 'that', 'great'}),
+           'not_after': frozenset({'think', 'hope', 'not', 'and', 'do', 'did', 'is', 'was'})},
+    'well': {'not_after': frozenset({'as', 'very', 'pretty', 'really', 'so', 'quite', 'went', 'done', 'do', 'did'})},
+    'right': {'not_after': frozenset({'the', 'all', 'your', 'my', 'is', 'was', "that's", 'are', "you're"})},
+    'actually': {'not_after': frozenset({'is', 'was', 'did', 'does'})},
+    'you know': {'not_after': frozenset({'do', 'did', 'if', "don't", 'would', 'as'}),
+                 'not_before': frozenset({'what', 'how', 'that', 'why', 'who', 'where', 'when'})},
+    'okay': {'not_after': frozenset({'is', 'was', "it's", 'be', 'are', 'seems'})},
+    'yeah': {},
+}
+
+
+class FillerMatcher:
+    """Aho-Corasick automaton over filler phrases, matched against a TranscriptIndex."""
+
+    def __init__(self, fillers: List[str], context_rules: Optional[Dict[str, Dict[str, FrozenSet[str]]]] = None,
+                 min_confidence: float = DEFAULT_MIN_CONFIDENCE):
+        self.patterns: List[Tuple[str, ...]] = []
+        for filler in fillers:
+            tokens = tuple(t for t in (normalize_token(w) for w in filler.split()) if t)
+            if tokens and tokens not in self.patterns:
+                self.patterns.append(tokens)
+        self.context_rules = DEFAULT_CONTEXT_RULES if context_rules is None else context_rules
+        self.min_confidence = min_confidence
+        self._build()
+
+    def _build(self):
+        self.symbols = {token: i for i, token in enumerate(sorted({t for p in self.patterns for t in p}))}
+        goto: List[Dict[int, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for token in pattern:
+                symbol = self.symbols[token]
+                if symbol not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][symbol] = len(goto) - 1
+                state = goto[state][symbol]
+            outputs[state].append(pattern_id)
+
+        # Breadth-first failure links; each state also inherits the outputs of its failure state.
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for symbol, child in goto[state].items():
+                queue.append(child)
+                f = fail[state]
+                while f and symbol not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(symbol, 0) if goto[f].get(symbol, 0) != child else 0
+                outputs[child] = outputs[child] + outputs[fail[child]]
+        self._goto, self._fail, self._outputs = goto, fail, outputs
+
+    def _symbol_stream(self, index: TranscriptIndex) -> np.ndarray:
+        """Transcript token ids translated to automaton symbols (-1 for words in no filler)."""
+        lookup = np.full(len(index.vocabulary) + 1, -1, dtype=np.int32)
+        for token, symbol in self.symbols.items():
+            token_id = index.token_to_id.get(token)
+            if token_id is not None:
+                lookup[token_id] = symbol
+        return lookup[np.asarray(index.token_ids)]
+
+    def matches(self, index: TranscriptIndex) -> List[Tuple[int, int, int]]:
+        """Every raw occurrence as (first position, last position, pattern id), in one pass."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = []
+        state = 0
+        for position, symbol in enumerate(self._symbol_stream(index).tolist()):
+            if symbol < 0:
+                state = 0  # no filler contains this word: every partial match dies here
+                continue
+            while state and symbol not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(symbol, 0)
+            for pattern_id in outputs[state]:
+                found.append((position - len(self.patterns[pattern_id]) + 1, position, pattern_id))
+        return found
+
+    def _allowed(self, index: TranscriptIndex, first: int, last: int, pattern_id: int) -> bool:
+        if self.min_confidence > 0 and float(np.min(index.confidence[first:last + 1])) < self.min_confidence:
+            return False
+        rules = self.context_rules.get(' '.join(self.patterns[pattern_id]))
+        if rules:
+            if first > 0 and index.token(first - 1) in rules.get('not_after', ()):
+                return False
+            if last + 1 < len(index) and index.token(last + 1) in rules.get('not_before', ()):
+                return False
+        return True
+
+    def find(self, index: TranscriptIndex) -> List[Tuple[int, int, str]]:
+        """Filtered, non-overlapping matches as (first position, last position, filler), longest first on overlap."""
+        candidates = [m for m in self.matches(index) if self._allowed(index, *m)]
+        candidates.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        kept, last_end = [], -1
+        for first, last, pattern_id in candidates:
+            if first > last_end:
+                kept.append((first, last, ' '.join(self.patterns[pattern_id])))
+                last_end = last
+        return kept
+
+    def cut_intervals(self, index: TranscriptIndex) -> List[Tuple[int, int]]:
+        """(start_ms, end_ms) of every filler to cut."""
+        return [(int(index.start_ms[first]), int(index.end_ms[last])) for first, last, _ in self.find(index)]
+
+
+@lru_cache(maxsize=32)
+def get_filler_matcher(filler_words_csv: str, min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> FillerMatcher:
+    """Compiled matcher for a comma-separated filler list (cached: templates reuse the same few lists)."""
+    return FillerMatcher([f for f in filler_words_csv.split(',') if f.strip()], min_confidence=min_confidence)
@@ -0,0 +1,176 @@
+"""
+Shared HTTP layer for the external API clients.
+
+One httpx.AsyncClient (HTTP/2 where the server and the `h2` package allow it, with
+pooled keep-alive connections per host) runs on an asyncio event loop in a dedicated
+daemon thread. Sync code hands it work in four ways:
+
+- `submit(coro)` schedules a coroutine and returns a concurrent.futures.Future, so one
+  worker thread can keep dozens of requests in flight.
+- `request(...)` sends one request and blocks until the whole response has been read.
+- `stream(...)` returns a sync iterator over the response body as it arrives, reading
+  at most STREAM_QUEUE_CHUNKS chunks ahead of the consumer.
+- `upload(...)` sends a request whose body comes from sync file handles (multipart
+  `files=`) on a pooled sync httpx.Client in the calling thread, so reading the files
+  never blocks the event loop.
+
+Errors are httpx's: httpx.HTTPError covers transport failures and, after
+`raise_for_status()`, httpx.HTTPStatusError (which carries `.response`).
+"""
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Iterator, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_TIMEOUT_SEC = 30.0
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_QUEUE_CHUNKS = 16
+_STREAM_END = object()
+
+
+class HttpClient:
+    """An AsyncClient living on its own event-loop thread; thread-safe."""
+
+    def __init__(self, max_connections: int = MAX_CONNECTIONS,
+                 max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS, http2: bool = HTTP2_AVAILABLE):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='http-loop', daemon=True)
+        self._thread.start()
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self.client: httpx.AsyncClient = self.run(self._create_client(limits, http2))
+        self._limits = limits
+        self._upload_client: Optional[httpx.Client] = None
+        self._upload_client_lock = threading.Lock()
+        logger.info(f"Shared HTTP client started (HTTP/2 {'on' if http2 else 'off'}, "
+                    f"up to {max_connections} connections).")
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @staticmethod
+    async def _create_client(limits: httpx.Limits, http2: bool) -> httpx.AsyncClient:
+        return httpx.AsyncClient(http2=http2, limits=limits, timeout=httpx.Timeout(DEFAULT_TIMEOUT_SEC),
+                                 follow_redirects=True)
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """Schedules `coro` on the HTTP loop; it may use `self.client` directly."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """Runs `coro` on the HTTP loop and waits for its result."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        response = await self.client.request(method, url, **kwargs)
+        await response.aread()
+        return response
+
+    def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """Sends a request (httpx keyword arguments) and returns the fully read response."""
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        return self.run(self._request(method, url, **kwargs))
+
+    def stream(self, method: str, url: str, timeout: Optional[float] = None,
+               chunk_size: int = STREAM_CHUNK_SIZE, **kwargs) -> Iterator[bytes]:
+        """
+        Yields the response body in chunks as they arrive. An error status raises
+        httpx.HTTPStatusError before the first chunk is yielded.
+        """
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        chunks: queue.Queue = queue.Queue(maxsize=STREAM_QUEUE_CHUNKS)
+
+        async def put(item):
+            try:
+                chunks.put_nowait(item)
+            except queue.Full:
+                # The consumer is behind: wait for room off the loop so other requests keep going.
+                await self._loop.run_in_executor(None, chunks.put, item)
+
+        async def pump():
+            try:
+                async with self.client.stream(method, url, **kwargs) as response:
+                    if response.is_error:
+                        await response.aread()
+                        response.raise_for_status()
+                    async for chunk in response.aiter_bytes(chunk_size):
+                        await put(chunk)
+                await put(_STREAM_END)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                await put(e)
+                raise
+
+        future = self.submit(pump())
+        try:
+            while True:
+                item = chunks.get()
+                if item is _STREAM_END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()  # the consumer stopped early: drop the connection's remaining body
+            while True:  # and free a put() that is waiting for room
+                try:
+                    chunks.get_nowait()
+                except queue.Empty:
+                    break
+
+    def upload(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """
+        Like `request`, for bodies read from sync file handles: the request is sent from
+        the calling thread on a shared sync client rather than on the event loop.
+        """
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        if self._upload_client is None:
+            with self._upload_client_lock:
+                if self._upload_client is None:
+                    self._upload_client = httpx.Client(limits=self._limits, follow_redirects=True,
+                                                       timeout=httpx.Timeout(DEFAULT_TIMEOUT_SEC))
+        return self._upload_client.request(method, url, **kwargs)
+
+    def close(self):
+        if self._upload_client is not None:
+            self._upload_client.close()
+        self.run(self.client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Returns the process-wide shared HTTP client."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
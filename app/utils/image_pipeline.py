@@ -0,0 +1,178 @@
+"""
+Image pipeline for posters and podcast cover art.
+
+Images are processed once, at ingest:
+- They are validated: a real PNG/JPEG/GIF/WebP, no decompression bombs, and not too small.
+- EXIF orientation is applied, and the image is flattened to RGB.
+- The image is capped at MASTER_MAX_PX and re-encoded as a progressive JPEG with all
+  metadata (EXIF, GPS, ICC text chunks, ...) stripped.
+
+The result is named after the SHA-256 of its pixels' encoding, `<hash>.jpg`. Each
+variant in DERIVATIVES is a fitted, smaller copy named `<hash>_<variant>.jpg`. Names are
+content-hashed, so a derivative that exists is always current. The files are cached
+under <cache>/images, together with an index from the SHA-256 of each source file to its
+master, so a source that was seen before is never decoded again. The cover-art views
+upload them next to each other in GCS, so the UI can sign the small variant instead of
+the original.
+"""
+import hashlib
+import io
+import logging
+import os
+import re
+import shutil
+import threading
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .cache_utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+MAX_INPUT_PIXELS = 50_000_000   # refuse anything larger (Pillow's own bomb check warns at ~89 MP)
+MIN_SIDE_PX = 200
+MASTER_MAX_PX = 3000            # Spreaker accepts up to 3000x3000
+JPEG_QUALITY = 88
+DERIVATIVE_QUALITY = 82
+# Longest side in pixels. 'upload' is what Spreaker gets (its minimum recommended size is 1400).
+DERIVATIVES = {'thumb': 320, 'medium': 800, 'upload': 1400}
+
+_HASHED_NAME = re.compile(r'^([0-9a-f]{16})(?:_([a-z]+))?\.jpg$')
+
+
+class ImageValidationError(ValueError):
+    """The file is not an image the pipeline accepts."""
+
+
+def _encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    # No exif/icc_profile arguments: nothing from the source's metadata is carried over.
+    image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _open_validated(source_path: str) -> Image.Image:
+    try:
+        with Image.open(source_path) as probe:
+            image_format = probe.format
+            width, height = probe.size
+            probe.verify()  # structural check; the image must be reopened afterwards
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        raise ImageValidationError(f"Not a readable image: {e}")
+    except Image.DecompressionBombError as e:
+        raise ImageValidationError(str(e))
+    if image_format not in ALLOWED_FORMATS:
+        raise ImageValidationError(f"Unsupported image format {image_format}; use PNG, JPEG, GIF or WebP.")
+    if width * height > MAX_INPUT_PIXELS:
+        raise ImageValidationError(f"Image is too large ({width}x{height}).")
+    if min(width, height) < MIN_SIDE_PX:
+        raise ImageValidationError(f"Image is too small ({width}x{height}); at least {MIN_SIDE_PX}px per side is required.")
+    image = Image.open(source_path)
+    image.load()
+    return image
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def variant_name(master_name: str, variant: Optional[str] = None) -> Optional[str]:
+    """'<hash>.jpg' -> '<hash>_<variant>.jpg'; None for names the pipeline did not produce."""
+    match = _HASHED_NAME.match(os.path.basename(master_name or ''))
+    if not match:
+        return None
+    return f"{match.group(1)}_{variant}.jpg" if variant else f"{match.group(1)}.jpg"
+
+
+class ImagePipeline:
+    """Ingests images into content-hashed masters and derivatives in a cache directory."""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or get_cache_dir('images')
+
+    def _write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.cache_dir, name)
+        if not os.path.exists(path):
+            temp_path = f"{path}.{os.getpid()}.part"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        return path
+
+    def _paths(self, name: str) -> Dict[str, str]:
+        paths = {'master': os.path.join(self.cache_dir, name)}
+        for variant in DERIVATIVES:
+            paths[variant] = os.path.join(self.cache_dir, variant_name(name, variant))
+        return paths
+
+    def _cached(self, source_digest: str) -> Optional[Dict[str, str]]:
+        try:
+            with open(os.path.join(self.cache_dir, f"src_{source_digest}"), 'r') as f:
+                paths = self._paths(f.read().strip())
+        except (OSError, TypeError):
+            return None
+        return paths if all(os.path.exists(path) for path in paths.values()) else None
+
+    def ingest(self, source_path: str) -> Dict[str, str]:
+        """
+        Validates and normalizes an image and makes its derivatives. Returns
+        {'master': path, '<variant>': path, ...}; raises ImageValidationError for bad input.
+        """
+        with open(source_path, 'rb') as f:
+            source_digest = hashlib.sha256(f.read()).hexdigest()[:32]
+        cached = self._cached(source_digest)
+        if cached:
+            logger.info(f"Image {os.path.basename(source_path)} already processed as "
+                        f"{os.path.basename(cached['master'])}.")
+            return cached
+
+        image = _to_rgb(_open_validated(source_path))
+        if max(image.size) > MASTER_MAX_PX:
+            image.thumbnail((MASTER_MAX_PX, MASTER_MAX_PX), Image.LANCZOS)
+        data = _encode_jpeg(image, JPEG_QUALITY)
+        name = f"{hashlib.sha256(data).hexdigest()[:16]}.jpg"
+        self._write(name, data)
+        for variant, max_px in DERIVATIVES.items():
+            derivative = image.copy()
+            derivative.thumbnail((max_px, max_px), Image.LANCZOS)
+            self._write(variant_name(name, variant), _encode_jpeg(derivative, DERIVATIVE_QUALITY))
+        self._write(f"src_{source_digest}", name.encode())
+        logger.info(f"Processed image {os.path.basename(source_path)} ({image.size[0]}x{image.size[1]}, "
+                    f"{os.path.getsize(source_path) // 1024} KB -> {len(data) // 1024} KB) as {name}.")
+        return self._paths(name)
+
+    def export_variant(self, source_path: str, variant: str, destination_path: str) -> str:
+        """
+        Ingests `source_path` and copies one variant ('master' or a DERIVATIVES key) to
+        `destination_path`. Returns the destination, or `source_path` unchanged if the image
+        cannot be processed, so callers can always fall back to the original.
+        """
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(destination_path)), exist_ok=True)
+            shutil.copyfile(self.ingest(source_path)[variant], destination_path)
+            return destination_path
+        except (ImageValidationError, OSError) as e:
+            logger.warning(f"Could not process image {source_path}; using it as is: {e}")
+            return source_path
+
+
+_pipeline: Optional[ImagePipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_image_pipeline() -> ImagePipeline:
+    """Returns the process-wide image pipeline."""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = ImagePipeline()
+    return _pipeline
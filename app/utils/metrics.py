@@ -0,0 +1,206 @@
+"""
+Minimal Prometheus-style metrics for the web app's /metrics endpoint.
+
+Counters and histograms cover what happens in the serving process. Job processes are
+short-lived subprocesses (see cron_job_runner), so metrics they produce are
+NodeHistograms: observations go to an SQLite file in the cache directory and are read back
+at scrape time. Components with other shared state can register a collector instead.
+"""
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .cache_utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# A sample is (metric name including any _bucket/_sum/_count suffix, labels, value).
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def histogram_samples(name: str, labels: Dict[str, str], buckets: Sequence[float],
+                      bucket_counts: Sequence[int], total: float, count: int) -> List[Sample]:
+    """Samples for one histogram series from per-bucket (non-cumulative) counts; the last count is +Inf."""
+    samples, cumulative = [], 0
+    for le, bucket_count in zip(list(buckets) + [math.inf], bucket_counts):
+        cumulative += bucket_count
+        samples.append((f"{name}_bucket", dict(labels, le=_format_value(le)), cumulative))
+    samples.append((f"{name}_sum", labels, total))
+    samples.append((f"{name}_count", labels, count))
+    return samples
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name, self.help, self.type = name, help_text, 'counter'
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, dict(key), value) for key, value in self._values.items()]
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.type = name, help_text, 'histogram'
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[Tuple[str, str], ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def bucket_index(self, value: float) -> int:
+        return next((i for i, le in enumerate(self.buckets) if value <= le), len(self.buckets))
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            # [per-bucket counts..., +Inf count, sum, count]
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0, 0])
+            series[self.bucket_index(value)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            series = [(dict(key), list(values)) for key, values in self._series.items()]
+        samples = []
+        for labels, values in series:
+            samples.extend(histogram_samples(self.name, labels, self.buckets, values[:-2], values[-2], int(values[-1])))
+        return samples
+
+
+class NodeHistogram:
+    """
+    A histogram shared by every process on the node: observations are accumulated in an
+    SQLite file, so short-lived job processes feed the web process's /metrics.
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 path: Optional[str] = None):
+        self.name, self.help, self.type = name, help_text, 'histogram'
+        self.buckets = tuple(sorted(buckets))
+        self.path = path or os.path.join(get_cache_dir('metrics'), 'metrics.sqlite3')
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS node_histograms (
+                    name TEXT NOT NULL,
+                    labels TEXT NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    total REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (name, labels, bucket)
+                )
+            """)
+            self._local.conn = conn
+        return conn
+
+    def observe(self, value: float, **labels):
+        bucket = next((i for i, le in enumerate(self.buckets) if value <= le), len(self.buckets))
+        try:
+            self._conn().execute(
+                "INSERT INTO node_histograms (name, labels, bucket, count, total) VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT (name, labels, bucket) DO UPDATE SET count = count + 1, total = total + excluded.total",
+                (self.name, json.dumps(labels, sort_keys=True), bucket, value))
+        except sqlite3.Error as e:
+            logger.debug(f"Could not record {self.name} observation: {e}")
+
+    def samples(self) -> List[Sample]:
+        rows = self._conn().execute("SELECT labels, bucket, count, total FROM node_histograms WHERE name = ?",
+                                    (self.name,)).fetchall()
+        series: Dict[str, list] = {}
+        for labels, bucket, count, total in rows:
+            entry = series.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0, 0])
+            if bucket < len(entry[0]):
+                entry[0][bucket] += count
+            entry[1] += total
+            entry[2] += count
+        samples = []
+        for labels, (bucket_counts, total, count) in sorted(series.items()):
+            samples.extend(histogram_samples(self.name, json.loads(labels), self.buckets, bucket_counts, total, count))
+        return samples
+
+
+class MetricsRegistry:
+    """Holds in-process metrics and scrape-time collectors; renders the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def node_histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> NodeHistogram:
+        with self._lock:
+            return self._metrics.setdefault(name, NodeHistogram(name, help_text, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]):
+        """`collector()` yields (name, type, help, samples) families; it is called on every scrape."""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics, collectors = list(self._metrics.values()), list(self._collectors)
+        families = [(m.name, m.type, m.help, m.samples()) for m in metrics]
+        for collector in collectors:
+            families.extend(collector())
+        lines = []
+        for name, metric_type, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(f"{sample_name}{_format_labels(labels)} {_format_value(value)}"
+                         for sample_name, labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Returns the process-wide metrics registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
@@ -0,0 +1,223 @@
+"""
+Parallel chunked transcription for long recordings.
+
+A single ASR pass over a multi-hour episode is bound to one process, so with
+`transcription.workers` > 1 the recording is cut into chunks of `chunk_min_sec` to
+`chunk_max_sec`, each cut placed in the middle of the longest pause the VAD finds in that
+window. The chunks are transcribed in a process pool with one engine (and one loaded
+model) per worker. The PCM is shared through a memory-mapped .npy file instead of being
+pickled to every worker.
+
+Each chunk is decoded with `chunk_overlap_sec` of extra audio on both sides, so a word
+cut by a hard split (a stretch with no pause) is heard whole by at least one chunk.
+Stitching then de-duplicates the overlap. Where both chunks agree on a run of words, the
+seam goes in the middle of that run. Otherwise every word is kept by the chunk that owns
+its midpoint.
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .break_engine import AudioAnalysis
+from .cache_utils import get_cache_dir
+from .transcript_index import normalize_token
+from .transcription_engine import get_transcription_engine
+from .vad import detect_speech, transcribe_speech
+
+logger = logging.getLogger(__name__)
+
+MIN_ANCHOR_WORDS = 2         # agreeing words needed to trust an overlap alignment
+MAX_ANCHOR_DRIFT_SEC = 0.5   # ...and how far apart their timestamps may be
+# Forking a process whose ASR runtime already started threads can deadlock, so workers are spawned.
+START_METHOD = os.environ.get('ASR_MP_START_METHOD', 'spawn')
+
+
+def plan_chunks(analysis: AudioAnalysis, min_sec: float, max_sec: float,
+                vad_settings: Optional[Dict[str, Any]] = None) -> List[Tuple[int, int]]:
+    """
+    Splits the recording into (start_ms, end_ms) chunks of min_sec..max_sec (the last one
+    possibly shorter), cutting in the middle of the longest pause in each window and
+    hard-cutting at max_sec only where there is no pause at all.
+    """
+    duration_ms = analysis.duration_ms
+    min_ms, max_ms = int(min_sec * 1000), int(max(max_sec, min_sec) * 1000)
+    if duration_ms <= max_ms:
+        return [(0, duration_ms)]
+
+    regions = detect_speech(analysis, vad_settings)
+    bounds = [0] + [t for region in regions for t in region] + [duration_ms]
+    gaps = np.array([(bounds[i], bounds[i + 1]) for i in range(0, len(bounds), 2) if bounds[i + 1] > bounds[i]],
+                    dtype=np.int64).reshape(-1, 2)
+    mids, lengths = gaps.mean(axis=1), gaps[:, 1] - gaps[:, 0]
+
+    cuts, cursor = [], 0
+    while duration_ms - cursor > max_ms:
+        lo = cursor + min_ms
+        hi = max(lo, min(cursor + max_ms, duration_ms - min_ms))  # never leave a stub at the end
+        inside = np.flatnonzero((mids >= lo) & (mids <= hi))
+        if len(inside):
+            best = inside[np.lexsort((np.abs(mids[inside] - (lo + hi) / 2), -lengths[inside]))[0]]
+            cut = int(mids[best])
+        else:
+            cut = hi
+        cuts.append(cut)
+        cursor = cut
+    edges = [0] + cuts + [duration_ms]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+# --- Worker side ---
+
+_worker_engine = None
+_worker_samples: Optional[np.ndarray] = None
+
+
+def _init_worker(settings: Dict[str, Any], samples_path: str):
+    global _worker_engine, _worker_samples
+    _worker_engine = get_transcription_engine(settings)
+    _worker_engine.model  # load the model once per worker, before the first chunk arrives
+    _worker_samples = np.load(samples_path, mmap_mode='r')
+
+
+def _transcribe_chunk(index: int, start_ms: int, end_ms: int, sample_rate: int) -> Tuple[int, Dict[str, Any]]:
+    clip = np.array(_worker_samples[int(start_ms * sample_rate / 1000):int(end_ms * sample_rate / 1000)])
+    settings = _worker_engine.settings
+    if settings['vad'] == 'energy':
+        result = transcribe_speech(_worker_engine, AudioAnalysis.from_samples(clip, sample_rate),
+                                   settings['vad_settings'])
+    else:
+        result = _worker_engine.transcribe(clip)
+    offset = start_ms / 1000.0
+    for item in result['segments'] + result['words']:
+        item['start'] += offset
+        item['end'] += offset
+    return index, {k: result.get(k) for k in ('words', 'segments', 'language', 'elapsed_sec', 'speech_sec')}
+
+
+# --- Stitching ---
+
+def _midpoint_ms(item: Dict[str, Any]) -> float:
+    return (item['start'] + item['end']) * 500.0
+
+
+def stitch_boundary(left: List[Dict[str, Any]], right: List[Dict[str, Any]], cut_ms: int,
+                    overlap_ms: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Joins the words of two neighbouring chunks that both decoded [cut - overlap, cut + overlap].
+    Returns (words kept from `left`, words kept from `right`).
+    """
+    lo, hi = cut_ms - overlap_ms, cut_ms + overlap_ms
+    tail_start = next((i for i, w in enumerate(left) if w['end'] * 1000.0 > lo), len(left))
+    head_end = next((i for i, w in enumerate(right) if w['start'] * 1000.0 >= hi), len(right))
+    a = [normalize_token(w['word']) for w in left[tail_start:]]
+    b = [normalize_token(w['word']) for w in right[:head_end]]
+    if a and b:
+        match = SequenceMatcher(None, a, b, autojunk=False).find_longest_match(0, len(a), 0, len(b))
+        if match.size >= MIN_ANCHOR_WORDS:
+            i, j = tail_start + match.a + match.size // 2, match.b + match.size // 2
+            if abs(left[i]['start'] - right[j]['start']) <= MAX_ANCHOR_DRIFT_SEC:
+                return left[:i], right[j:]
+    return ([w for w in left if _midpoint_ms(w) < cut_ms],
+            [w for w in right if _midpoint_ms(w) >= cut_ms])
+
+
+class _Stitcher:
+    """Takes chunk results in order and releases words as soon as their seam is decided."""
+
+    def __init__(self, chunks: List[Tuple[int, int]], overlap_ms: int,
+                 on_words: Optional[Callable[[List[Dict[str, Any]]], None]]):
+        self.chunks = chunks
+        self.overlap_ms = overlap_ms
+        self.on_words = on_words
+        self.words: List[Dict[str, Any]] = []
+        self.segments: List[Dict[str, Any]] = []
+        self._pending: List[Dict[str, Any]] = []
+
+    def _release(self, words: List[Dict[str, Any]]):
+        self.words.extend(words)
+        if self.on_words is not None and words:
+            self.on_words(words)
+
+    def add(self, index: int, result: Dict[str, Any]):
+        start_ms, end_ms = self.chunks[index]
+        last = index == len(self.chunks) - 1
+        # Segments only carry text: each belongs to the chunk that owns its midpoint.
+        self.segments.extend(s for s in result['segments']
+                             if start_ms <= _midpoint_ms(s) and (last or _midpoint_ms(s) < end_ms))
+        if index == 0:
+            self._pending = result['words']
+        else:
+            kept, self._pending = stitch_boundary(self._pending, result['words'], start_ms, self.overlap_ms)
+            self._release(kept)
+        if last:
+            self._release(self._pending)
+            self._pending = []
+
+
+def transcribe_parallel(analysis: AudioAnalysis, settings: Dict[str, Any],
+                        on_words: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> Dict[str, Any]:
+    """
+    Transcribes `analysis` (which must carry PCM samples) in chunks on `settings['workers']`
+    processes and returns the usual transcription result on the recording's timeline.
+    """
+    if analysis.samples is None:
+        raise ValueError("Parallel transcription needs an analysis with PCM samples.")
+    started = time.perf_counter()
+    chunks = plan_chunks(analysis, settings['chunk_min_sec'], settings['chunk_max_sec'], settings['vad_settings'])
+    workers = max(1, min(settings['workers'], len(chunks)))
+    overlap_ms = int(settings['chunk_overlap_sec'] * 1000)
+    worker_settings = dict(settings)
+    if not worker_settings['cpu_threads']:
+        # Split the cores between workers instead of letting every runtime grab all of them.
+        worker_settings['cpu_threads'] = max(1, (os.cpu_count() or 1) // workers)
+    logger.info(f"Transcribing {analysis.duration_ms / 60000:.1f} min in {len(chunks)} chunk(s) on {workers} "
+                f"worker(s) ({worker_settings['cpu_threads']} thread(s) each).")
+
+    stitcher = _Stitcher(chunks, overlap_ms, on_words)
+    results: Dict[int, Dict[str, Any]] = {}
+    fd, samples_path = tempfile.mkstemp(suffix='.npy', dir=get_cache_dir('parallel_asr'))
+    os.close(fd)
+    try:
+        np.save(samples_path, np.asarray(analysis.samples, dtype=np.float32))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD),
+                                 initializer=_init_worker, initargs=(worker_settings, samples_path)) as pool:
+            pending = {pool.submit(_transcribe_chunk, i, max(0, start - overlap_ms),
+                                   min(analysis.duration_ms, end + overlap_ms), analysis.sample_rate)
+                       for i, (start, end) in enumerate(chunks)}
+            next_index = 0
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, result = future.result()
+                    results[index] = result
+                while next_index in results:  # stitch in order as soon as the next chunk is there
+                    stitcher.add(next_index, results[next_index])
+                    next_index += 1
+    finally:
+        os.unlink(samples_path)
+
+    languages = Counter(r['language'] for r in results.values() if r.get('language'))
+    elapsed = time.perf_counter() - started
+    chunk_sec = sum(r['elapsed_sec'] or 0.0 for r in results.values())
+    duration = analysis.duration_ms / 1000.0
+    logger.info(f"Parallel transcription took {elapsed:.1f}s wall clock for {chunk_sec:.1f}s of chunk work "
+                f"(RTF {elapsed / duration if duration else 0:.3f}, {chunk_sec / elapsed if elapsed else 0:.1f}x).")
+    return {'text': ' '.join(s['text'] for s in stitcher.segments).strip(),
+            'language': languages.most_common(1)[0][0] if languages else None,
+            'duration': duration,
+            'segments': stitcher.segments,
+            'words': stitcher.words,
+            'engine': settings['engine'],
+            'model': settings['model'],
+            'elapsed_sec': elapsed,
+            'speech_sec': sum(r.get('speech_sec') or 0.0 for r in results.values()) or None,
+            'chunks': len(chunks),
+            'workers': workers}
@@ -50,6 +50,11 @@ class PodcastTemplate:
             'cue_phrases': [], # e.g., ["commercial break", "ad time"]
             'commercial_audio_keys': [] # Keys from audio_files, e.g., ["ad_1", "ad_2"]
         })
+        # Speech-to-text engine selection (see transcription_engine.DEFAULT_TRANSCRIPTION_SETTINGS)
+        self.transcription = template_config.get('transcription', {
+            'engine': 'faster-whisper',
+            'model': 'base'
+        })
 
     @property
     def audio_files(self) -> Dict[str, Optional[str]]:
@@ -0,0 +1,113 @@
+"""
+Break preview clips.
+
+A clip covers a few seconds either side of a detected break. It is cut with ffmpeg
+using input seeking (`-ss` before `-i`), so ffmpeg jumps straight to the offset
+instead of decoding the recording from the start. Clips are cached on disk by
+(recording hash, break window), and every break of a job is rendered concurrently.
+"""
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache_utils import get_cache_dir, text_sha256
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_PAD_MS = 4000
+CLIP_WORKERS = 4
+CLIP_BITRATE = '96k'
+FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+
+
+def clip_window(brk: Dict[str, Any], duration_ms: Optional[int] = None, pad_ms: int = PREVIEW_PAD_MS) -> Tuple[int, int]:
+    """Returns the (start_ms, end_ms) window to render for a break, clamped to the recording."""
+    start_ms = max(0, int(brk['start_ms']) - pad_ms)
+    end_ms = int(brk['end_ms']) + pad_ms
+    if duration_ms is not None:
+        end_ms = min(end_ms, int(duration_ms))
+    return start_ms, max(end_ms, start_ms + 1)
+
+
+class ClipRenderer:
+    """Renders and caches preview clips; safe to share across request threads."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: int = CLIP_WORKERS):
+        self.cache_dir = cache_dir or get_cache_dir('preview_clips')
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='preview-clip')
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def clip_name(self, content_hash: str, start_ms: int, end_ms: int) -> str:
+        return f"{text_sha256(content_hash, start_ms, end_ms)[:32]}.mp3"
+
+    def clip_path(self, clip_name: str) -> str:
+        return os.path.join(self.cache_dir, clip_name)
+
+    def _render(self, source_path: str, start_ms: int, end_ms: int, out_path: str) -> str:
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part.mp3')
+        os.close(fd)
+        command = [
+            FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+            '-ss', f"{start_ms / 1000.0:.3f}",          # input seek: no decode before the offset
+            '-t', f"{(end_ms - start_ms) / 1000.0:.3f}",
+            '-i', source_path,
+            '-vn', '-ac', '1', '-b:a', CLIP_BITRATE, '-f', 'mp3', temp_path
+        ]
+        try:
+            subprocess.run(command, check=True, capture_output=True, timeout=120)
+            os.replace(temp_path, out_path)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"ffmpeg failed rendering clip {start_ms}-{end_ms}ms of {source_path}: {e.stderr.decode(errors='replace')}")
+            raise
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        return out_path
+
+    def submit(self, source_path: str, content_hash: str, start_ms: int, end_ms: int) -> Tuple[str, Future]:
+        """Schedules a clip (or returns the finished/in-flight one). Returns (clip_name, future)."""
+        clip_name = self.clip_name(content_hash, start_ms, end_ms)
+        out_path = self.clip_path(clip_name)
+        with self._lock:
+            future = self._pending.get(clip_name)
+            if future is not None:
+                return clip_name, future
+            if os.path.exists(out_path):
+                future = Future()
+                future.set_result(out_path)
+                return clip_name, future
+            future = self._executor.submit(self._render, source_path, start_ms, end_ms, out_path)
+            self._pending[clip_name] = future
+        future.add_done_callback(lambda f: self._forget(clip_name, f))
+        return clip_name, future
+
+    def _forget(self, clip_name: str, future: Future):
+        # Finished clips are served from disk; failed ones are retried on the next request.
+        with self._lock:
+            if self._pending.get(clip_name) is future:
+                del self._pending[clip_name]
+
+    def render_breaks(self, source_path: str, content_hash: str, breaks: List[Dict[str, Any]],
+                      duration_ms: Optional[int] = None, pad_ms: int = PREVIEW_PAD_MS) -> Dict[str, Tuple[str, Future]]:
+        """Schedules a clip for every break at once; returns {break id: (clip_name, future)}."""
+        return {brk['id']: self.submit(source_path, content_hash, *clip_window(brk, duration_ms, pad_ms))
+                for brk in breaks}
+
+
+_renderer: Optional[ClipRenderer] = None
+_renderer_lock = threading.Lock()
+
+
+def get_clip_renderer() -> ClipRenderer:
+    """Returns the process-wide clip renderer."""
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = ClipRenderer()
+    return _renderer
@@ -0,0 +1,132 @@
+"""
+Background break-preview jobs.
+
+Break previews run on a small executor instead of the request thread, so a large upload
+never ties up one of gunicorn's threads. Each submission gets a token the client polls
+(or subscribes to). Results are cached by (content hash, silence_threshold, min_silence_len),
+and because the underlying analysis is cached by the break engine, re-tuning the sliders
+on a file that was already analyzed completes without touching the executor.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from .break_engine import get_break_engine
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_WORKERS = 2
+JOB_TTL_SEC = 60 * 60
+MAX_CACHED_RESULTS = 256
+
+
+class PreviewJobManager:
+    """Tracks preview jobs by token and caches finished results."""
+
+    def __init__(self, max_workers: int = PREVIEW_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='break-preview')
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._results: 'OrderedDict[Tuple[str, float, int], Dict[str, Any]]' = OrderedDict()
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def cache_key(content_hash: str, settings: Dict[str, Any]) -> Tuple[str, float, int]:
+        return (content_hash, float(settings['silence_threshold']), int(settings['min_silence_len']))
+
+    def submit(self, audio_file_path: str, content_hash: str, settings: Dict[str, Any]) -> str:
+        """Queues a preview and returns its token. Cache hits are completed immediately."""
+        self._expire_jobs()
+        token = uuid.uuid4().hex
+        key = self.cache_key(content_hash, settings)
+        job = {'token': token, 'status': 'queued', 'result': None, 'error': None,
+               'cache_hit': False, 'created_at': time.time(), 'finished_at': None}
+
+        with self._cond:
+            self._jobs[token] = job
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self._finish(job, cached, cache_hit=True)
+                return token
+
+        if get_break_engine().get_cached(content_hash) is not None:
+            # Only detection is left to do, which takes milliseconds: no need to queue it.
+            self._run(job, key, audio_file_path, settings)
+        else:
+            self._executor.submit(self._run, job, key, audio_file_path, settings)
+        return token
+
+    def _run(self, job: Dict[str, Any], key: Tuple[str, float, int], audio_file_path: str, settings: Dict[str, Any]):
+        with self._cond:
+            job['status'] = 'running'
+            self._cond.notify_all()
+        try:
+            engine = get_break_engine()
+            analysis = engine.analyze(audio_file_path, content_hash=key[0])  # hashed while uploading
+            breaks = engine.detect(analysis, settings)
+            result = {'breaks': [brk['time_sec'] for brk in breaks],
+                      'detected_breaks': breaks,
+                      'duration_ms': analysis.duration_ms,
+                      'content_hash': analysis.content_hash}
+            with self._cond:
+                self._results[key] = result
+                while len(self._results) > MAX_CACHED_RESULTS:
+                    self._results.popitem(last=False)
+                self._finish(job, result)
+        except Exception as e:
+            logger.error(f"Break preview job {job['token']} failed: {e}", exc_info=True)
+            with self._cond:
+                job['status'] = 'failed'
+                job['error'] = str(e)
+                job['finished_at'] = time.time()
+                self._cond.notify_all()
+
+    def _finish(self, job: Dict[str, Any], result: Dict[str, Any], cache_hit: bool = False):
+        # Caller holds self._cond.
+        job['status'] = 'done'
+        job['result'] = result
+        job['cache_hit'] = cache_hit
+        job['finished_at'] = time.time()
+        self._cond.notify_all()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            job = self._jobs.get(token)
+            return dict(job) if job else None
+
+    def wait(self, token: str, last_status: Optional[str] = None, timeout: float = 15.0) -> Optional[Dict[str, Any]]:
+        """Blocks until the job's status differs from last_status (or timeout); returns a snapshot."""
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                job = self._jobs.get(token)
+                if job is None or job['status'] != last_status:
+                    return dict(job) if job else None
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return dict(job)
+                self._cond.wait(remaining)
+
+    def _expire_jobs(self):
+        cutoff = time.time() - JOB_TTL_SEC
+        with self._cond:
+            for token in [t for t, j in self._jobs.items() if j['finished_at'] and j['finished_at'] < cutoff]:
+                del self._jobs[token]
+
+
+_manager: Optional[PreviewJobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_preview_job_manager() -> PreviewJobManager:
+    """Returns the process-wide preview job manager."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = PreviewJobManager()
+    return _manager
@@ -0,0 +1,201 @@
+"""
+Token-bucket rate limiting for external APIs, shared by every process on a node.
+
+Each provider (omdb, gemini, elevenlabs, spreaker) has one bucket: `burst` tokens that
+refill at `rate` per second. Clients call `acquire(provider)` before each request and
+sleep until a token is free, so several job workers together stay under the provider's
+limit instead of failing on 429s.
+
+Bucket state lives in an SQLite file in the cache directory. Every acquire is a short
+`BEGIN IMMEDIATE` transaction, which serializes the worker processes on the node. With
+RATE_LIMIT_BACKEND=db, and when running against Cloud SQL, the buckets live in
+PostgreSQL instead (row lock via SELECT ... FOR UPDATE), so all nodes share them.
+
+Buckets are configured with RATE_LIMIT_<PROVIDER>="<rate per sec>:<burst>", e.g.
+RATE_LIMIT_GEMINI="0.25:4". A rate of 0 disables limiting for that provider. The time
+spent waiting is exported on /metrics as the node-wide
+`external_api_rate_limit_wait_seconds` histogram.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .cache_utils import get_cache_dir
+from .metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# (tokens per second, burst). Conservative defaults below the providers' published limits.
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    'omdb': (5.0, 10.0),
+    'gemini': (0.25, 4.0),
+    'elevenlabs': (1.0, 2.0),
+    'spreaker': (1.0, 3.0),
+}
+WAIT_BUCKETS = (0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+MAX_SLEEP_SEC = 1.0          # re-check at least this often; other processes may return early
+DEFAULT_TIMEOUT_SEC = 300.0
+
+
+class RateLimitTimeout(RuntimeError):
+    """A token could not be acquired within the timeout."""
+
+
+def configured_limits() -> Dict[str, Tuple[float, float]]:
+    """DEFAULT_LIMITS with RATE_LIMIT_<PROVIDER> overrides applied."""
+    limits = dict(DEFAULT_LIMITS)
+    for provider in list(limits):
+        raw = os.environ.get(f'RATE_LIMIT_{provider.upper()}')
+        if not raw:
+            continue
+        try:
+            rate, _, burst = raw.partition(':')
+            limits[provider] = (float(rate), float(burst or max(1.0, float(rate))))
+        except ValueError:
+            logger.warning(f"Ignoring malformed RATE_LIMIT_{provider.upper()}='{raw}' (expected '<rate>:<burst>').")
+    return limits
+
+
+class RateLimiter:
+    """Token buckets in a node-local SQLite file (or the shared PostgreSQL database)."""
+
+    def __init__(self, path: Optional[str] = None, limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 backend: Optional[str] = None):
+        self.path = path or os.path.join(get_cache_dir('rate_limits'), 'buckets.sqlite3')
+        self.limits = limits or configured_limits()
+        self.backend = (backend or os.environ.get('RATE_LIMIT_BACKEND', 'sqlite')).lower()
+        self._local = threading.local()
+        self.wait_histogram = get_metrics_registry().node_histogram(
+            'external_api_rate_limit_wait_seconds',
+            'Time external API calls waited for a rate-limit token (all processes on this node).', WAIT_BUCKETS)
+        self._init_sqlite()
+        if self.backend == 'db':
+            self._init_db()
+
+    # --- Storage ---
+
+    def _sqlite(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_sqlite(self):
+        conn = self._sqlite()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                provider TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def _init_db(self):
+        import db_manager
+        if not db_manager.IS_CLOUD_ENV:
+            logger.info("RATE_LIMIT_BACKEND=db needs the cloud database; using the node-local buckets.")
+            self.backend = 'sqlite'
+            return
+        with db_manager.managed_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                    provider VARCHAR(50) PRIMARY KEY,
+                    tokens DOUBLE PRECISION NOT NULL,
+                    updated_at DOUBLE PRECISION NOT NULL
+                )
+            """)
+            conn.commit()
+
+    @staticmethod
+    def _take(tokens: float, updated_at: float, now: float, rate: float, burst: float,
+              amount: float) -> Tuple[float, float]:
+        """Refills the bucket to `now`; returns (new token count, seconds to wait; 0 if taken)."""
+        tokens = min(burst, tokens + max(0.0, now - updated_at) * rate)
+        if tokens >= amount:
+            return tokens - amount, 0.0
+        return tokens, (amount - tokens) / rate
+
+    def _try_sqlite(self, provider: str, rate: float, burst: float, amount: float) -> float:
+        conn = self._sqlite()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE provider = ?", (provider,)).fetchone()
+            tokens, wait = self._take(*(row or (burst, now)), now, rate, burst, amount)
+            conn.execute("INSERT INTO buckets (provider, tokens, updated_at) VALUES (?, ?, ?) "
+                         "ON CONFLICT (provider) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                         (provider, tokens, now))
+            conn.execute('COMMIT')
+            return wait
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _try_db(self, provider: str, rate: float, burst: float, amount: float) -> float:
+        import db_manager
+        with db_manager.managed_db_connection() as conn:
+            cursor = conn.cursor()
+            now = time.time()
+            cursor.execute("INSERT INTO rate_limit_buckets (provider, tokens, updated_at) VALUES (%s, %s, %s) "
+                           "ON CONFLICT (provider) DO NOTHING", (provider, burst, now))
+            cursor.execute("SELECT tokens, updated_at FROM rate_limit_buckets WHERE provider = %s FOR UPDATE", (provider,))
+            tokens, wait = self._take(*cursor.fetchone(), now, rate, burst, amount)
+            cursor.execute("UPDATE rate_limit_buckets SET tokens = %s, updated_at = %s WHERE provider = %s",
+                           (tokens, now, provider))
+            conn.commit()
+            return wait
+
+    # --- API ---
+
+    def acquire(self, provider: str, amount: float = 1.0, timeout_sec: float = DEFAULT_TIMEOUT_SEC) -> float:
+        """
+        Blocks until `amount` tokens are taken from the provider's bucket and returns the
+        seconds waited. Raises RateLimitTimeout after `timeout_sec`. Unknown providers and
+        storage errors never block the caller.
+        """
+        rate, burst = self.limits.get(provider, (0.0, 0.0))
+        if rate <= 0:
+            return 0.0
+        amount = min(amount, burst)
+        started = time.monotonic()
+        while True:
+            try:
+                wait = (self._try_db if self.backend == 'db' else self._try_sqlite)(provider, rate, burst, amount)
+            except Exception as e:
+                logger.warning(f"Rate limiter unavailable for {provider}; not limiting this call: {e}")
+                return 0.0
+            waited = time.monotonic() - started
+            if wait <= 0:
+                self.wait_histogram.observe(waited, provider=provider)
+                if waited >= 1.0:
+                    logger.info(f"Rate limiter: waited {waited:.1f}s for a {provider} token.")
+                return waited
+            if waited + wait > timeout_sec:
+                self.wait_histogram.observe(waited, provider=provider)
+                raise RateLimitTimeout(f"No {provider} rate-limit token within {timeout_sec:.0f}s.")
+            time.sleep(min(wait, MAX_SLEEP_SEC))
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Returns the process-wide rate limiter."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
+
+
+def acquire(provider: str, amount: float = 1.0, timeout_sec: float = DEFAULT_TIMEOUT_SEC) -> float:
+    """Shorthand for get_rate_limiter().acquire(...)."""
+    return get_rate_limiter().acquire(provider, amount, timeout_sec)
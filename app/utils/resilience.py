@@ -0,0 +1,247 @@
+"""
+Client-side resilience for external APIs: per-call timeouts, circuit breakers and latency
+histograms.
+
+Every outbound call runs inside `guard(endpoint)` (e.g. 'omdb.search', 'gemini.generate'),
+which does three things:
+
+- It fails fast with CircuitOpenError while the provider's breaker is open.
+- It records the call's latency and outcome in the node-wide
+  `external_api_request_seconds` histogram.
+- It counts failures towards the breaker.
+
+SDK calls that take no timeout argument go through `call_with_timeout`, which waits on a
+worker thread instead. Clients catch the errors and return their usual failure values,
+and the job pipeline turns those into its fallbacks: the project's default cover art
+when there is no poster, the template's fallback summary when there are no show notes,
+and no AI intro when there is no TTS.
+
+One breaker per provider, shared through an SQLite file by all processes on the node:
+jobs are separate short-lived processes, and a breaker that lived only as long as one
+job would never see enough failures to open. After CIRCUIT_FAILURE_THRESHOLD
+consecutive failures it opens for CIRCUIT_RESET_SEC. After that, one caller is let
+through as a trial; its success closes the breaker and its failure re-opens it.
+Client errors (4xx other than 429) are the caller's fault and do not count.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .cache_utils import get_cache_dir
+from .metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Seconds, by endpoint or provider (the part before the dot); EXTERNAL_API_TIMEOUT_<PROVIDER> overrides.
+DEFAULT_TIMEOUTS_SEC: Dict[str, float] = {
+    'omdb': 10.0,
+    'posters': 30.0,
+    'gemini': 90.0,
+    'elevenlabs': 60.0,
+    'spreaker': 60.0,
+    'spreaker.upload': 900.0,
+}
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_SEC = float(os.environ.get('CIRCUIT_RESET_SEC', '60'))
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0)
+
+_timeout_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='external-call')
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider's circuit breaker is open; the call was not attempted."""
+
+
+class CallTimeout(TimeoutError):
+    """An external call did not finish within its timeout."""
+
+
+def provider_of(endpoint: str) -> str:
+    return endpoint.split('.', 1)[0]
+
+
+def timeout_for(endpoint: str) -> float:
+    provider = provider_of(endpoint)
+    override = os.environ.get(f'EXTERNAL_API_TIMEOUT_{provider.upper()}')
+    if override:
+        try:
+            return float(override)
+        except ValueError:
+            logger.warning(f"Ignoring malformed EXTERNAL_API_TIMEOUT_{provider.upper()}='{override}'.")
+    return DEFAULT_TIMEOUTS_SEC.get(endpoint, DEFAULT_TIMEOUTS_SEC.get(provider, 60.0))
+
+
+def is_failure(exc: BaseException) -> bool:
+    """Whether an exception says the provider is unhealthy (as opposed to a bad request)."""
+    response = getattr(exc, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(exc, 'status_code', None)
+    if isinstance(status, int) and 400 <= status < 500 and status != 429:
+        return False
+    return not isinstance(exc, (CircuitOpenError, ValueError, KeyError))
+
+
+class CircuitBreakers:
+    """Per-provider breaker state in a node-local SQLite file."""
+
+    def __init__(self, path: Optional[str] = None, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_sec: float = CIRCUIT_RESET_SEC):
+        self.path = path or os.path.join(get_cache_dir('resilience'), 'breakers.sqlite3')
+        self.failure_threshold = failure_threshold
+        self.reset_sec = reset_sec
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS breakers (
+                    provider TEXT PRIMARY KEY,
+                    failures INTEGER NOT NULL DEFAULT 0,
+                    opened_at REAL
+                )
+            """)
+            self._local.conn = conn
+        return conn
+
+    def _state(self, conn: sqlite3.Connection, provider: str) -> Tuple[int, Optional[float]]:
+        row = conn.execute("SELECT failures, opened_at FROM breakers WHERE provider = ?", (provider,)).fetchone()
+        return row if row else (0, None)
+
+    def before_call(self, provider: str):
+        """Raises CircuitOpenError if the breaker is open; lets one trial call through once it has cooled down."""
+        try:
+            conn = self._conn()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                _, opened_at = self._state(conn, provider)
+                now = time.time()
+                if opened_at is not None:
+                    if now - opened_at < self.reset_sec:
+                        conn.execute('COMMIT')
+                        raise CircuitOpenError(f"{provider} circuit is open; failing fast "
+                                               f"(retry in {self.reset_sec - (now - opened_at):.0f}s).")
+                    # Half-open: this caller is the trial. Re-arm so concurrent callers keep failing fast.
+                    conn.execute("UPDATE breakers SET opened_at = ? WHERE provider = ?", (now, provider))
+                    logger.info(f"{provider} circuit half-open: letting one trial call through.")
+                conn.execute('COMMIT')
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            logger.debug(f"Circuit breaker state unavailable for {provider}: {e}")
+
+    def record(self, provider: str, success: bool):
+        try:
+            conn = self._conn()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                failures, opened_at = self._state(conn, provider)
+                if success:
+                    if opened_at is not None:
+                        logger.info(f"{provider} circuit closed again after a successful call.")
+                    failures, opened_at = 0, None
+                else:
+                    failures += 1
+                    if opened_at is not None or failures >= self.failure_threshold:
+                        if opened_at is None:
+                            logger.warning(f"{provider} circuit opened after {failures} consecutive failures; "
+                                           f"failing fast for {self.reset_sec:.0f}s.")
+                        opened_at = time.time()
+                conn.execute("INSERT INTO breakers (provider, failures, opened_at) VALUES (?, ?, ?) "
+                             "ON CONFLICT (provider) DO UPDATE SET failures = excluded.failures, opened_at = excluded.opened_at",
+                             (provider, failures, opened_at))
+                conn.execute('COMMIT')
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            logger.debug(f"Could not record circuit breaker outcome for {provider}: {e}")
+
+    def is_open(self, provider: str) -> bool:
+        _, opened_at = self._state(self._conn(), provider)
+        return opened_at is not None and time.time() - opened_at < self.reset_sec
+
+    def metric_families(self):
+        """Scrape-time collector: 1 per provider whose breaker is open."""
+        rows = self._conn().execute("SELECT provider, opened_at FROM breakers").fetchall()
+        now = time.time()
+        samples = [('external_api_circuit_open', {'provider': provider},
+                    1.0 if opened_at is not None and now - opened_at < self.reset_sec else 0.0)
+                   for provider, opened_at in sorted(rows)]
+        yield ('external_api_circuit_open', 'gauge', 'Whether the provider circuit breaker is open (node-wide).', samples)
+
+
+_breakers: Optional[CircuitBreakers] = None
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breakers() -> CircuitBreakers:
+    """Returns the process-wide circuit breakers (and registers their metrics)."""
+    global _breakers
+    if _breakers is None:
+        with _breakers_lock:
+            if _breakers is None:
+                _breakers = CircuitBreakers()
+                get_metrics_registry().register_collector(_breakers.metric_families)
+    return _breakers
+
+
+def _latency_histogram():
+    return get_metrics_registry().node_histogram(
+        'external_api_request_seconds', 'Latency of external API calls by endpoint and outcome (node-wide).',
+        LATENCY_BUCKETS)
+
+
+def register_metrics():
+    """Makes the breaker gauge and latency histogram visible on /metrics before this process makes a call."""
+    get_circuit_breakers()
+    _latency_histogram()
+
+
+@contextmanager
+def guard(endpoint: str):
+    """Breaker check, latency histogram and failure accounting around one external call."""
+    provider = provider_of(endpoint)
+    breakers = get_circuit_breakers()
+    try:
+        breakers.before_call(provider)
+    except CircuitOpenError:
+        _latency_histogram().observe(0.0, endpoint=endpoint, outcome='rejected')
+        raise
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        failure = is_failure(e)
+        outcome = 'timeout' if isinstance(e, TimeoutError) or 'Timeout' in type(e).__name__ else 'error'
+        _latency_histogram().observe(time.perf_counter() - started, endpoint=endpoint,
+                                     outcome=outcome if failure else 'client_error')
+        breakers.record(provider, success=not failure)
+        raise
+    _latency_histogram().observe(time.perf_counter() - started, endpoint=endpoint, outcome='ok')
+    breakers.record(provider, success=True)
+
+
+def call_with_timeout(endpoint: str, func: Callable[..., Any], *args, timeout_sec: Optional[float] = None,
+                      **kwargs) -> Any:
+    """
+    Runs `func(*args, **kwargs)` under `guard(endpoint)`, giving up after the endpoint's
+    timeout. For SDK calls that take no timeout of their own: the call keeps running on its
+    worker thread, but the caller moves on.
+    """
+    timeout = timeout_sec if timeout_sec is not None else timeout_for(endpoint)
+    with guard(endpoint):
+        future = _timeout_pool.submit(func, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise CallTimeout(f"{endpoint} did not respond within {timeout:g}s.")
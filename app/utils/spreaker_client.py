@@ -2,17 +2,23 @@
 Client for interacting with the Spreaker API.
 """
 import os
-import requests
+import httpx
 import logging
 from typing import Optional, Tuple, List
 from datetime import datetime, timedelta
 import pytz
 # Import db_manager to access schedule configuration
 import db_manager # Assuming db_manager.py is in the same directory or accessible
+from .rate_limiter import acquire as acquire_rate_limit
+from .resilience import guard, timeout_for
+from .fake_services import api_base_url
+from .http_client import get_http_client
 
 
 logger = logging.getLogger(__name__)
 
+SPREAKER_API_BASE_URL = "https://api.spreaker.com/v2"
+
 class SpreakerClient:
     def __init__(self, api_token: Optional[str] = None):
         self.api_token = api_token
@@ -112,7 +118,7 @@ class SpreakerClient:
             return False, "❌ Spreaker API token not set."
         logger.info(f"SpreakerClient: Attempting upload with API token ending with '...{self.api_token[-8:] if self.api_token else 'N/A'}'")
 
-        spreaker_api_url = f"https://api.spreaker.com/v2/shows/{show_id}/episodes"
+        spreaker_api_url = f"{api_base_url('spreaker', SPREAKER_API_BASE_URL)}/shows/{show_id}/episodes"
         headers = {"Authorization": f"Bearer {self.api_token}"}
         data = {"title": title} 
 
@@ -150,13 +156,16 @@ class SpreakerClient:
                 img_mime = 'image/jpeg' if image_file_path.lower().endswith(('.jpg','.jpeg')) else 'image/png' if image_file_path.lower().endswith('.png') else 'application/octet-stream'
                 image_file_handle = open(image_file_path, 'rb'); files_payload['image_file'] = (os.path.basename(image_file_path), image_file_handle, img_mime)
                 logger.info(f"Spreaker: Including image: {image_file_path}")
-            logger.info(f"Spreaker: Uploading {file_path} to show {show_id}..."); response = requests.post(spreaker_api_url, headers=headers, data=data, files=files_payload, timeout=900); response.raise_for_status()
+            acquire_rate_limit('spreaker')
+            logger.info(f"Spreaker: Uploading {file_path} to show {show_id}...")
+            with guard('spreaker.upload'):
+                response = get_http_client().upload('POST', spreaker_api_url, headers=headers, data=data, files=files_payload, timeout=timeout_for('spreaker.upload')); response.raise_for_status()
             res_data = response.json()
             if res_data.get('response', {}).get('episode', {}).get('episode_id'):
                 ep_id = res_data['response']['episode']['episode_id']; logger.info(f"Spreaker: Upload successful. Episode ID: {ep_id}"); return True, f"📢 Successfully uploaded to Spreaker. Episode ID: {ep_id}"
             logger.error(f"Spreaker: Unexpected response: {res_data}"); return False, f"⚠️ Spreaker upload OK but unexpected response: {response.text}"
-        except requests.exceptions.HTTPError as e: logger.error(f"Spreaker HTTP Error: {e.response.status_code} - {e.response.text}"); return False, f"❌ Spreaker HTTP Error: {e.response.status_code} - {e.response.text}"
-        except requests.exceptions.RequestException as e: logger.error(f"Spreaker Request Error: {e}"); return False, f"❌ Spreaker API Request Error: {e}"
+        except httpx.HTTPStatusError as e: logger.error(f"Spreaker HTTP Error: {e.response.status_code} - {e.response.text}"); return False, f"❌ Spreaker HTTP Error: {e.response.status_code} - {e.response.text}"
+        except httpx.HTTPError as e: logger.error(f"Spreaker Request Error: {e}"); return False, f"❌ Spreaker API Request Error: {e}"
         except Exception as e: logger.error(f"Spreaker upload error: {e}", exc_info=True); return False, f"❌ Unexpected Spreaker upload error: {e}"
         finally:
             if media_file_handle: media_file_handle.close()
@@ -177,7 +186,7 @@ class SpreakerClient:
         if not episode_id:
             return False, "❌ Spreaker episode ID is required for an update."
 
-        spreaker_api_url = f"https://api.spreaker.com/v2/episodes/{episode_id}"
+        spreaker_api_url = f"{api_base_url('spreaker', SPREAKER_API_BASE_URL)}/episodes/{episode_id}"
         headers = {"Authorization": f"Bearer {self.api_token}"}
         data = {}
 
@@ -208,10 +217,12 @@ class SpreakerClient:
 
         logger.info(f"Spreaker: Updating episode {episode_id} with data: {data}")
         try:
-            response = requests.put(spreaker_api_url, headers=headers, data=data, timeout=60)
-            response.raise_for_status()
+            acquire_rate_limit('spreaker')
+            with guard('spreaker.update'):
+                response = get_http_client().request('PUT', spreaker_api_url, headers=headers, data=data, timeout=timeout_for('spreaker.update'))
+                response.raise_for_status()
             logger.info(f"Spreaker: Successfully updated episode {episode_id}.")
             return True, f"📢 Successfully updated Spreaker episode {episode_id}."
-        except requests.exceptions.HTTPError as e: logger.error(f"Spreaker HTTP Error updating episode {episode_id}: {e.response.status_code} - {e.response.text}"); return False, f"❌ Spreaker HTTP Error updating episode: {e.response.status_code} - {e.response.text}"
-        except requests.exceptions.RequestException as e: logger.error(f"Spreaker Request Error updating episode {episode_id}: {e}"); return False, f"❌ Spreaker API Request Error updating episode: {e}"
+        except httpx.HTTPStatusError as e: logger.error(f"Spreaker HTTP Error updating episode {episode_id}: {e.response.status_code} - {e.response.text}"); return False, f"❌ Spreaker HTTP Error updating episode: {e.response.status_code} - {e.response.text}"
+        except httpx.HTTPError as e: logger.error(f"Spreaker Request Error updating episode {episode_id}: {e}"); return False, f"❌ Spreaker API Request Error updating episode: {e}"
         except Exception as e: logger.error(f"Spreaker update error for episode {episode_id}: {e}", exc_info=True); return False, f"❌ Unexpected Spreaker update error: {e}"
@@ -0,0 +1,170 @@
+"""
+Original-recording time -> final-episode time.
+
+Editing only removes spans (pause, filler and stop-word cuts), inserts material at
+points (e.g. commercial audio at a break) and places the recording after the intro.
+So the mapping from original to final time is monotone and piecewise linear with slope
+1, flat across cuts and jumping at insertions. `TimeMap` stores it as breakpoint arrays,
+and remaps a whole word-level transcript in one vectorized pass. The published transcript
+then matches the edited audio without transcribing it a second time.
+
+The map is built from the timeline plan, whose breaks carry the commercial lengths.
+`edits_from_timed_events` defines how the audio processor can report the edits it
+actually applied, which then take precedence. The processor does not emit these events
+yet; until it does, that function returns None and the plan is used.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class TimeMap:
+    """
+    Monotone piecewise-linear map given by breakpoints (src_ms[i], dst_ms[i]). Between two
+    breakpoints time advances 1:1 (or stays flat inside a cut); a repeated src value is a
+    jump (an insertion), and times at the jump map to after the inserted material.
+    """
+
+    def __init__(self, src_ms: np.ndarray, dst_ms: np.ndarray, cuts: Sequence[Tuple[int, int]] = ()):
+        self.src_ms = np.asarray(src_ms, dtype=np.float64)
+        self.dst_ms = np.asarray(dst_ms, dtype=np.float64)
+        self.cuts = [(int(s), int(e)) for s, e in cuts]
+        self._cut_starts = np.array([s for s, _ in self.cuts], dtype=np.float64)
+        self._cut_ends = np.array([e for _, e in self.cuts], dtype=np.float64)
+
+    @classmethod
+    def from_edits(cls, duration_ms: int, cuts: Sequence[Tuple[int, int]] = (),
+                   insertions: Sequence[Tuple[int, int]] = (), offset_ms: int = 0) -> 'TimeMap':
+        """
+        duration_ms: length of the original recording.
+        cuts: (start_ms, end_ms) original spans removed from the recording (may overlap).
+        insertions: (original_ms, inserted_duration_ms) material spliced in at an original time.
+        offset_ms: where the recording starts in the final episode (intro, AI intro, crossfades).
+        """
+        merged: List[List[int]] = []
+        for start, end in sorted((int(s), int(e)) for s, e in cuts if e > s):
+            start, end = max(0, start), min(int(duration_ms), end)
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            elif end > start:
+                merged.append([start, end])
+
+        # Events in original time; an insertion inside a cut is moved to the cut's start.
+        events = [(s, 'cut', e) for s, e in merged]
+        for at, length in insertions:
+            at = int(at)
+            for s, e in merged:
+                if s < at < e:
+                    at = s
+                    break
+            events.append((at, 'insert', int(length)))
+        events.sort(key=lambda ev: (ev[0], ev[1] != 'insert'))
+
+        src, dst = [0.0], [float(offset_ms)]
+        for at, kind, value in events:
+            mapped = dst[-1] + (at - src[-1])
+            if kind == 'insert':
+                src.extend((at, at))
+                dst.extend((mapped, mapped + value))
+            else:
+                src.extend((at, value))
+                dst.extend((mapped, mapped))
+        src.append(float(max(duration_ms, src[-1])))
+        dst.append(dst[-1] + (src[-1] - src[-2]))
+        return cls(np.array(src), np.array(dst), [(s, e) for s, e in merged])
+
+    @staticmethod
+    def plan_offset_ms(plan: Dict[str, Any]) -> int:
+        """Where the recording segment starts in a timeline_planner plan."""
+        return next((s['start_ms'] for s in plan['segments'] if s['type'] == 'recording'), 0)
+
+    @classmethod
+    def from_plan(cls, plan: Dict[str, Any], insertions: Optional[Sequence[Tuple[int, int]]] = None) -> 'TimeMap':
+        """
+        Builds the map from a timeline_planner plan: its cut list, the recording segment's
+        offset and, unless `insertions` is given, the commercials inserted at its breaks.
+        """
+        cuts = [(c['start_ms'], c['end_ms']) for c in plan['cuts']]
+        if insertions is None:
+            insertions = [(b['original_ms'], b['inserted_ms']) for b in plan['breaks'] if b.get('inserted_ms')]
+        return cls.from_edits(plan['recording']['original_duration_ms'], cuts, insertions, cls.plan_offset_ms(plan))
+
+    @property
+    def final_duration_ms(self) -> int:
+        return int(self.dst_ms[-1])
+
+    def map_ms(self, times_ms) -> np.ndarray:
+        """Maps original times (scalar or array, ms) to final times."""
+        t = np.asarray(times_ms, dtype=np.float64)
+        i = np.clip(np.searchsorted(self.src_ms, t, side='right') - 1, 0, len(self.src_ms) - 2)
+        seg_src, seg_dst = self.src_ms[i], self.dst_ms[i]
+        span = self.src_ms[i + 1] - seg_src
+        slope = np.where(span > 0, (self.dst_ms[i + 1] - seg_dst) / np.where(span > 0, span, 1), 0.0)
+        return seg_dst + np.clip(t - seg_src, 0, None) * slope
+
+    def in_cut(self, start_ms, end_ms) -> np.ndarray:
+        """True where [start, end] lies entirely inside one removed span."""
+        if not self.cuts:
+            return np.zeros(np.shape(start_ms), dtype=bool)
+        start = np.asarray(start_ms, dtype=np.float64)
+        end = np.asarray(end_ms, dtype=np.float64)
+        i = np.searchsorted(self._cut_starts, start, side='right') - 1
+        valid = i >= 0
+        i = np.clip(i, 0, None)
+        return valid & (end <= self._cut_ends[i])
+
+    def remap_words(self, words: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Returns the words ({'word', 'start', 'end', ...} in seconds) on the final timeline;
+        words that were cut out are dropped, partially cut words are clipped.
+        """
+        if not words:
+            return []
+        start_ms = np.array([w['start'] for w in words], dtype=np.float64) * 1000.0
+        end_ms = np.array([w['end'] for w in words], dtype=np.float64) * 1000.0
+        removed = self.in_cut(start_ms, end_ms)
+        new_start = self.map_ms(start_ms) / 1000.0
+        new_end = self.map_ms(end_ms) / 1000.0
+        return [dict(w, start=float(s), end=float(e))
+                for w, s, e, gone in zip(words, new_start, new_end, removed) if not gone]
+
+
+def edits_from_timed_events(timed_events: Optional[Sequence[Any]]) -> Optional[Dict[str, Any]]:
+    """
+    The edit list in the audio processor's `timed_events`, as {'cuts', 'insertions',
+    'offset_ms'}, or None if the events record no edits. This is the contract for the
+    processor to report applied edits; nothing emits these events yet. Recognized events
+    (times in original-recording ms) are {'type': 'cut', 'start_ms', 'end_ms'},
+    {'type': 'insertion', 'original_ms', 'duration_ms'} and {'type': 'recording_start',
+    'final_ms'}. Other events are ignored.
+    """
+    cuts, insertions, offset_ms, found = [], [], None, False
+    for event in timed_events or ():
+        if not isinstance(event, dict):
+            continue
+        kind = event.get('type')
+        if kind == 'cut':
+            cuts.append((int(event['start_ms']), int(event['end_ms'])))
+        elif kind == 'insertion':
+            insertions.append((int(event['original_ms']), int(event['duration_ms'])))
+        elif kind == 'recording_start':
+            offset_ms = int(event['final_ms'])
+        else:
+            continue
+        found = True
+    return {'cuts': cuts, 'insertions': insertions, 'offset_ms': offset_ms} if found else None
+
+
+def remap_transcript(words: List[Dict[str, Any]], plan: Dict[str, Any],
+                     edits: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Word-level transcript of the original recording -> transcript of the final episode,
+    through the applied `edits` (see edits_from_timed_events) or, without them, the plan.
+    """
+    if edits is None:
+        return TimeMap.from_plan(plan).remap_words(words)
+    offset_ms = edits.get('offset_ms')
+    time_map = TimeMap.from_edits(plan['recording']['original_duration_ms'], edits.get('cuts', ()),
+                                  edits.get('insertions', ()),
+                                  TimeMap.plan_offset_ms(plan) if offset_ms is None else offset_ms)
+    return time_map.remap_words(words)
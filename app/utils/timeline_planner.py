@@ -0,0 +1,352 @@
+"""
+Render-free timeline planner ("dry run" of the job pipeline).
+
+Computes where every template segment, music bed, cut and commercial break will land
+in the final episode using only metadata: asset durations read from file headers, the
+cached recording analysis (see break_engine) and, when available, a cached word-level
+transcript. No audio samples are decoded, so a plan takes milliseconds.
+"""
+import logging
+import os
+import struct
+import subprocess
+import wave
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .break_engine import AudioAnalysis, get_break_engine, job_break_settings
+from .filler_matcher import get_filler_matcher
+from .podcast_template import PodcastTemplate
+from .transcript_cache import get_transcript_cache
+from .transcript_index import TranscriptIndex
+from .transcription_engine import normalize_transcription_settings
+
+logger = logging.getLogger(__name__)
+
+# Speaking rate used to estimate TTS segments that have not been generated yet.
+TTS_WORDS_PER_SEC = 2.6
+PAUSE_KEEP_SILENCE_MS = 500
+PAUSE_THRESH_DB_OFFSET = -16
+STOP_WORD_PAUSE_MS = 500
+
+_MP3_BITRATES_KBPS = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],   # MPEG-1 Layer III
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0],       # MPEG-2/2.5 Layer III
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+_duration_cache: Dict[Tuple[str, int, float], Optional[int]] = {}
+
+
+def _mp3_duration_ms(file_path: str) -> Optional[int]:
+    """Reads an MP3's duration from its frame headers (Xing/Info/VBRI when present, else CBR)."""
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        head = f.read(10)
+        audio_start = 0
+        if head[:3] == b'ID3' and len(head) == 10:
+            tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+            audio_start = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+        f.seek(audio_start)
+        buf = f.read(16384)
+        f.seek(max(0, file_size - 128))
+        has_id3v1 = f.read(3) == b'TAG'
+
+    for i in range(len(buf) - 4):
+        if buf[i] != 0xFF or (buf[i + 1] & 0xE0) != 0xE0:
+            continue
+        version_bits = (buf[i + 1] >> 3) & 0x3
+        layer_bits = (buf[i + 1] >> 1) & 0x3
+        bitrate_idx = buf[i + 2] >> 4
+        rate_idx = (buf[i + 2] >> 2) & 0x3
+        if version_bits == 1 or layer_bits != 1 or bitrate_idx in (0, 15) or rate_idx == 3:
+            continue  # reserved values or not Layer III: keep scanning
+        mpeg1 = version_bits == 3
+        sample_rate = _MP3_SAMPLE_RATES[version_bits][rate_idx]
+        samples_per_frame = 1152 if mpeg1 else 576
+        mono = (buf[i + 3] >> 6) == 3
+        side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+
+        xing = i + 4 + side_info
+        if buf[xing:xing + 4] in (b'Xing', b'Info') and struct.unpack('>I', buf[xing + 4:xing + 8])[0] & 0x1:
+            frames = struct.unpack('>I', buf[xing + 8:xing + 12])[0]
+            return int(frames * samples_per_frame * 1000 / sample_rate)
+        if buf[i + 36:i + 40] == b'VBRI':
+            frames = struct.unpack('>I', buf[i + 50:i + 54])[0]
+            return int(frames * samples_per_frame * 1000 / sample_rate)
+
+        bitrate = _MP3_BITRATES_KBPS[1 if mpeg1 else 2][bitrate_idx] * 1000
+        audio_bytes = file_size - (audio_start + i) - (128 if has_id3v1 else 0)
+        return int(audio_bytes * 8 * 1000 / bitrate)
+    return None
+
+
+def _ffprobe_duration_ms(file_path: str) -> Optional[int]:
+    try:
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=nw=1:nk=1', file_path],
+            check=True, capture_output=True, text=True, timeout=30)
+        return int(float(result.stdout.strip()) * 1000)
+    except (subprocess.SubprocessError, OSError, ValueError) as e:
+        logger.warning(f"ffprobe could not read the duration of {file_path}: {e}")
+        return None
+
+
+def probe_duration_ms(file_path: str) -> Optional[int]:
+    """Returns an audio file's duration in ms from its headers, without decoding samples."""
+    if not file_path or not os.path.exists(file_path):
+        return None
+    st = os.stat(file_path)
+    key = (os.path.abspath(file_path), st.st_size, st.st_mtime)
+    if key in _duration_cache:
+        return _duration_cache[key]
+
+    extension = os.path.splitext(file_path)[1].lower()
+    duration_ms = None
+    try:
+        if extension == '.wav':
+            with wave.open(file_path, 'rb') as wf:
+                duration_ms = int(wf.getnframes() * 1000 / wf.getframerate())
+        elif extension == '.mp3':
+            duration_ms = _mp3_duration_ms(file_path)
+    except (wave.Error, OSError, struct.error) as e:
+        logger.warning(f"Could not parse header of {file_path}: {e}")
+    if duration_ms is None:
+        duration_ms = _ffprobe_duration_ms(file_path)
+    _duration_cache[key] = duration_ms
+    return duration_ms
+
+
+def merge_intervals(intervals: List[Tuple[int, int, str]]) -> List[Tuple[int, int, str]]:
+    """Sorts and merges overlapping (start_ms, end_ms, reason) cut intervals."""
+    merged: List[Tuple[int, int, str]] = []
+    for start, end, reason in sorted(i for i in intervals if i[1] > i[0]):
+        if merged and start <= merged[-1][1]:
+            prev_start, prev_end, prev_reason = merged[-1]
+            reasons = prev_reason if reason in prev_reason.split('+') else f"{prev_reason}+{reason}"
+            merged[-1] = (prev_start, max(prev_end, end), reasons)
+        else:
+            merged.append((start, end, reason))
+    return merged
+
+
+def map_time_through_cuts(time_ms: int, cuts: List[Tuple[int, int, str]]) -> int:
+    """Maps an original-recording time onto the edited recording (times inside a cut snap to its start)."""
+    removed = 0
+    for start, end, _ in cuts:
+        if time_ms >= end:
+            removed += end - start
+        elif time_ms > start:
+            return start - removed
+        else:
+            break
+    return time_ms - removed
+
+
+def plan_pause_cuts(analysis: AudioAnalysis, min_pause_duration_sec: float) -> List[Tuple[int, int, str]]:
+    """Mirrors remove_long_pauses_from_segment: silence relative to the recording's loudness."""
+    if not len(analysis.envelope_db):
+        return []
+    mean_power = np.mean(np.power(10.0, analysis.envelope_db.astype(np.float64) / 10.0))
+    threshold_db = 10.0 * np.log10(mean_power) + PAUSE_THRESH_DB_OFFSET if mean_power > 0 else -60.0
+    cuts = []
+    for start, end in analysis.silent_runs(threshold_db, int(min_pause_duration_sec * 1000)):
+        cut_start = start + (PAUSE_KEEP_SILENCE_MS if start > 0 else 0)
+        cut_end = end - (PAUSE_KEEP_SILENCE_MS if end < analysis.duration_ms else 0)
+        if cut_end > cut_start:
+            cuts.append((cut_start, cut_end, 'pause'))
+    return cuts
+
+
+def plan_word_cuts(words: Union[List[Dict[str, Any]], TranscriptIndex], filler_words_csv: Optional[str],
+                   stop_word: Optional[str]) -> List[Tuple[int, int, str]]:
+    """Filler words and stop-word retakes from a word-level transcript ({'word','start','end'} in s) or its index."""
+    index = words if isinstance(words, TranscriptIndex) else TranscriptIndex.from_words(words)
+    cuts = []
+    if filler_words_csv and filler_words_csv.strip():
+        cuts.extend((start_ms, end_ms, 'filler') for start_ms, end_ms in get_filler_matcher(filler_words_csv).cut_intervals(index))
+    if stop_word and stop_word.strip():
+        for i in index.positions(stop_word):
+            # The stop word marks a retake: drop it and the phrase before it, back to the last pause.
+            pause = index.nearest_pause_before(int(index.start_ms[i]), STOP_WORD_PAUSE_MS)
+            retake_start = int(index.start_ms[pause[2]]) if pause else int(index.start_ms[0])
+            cuts.append((retake_start, int(index.end_ms[i]), 'stop_word'))
+    return cuts
+
+
+def _segment_duration(segment: Dict[str, Any], template: PodcastTemplate, main_duration_ms: int,
+                      ai_intro_text: Optional[str]) -> Tuple[Optional[int], str]:
+    seg_type = segment.get('type')
+    if seg_type == 'recording':
+        return main_duration_ms, 'analysis'
+    if seg_type == 'file':
+        path = template.audio_files.get(segment.get('source_key'))
+        return probe_duration_ms(path), 'header'
+    if seg_type == 'generated':
+        if segment.get('source_api') == 'elevenlabs' and not template.elevenlabs.get('enabled'):
+            return 0, 'skipped'
+        text = ai_intro_text or template.config.get(segment.get('text_source_variable') or '', '') or ''
+        if not text.strip():
+            return 0, 'skipped'
+        return int(len(text.split()) / TTS_WORDS_PER_SEC * 1000), 'estimated'
+    return None, 'unknown'
+
+
+def plan_timeline(template: PodcastTemplate, recording_analysis: Optional[AudioAnalysis],
+                  recording_duration_ms: Optional[int] = None,
+                  transcript_words: Optional[List[Dict[str, Any]]] = None,
+                  remove_pauses: bool = True, min_pause_duration_sec: float = 1.5,
+                  remove_fillers: bool = True, custom_filler_words_csv: Optional[str] = None,
+                  stop_word: Optional[str] = None, commercial_settings: Optional[Dict[str, Any]] = None,
+                  ai_intro_text: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Returns the planned final timeline as a JSON-serializable dict:
+    segment placements, music beds, the cut list, break positions and the final duration.
+    """
+    warnings = []
+    if recording_analysis is not None:
+        recording_duration_ms = recording_analysis.duration_ms
+    elif recording_duration_ms is None:
+        raise ValueError("Either a recording analysis or a recording duration is required.")
+    else:
+        # Recordings are analyzed by jobs with breaks enabled and by break previews, not by the planner.
+        warnings.append("Analysis not cached for the recording (it has not been analyzed yet): "
+                        "pauses and breaks were not planned.")
+
+    cuts: List[Tuple[int, int, str]] = []
+    if remove_pauses and recording_analysis is not None:
+        cuts.extend(plan_pause_cuts(recording_analysis, min_pause_duration_sec))
+    if transcript_words:
+        cuts.extend(plan_word_cuts(transcript_words, custom_filler_words_csv if remove_fillers else None, stop_word))
+    elif remove_fillers or stop_word:
+        warnings.append("No cached transcript: filler and stop-word cuts were not planned.")
+    cuts = merge_intervals(cuts)
+    edited_main_ms = recording_duration_ms - sum(end - start for start, end, _ in cuts)
+
+    breaks = []
+    if recording_analysis is not None and commercial_settings and commercial_settings.get('commercial_breaks_enabled'):
+        breaks = sorted(get_break_engine().detect(recording_analysis, commercial_settings), key=lambda b: b['time_ms'])
+    # Commercials are spliced into the recording at the breaks, cycling through the configured files.
+    commercial_files = (commercial_settings or {}).get('commercial_breaks_audio_keys') or []
+    if isinstance(commercial_files, str):
+        commercial_files = [f.strip() for f in commercial_files.split(',') if f.strip()]
+    commercial_ms = []
+    for path in commercial_files if breaks else []:
+        duration_ms = probe_duration_ms(path)
+        if duration_ms is None:
+            warnings.append(f"Duration of commercial '{path}' could not be read; treated as 0 ms.")
+        commercial_ms.append(duration_ms or 0)
+    inserted_ms = [commercial_ms[i % len(commercial_ms)] if commercial_ms else 0 for i in range(len(breaks))]
+    main_ms = edited_main_ms + sum(inserted_ms)
+
+    segments, cursor_ms, main_start_ms = [], 0, None
+    for segment in template.ordered_segments:
+        duration_ms, duration_source = _segment_duration(segment, template, main_ms, ai_intro_text)
+        if duration_ms is None:
+            warnings.append(f"Duration of segment '{segment.get('name')}' could not be read; treated as 0 ms.")
+            duration_ms = 0
+        if duration_ms == 0 and duration_source == 'skipped':
+            continue
+        crossfade_ms = int((segment.get('processing') or {}).get('crossfade_with_previous_ms', 0)) if segments else 0
+        start_ms = max(0, cursor_ms - min(crossfade_ms, duration_ms))
+        end_ms = start_ms + duration_ms
+        segments.append({'name': segment.get('name'), 'role': segment.get('role'), 'type': segment.get('type'),
+                         'start_ms': start_ms, 'end_ms': end_ms, 'duration_ms': duration_ms,
+                         'crossfade_with_previous_ms': crossfade_ms, 'duration_source': duration_source})
+        if segment.get('type') == 'recording':
+            main_start_ms = start_ms
+        cursor_ms = end_ms
+
+    beds = []
+    for bed in template.background_music_beds:
+        covered = [s for s in segments if s['role'] in (bed.get('applies_to_roles') or [])]
+        if not covered:
+            continue
+        bed_start = min(s['start_ms'] for s in covered) + int(bed.get('start_offset_ms', 0))
+        span_end = max(s['end_ms'] for s in covered)
+        bed_end = span_end + int(bed.get('end_offset_ms', 0))  # negative = before the span ends
+        beds.append({'name': bed.get('name'), 'source_key': bed.get('source_key'), 'start_ms': max(0, bed_start),
+                     'end_ms': max(bed_start, bed_end), 'volume_db': bed.get('volume_db'),
+                     'asset_duration_ms': probe_duration_ms(template.audio_files.get(bed.get('source_key'))),
+                     'loop': bool(bed.get('loop', False))})
+
+    offset = main_start_ms or 0
+    if main_start_ms is None and breaks:
+        warnings.append("Template has no 'recording' segment: break positions are relative to the recording.")
+    # A break's final position includes the commercials inserted at earlier breaks.
+    planned_breaks = [{'id': brk['id'], 'label': brk['label'], 'sources': brk['sources'],
+                       'original_ms': brk['time_ms'], 'inserted_ms': inserted_ms[i],
+                       'final_ms': offset + map_time_through_cuts(brk['time_ms'], cuts) + sum(inserted_ms[:i])}
+                      for i, brk in enumerate(breaks)]
+
+    final_duration_ms = max([s['end_ms'] for s in segments] + [b['end_ms'] for b in beds] + [0])
+    return {
+        'final_duration_ms': final_duration_ms,
+        'analysis_cached': recording_analysis is not None,
+        'recording': {'original_duration_ms': recording_duration_ms, 'edited_duration_ms': edited_main_ms,
+                      'removed_ms': recording_duration_ms - edited_main_ms, 'inserted_ms': sum(inserted_ms),
+                      'content_hash': recording_analysis.content_hash if recording_analysis else None},
+        'segments': segments,
+        'background_music_beds': beds,
+        'cuts': [{'start_ms': s, 'end_ms': e, 'reason': r} for s, e, r in cuts],
+        'breaks': planned_breaks,
+        'warnings': warnings,
+    }
+
+
+def _job_flag(job_details: Dict[str, Any], key: str, template_config: Dict[str, Any], template_key: str, default):
+    value = job_details.get(key)
+    return bool(value) if value is not None else template_config.get(template_key, default)
+
+
+def plan_timeline_for_job(job_details: Dict[str, Any], base_dir: str,
+                          transcript_words: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Dry run for a processing_jobs row: resolves the template and recording the same way
+    run_podcast_job does, then plans the timeline from cached metadata only. The cached
+    analysis is found through the recording's (path, size, mtime), so the recording is
+    never read; a recording nobody has analyzed yet is planned from its probed duration.
+    """
+    def resolve(path):
+        return path if not path or os.path.isabs(path) else os.path.join(base_dir, path)
+
+    template_path = resolve(job_details.get('template_path'))
+    recording_path = resolve(job_details.get('uploaded_recording_path'))
+    if not template_path or not os.path.exists(template_path):
+        raise FileNotFoundError(f"Template file not found: {template_path or 'N/A'}")
+    if not recording_path or not os.path.exists(recording_path):
+        raise FileNotFoundError(f"Recording file not found: {recording_path or 'N/A'}")
+
+    template = PodcastTemplate.load_from_file(template_path)
+    config = template.config
+    engine = get_break_engine()
+    recording_hash = engine.known_content_hash(recording_path)
+    analysis = engine.get_cached(recording_hash) if recording_hash else None
+    if transcript_words is None and recording_hash:
+        cached = get_transcript_cache().get(recording_hash, normalize_transcription_settings(template.transcription))
+        transcript_words = cached['words'] if cached else None
+    if analysis is not None and transcript_words:
+        analysis.words = transcript_words
+
+    stop_word_enabled = _job_flag(job_details, 'stop_word_detection_enabled', template.stop_word, 'enabled', True)
+    commercial_settings = job_break_settings({k: v for k, v in job_details.items() if k.startswith('commercial_breaks_')})
+    commercial_settings['commercial_breaks_enabled'] = bool(job_details.get('commercial_breaks_enabled'))
+    if commercial_settings.get('commercial_breaks_audio_keys'):
+        commercial_settings['commercial_breaks_audio_keys'] = [
+            template.audio_files.get(key.strip(), key.strip())
+            for key in str(commercial_settings['commercial_breaks_audio_keys']).split(',') if key.strip()]
+
+    min_pause = job_details.get('min_pause_duration_sec')
+    fillers = job_details.get('custom_filler_words_csv')
+    return plan_timeline(
+        template, analysis,
+        recording_duration_ms=None if analysis is not None else probe_duration_ms(recording_path),
+        transcript_words=transcript_words,
+        remove_pauses=_job_flag(job_details, 'remove_pauses', config, 'gui_remove_pauses', True),
+        min_pause_duration_sec=float(min_pause if min_pause is not None else config.get('gui_min_pause_duration_silence', 1.5)),
+        remove_fillers=_job_flag(job_details, 'remove_fillers', config, 'gui_remove_fillers', True),
+        custom_filler_words_csv=fillers if fillers is not None else config.get('gui_custom_filler_words_csv'),
+        stop_word=template.stop_word.get('word') if stop_word_enabled else None,
+        commercial_settings=commercial_settings,
+        ai_intro_text=job_details.get('ai_intro_text'))
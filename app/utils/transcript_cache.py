@@ -0,0 +1,161 @@
+"""
+Transcript artifact cache.
+
+Transcripts are keyed by (audio SHA-256, engine/model, compute type, language, beam
+size, word timestamps, VAD settings), so a rerun job (`db_jobs.recreate_job_from_existing`)
+or any other job on the same recording gets its words back without touching the ASR model. Entries live under
+<cache>/transcripts/<audio sha256>/<params key>.npz in a compact columnar layout:
+word and segment times as int32 milliseconds, probabilities as float16 and all text as
+one UTF-8 blob per column. Nothing expires on its own; use `invalidate`.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .cache_utils import get_cache_dir, text_sha256
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_CACHE_VERSION = 2  # 2: beam size, compute type and word timestamps in the key
+_SEPARATOR = '\x1f'  # ASCII unit separator: never appears in transcribed text
+
+
+def transcript_params(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """The subset of (normalized) transcription settings that determines the transcript."""
+    return {
+        'engine': settings['engine'],
+        'model': settings['model'],
+        'compute_type': settings['compute_type'],
+        'language': settings['language'],
+        'beam_size': settings['beam_size'],
+        'word_timestamps': settings['word_timestamps'],
+        'vad': settings['vad'],
+        'vad_settings': settings['vad_settings'] if settings['vad'] == 'energy' else None,
+    }
+
+
+def _pack_text(items: List[str]) -> np.ndarray:
+    return np.frombuffer(_SEPARATOR.join(items).encode('utf-8'), dtype=np.uint8)
+
+
+def _unpack_text(blob: np.ndarray, count: int) -> List[str]:
+    if count == 0:
+        return []
+    return blob.tobytes().decode('utf-8').split(_SEPARATOR)
+
+
+def _to_ms(rows: List[Dict[str, Any]]) -> np.ndarray:
+    return np.array([[round(r['start'] * 1000), round(r['end'] * 1000)] for r in rows], dtype=np.int32).reshape(-1, 2)
+
+
+class TranscriptCache:
+    """Disk cache of transcription results with per-process hit/miss counters."""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or get_cache_dir('transcripts')
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, settings: Dict[str, Any]) -> str:
+        return text_sha256(TRANSCRIPT_CACHE_VERSION, json.dumps(transcript_params(settings), sort_keys=True))[:32]
+
+    def _path(self, audio_hash: str, settings: Dict[str, Any]) -> str:
+        return os.path.join(self.cache_dir, audio_hash, f"{self.key(settings)}.npz")
+
+    def hit_rate(self) -> str:
+        total = self.hits + self.misses
+        return f"{self.hits}/{total} ({100.0 * self.hits / total:.0f}%)" if total else "0/0"
+
+    def get(self, audio_hash: str, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Returns the cached transcript for this audio and parameters, or None."""
+        path = self._path(audio_hash, settings)
+        result = None
+        if os.path.exists(path):
+            try:
+                result = self._load(path)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable transcript cache entry {path}: {e}")
+        with self._lock:
+            if result is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            rate = self.hit_rate()
+        logger.info(f"Transcript cache {'hit' if result is not None else 'miss'} for {audio_hash[:12]} "
+                    f"({settings['engine']}/{settings['model']}); hit rate this process {rate}.")
+        return result
+
+    def put(self, audio_hash: str, settings: Dict[str, Any], result: Dict[str, Any]):
+        path = self._path(audio_hash, settings)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        words, segments = result.get('words') or [], result.get('segments') or []
+        meta = {k: result.get(k) for k in ('language', 'duration', 'engine', 'model', 'elapsed_sec', 'speech_sec')}
+        meta['params'] = transcript_params(settings)
+        temp_path = path + '.part'
+        with open(temp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                version=np.array([TRANSCRIPT_CACHE_VERSION]),
+                meta=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8),
+                word_ms=_to_ms(words),
+                word_prob=np.array([w.get('probability') if w.get('probability') is not None else np.nan
+                                    for w in words], dtype=np.float16),
+                word_text=_pack_text([w['word'] for w in words]),
+                segment_ms=_to_ms(segments),
+                segment_text=_pack_text([s['text'] for s in segments]))
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _load(path: str) -> Optional[Dict[str, Any]]:
+        with np.load(path) as data:
+            if int(data['version'][0]) != TRANSCRIPT_CACHE_VERSION:
+                return None
+            meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+            word_ms, segment_ms = data['word_ms'], data['segment_ms']
+            word_text = _unpack_text(data['word_text'], len(word_ms))
+            segment_text = _unpack_text(data['segment_text'], len(segment_ms))
+            word_prob = data['word_prob'].astype(np.float32)
+        words = [{'word': text, 'start': int(ms[0]) / 1000.0, 'end': int(ms[1]) / 1000.0,
+                  'probability': None if np.isnan(p) else float(p)}
+                 for text, ms, p in zip(word_text, word_ms, word_prob)]
+        segments = [{'start': int(ms[0]) / 1000.0, 'end': int(ms[1]) / 1000.0, 'text': text}
+                    for text, ms in zip(segment_text, segment_ms)]
+        params = meta.pop('params', None)
+        return dict(meta, text=' '.join(segment_text).strip(), words=words, segments=segments,
+                    cache_hit=True, params=params)
+
+    def invalidate(self, audio_hash: str, settings: Optional[Dict[str, Any]] = None) -> int:
+        """Deletes one entry (settings given) or every transcript of a recording; returns the count removed."""
+        if settings is not None:
+            path = self._path(audio_hash, settings)
+            if os.path.exists(path):
+                os.unlink(path)
+                return 1
+            return 0
+        audio_dir = os.path.join(self.cache_dir, audio_hash)
+        if not os.path.isdir(audio_dir):
+            return 0
+        removed = len([name for name in os.listdir(audio_dir) if name.endswith('.npz')])
+        shutil.rmtree(audio_dir, ignore_errors=True)
+        logger.info(f"Invalidated {removed} cached transcript(s) for {audio_hash[:12]}.")
+        return removed
+
+
+_cache: Optional[TranscriptCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_transcript_cache() -> TranscriptCache:
+    """Returns the process-wide transcript cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TranscriptCache()
+    return _cache
@@ -0,0 +1,122 @@
+"""
+Transcript output formats (SRT, WebVTT, JSON) built from word-level timestamps.
+
+Words are grouped into subtitle cues that break on long pauses, on sentence ends and
+when a cue would get too long to read.
+"""
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+MAX_CUE_CHARS = 84          # two subtitle lines of ~42 characters
+MAX_CUE_DURATION_MS = 7000
+MAX_WORD_GAP_MS = 1000
+_SENTENCE_END = ('.', '?', '!')
+
+
+def _format_timestamp(ms: float, decimal_sep: str) -> str:
+    ms = max(0, int(round(ms)))
+    hours, rest = divmod(ms, 3600000)
+    minutes, rest = divmod(rest, 60000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{decimal_sep}{millis:03d}"
+
+
+def srt_timestamp(ms: float) -> str:
+    return _format_timestamp(ms, ',')
+
+
+def vtt_timestamp(ms: float) -> str:
+    return _format_timestamp(ms, '.')
+
+
+class CueBuilder:
+    """
+    Push-based cue grouping: `add` takes one word ({'word', 'start', 'end'} in seconds) and
+    returns the cue it completed, if any; `finish` returns the last, still open cue. Lets
+    writers emit cues while words are still arriving from the ASR engine.
+    """
+
+    def __init__(self, max_chars: int = MAX_CUE_CHARS, max_duration_ms: int = MAX_CUE_DURATION_MS,
+                 max_gap_ms: int = MAX_WORD_GAP_MS):
+        self.max_chars = max_chars
+        self.max_duration_ms = max_duration_ms
+        self.max_gap_ms = max_gap_ms
+        self._current: List[str] = []
+        self._chars = 0
+        self._start_ms = self._end_ms = 0.0
+
+    def _take(self) -> Dict[str, Any]:
+        cue = {'start_ms': self._start_ms, 'end_ms': self._end_ms, 'text': ' '.join(self._current)}
+        self._current, self._chars = [], 0
+        return cue
+
+    def add(self, word: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        text = str(word.get('word', '')).strip()
+        if not text:
+            return None
+        w_start, w_end = word['start'] * 1000.0, word['end'] * 1000.0
+        done = None
+        current = self._current
+        if current:
+            too_long = self._chars + 1 + len(text) > self.max_chars or w_end - self._start_ms > self.max_duration_ms
+            if too_long or w_start - self._end_ms > self.max_gap_ms or current[-1].endswith(_SENTENCE_END):
+                done = self._take()
+        if not self._current:
+            self._start_ms = w_start
+            self._end_ms = w_end
+            self._chars = len(text)
+        else:
+            self._end_ms = max(self._end_ms, w_end)
+            self._chars += 1 + len(text)
+        self._current.append(text)
+        return done
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        return self._take() if self._current else None
+
+
+def iter_cues(words: Iterable[Dict[str, Any]], max_chars: int = MAX_CUE_CHARS,
+              max_duration_ms: int = MAX_CUE_DURATION_MS, max_gap_ms: int = MAX_WORD_GAP_MS) -> Iterator[Dict[str, Any]]:
+    """Groups words ({'word', 'start', 'end'} in seconds) into {'start_ms', 'end_ms', 'text'} cues, lazily."""
+    builder = CueBuilder(max_chars, max_duration_ms, max_gap_ms)
+    for word in words:
+        cue = builder.add(word)
+        if cue is not None:
+            yield cue
+    cue = builder.finish()
+    if cue is not None:
+        yield cue
+
+
+def srt_cue(number: int, cue: Dict[str, Any]) -> str:
+    return f"{number}\n{srt_timestamp(cue['start_ms'])} --> {srt_timestamp(cue['end_ms'])}\n{cue['text']}\n\n"
+
+
+def vtt_cue(cue: Dict[str, Any]) -> str:
+    return f"{vtt_timestamp(cue['start_ms'])} --> {vtt_timestamp(cue['end_ms'])}\n{cue['text']}\n\n"
+
+
+VTT_HEADER = "WEBVTT\n\n"
+
+
+def to_srt(words: Iterable[Dict[str, Any]]) -> str:
+    return ''.join(srt_cue(i, cue) for i, cue in enumerate(iter_cues(words), 1))
+
+
+def to_vtt(words: Iterable[Dict[str, Any]]) -> str:
+    return VTT_HEADER + ''.join(vtt_cue(cue) for cue in iter_cues(words))
+
+
+TEXT_PARAGRAPH = {'max_chars': 1000, 'max_duration_ms': 60000}
+
+
+def to_text(words: Iterable[Dict[str, Any]]) -> str:
+    return '\n'.join(cue['text'] for cue in iter_cues(words, **TEXT_PARAGRAPH)) + '\n'
+
+
+def json_word(word: Dict[str, Any]) -> Dict[str, Any]:
+    return {'word': word['word'], 'start': round(word['start'], 3), 'end': round(word['end'], 3)}
+
+
+def to_json(words: List[Dict[str, Any]], **metadata) -> str:
+    return json.dumps(dict(metadata, words=[json_word(w) for w in words]), ensure_ascii=False)
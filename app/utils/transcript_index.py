@@ -0,0 +1,149 @@
+"""
+Array-backed index over a word-level transcript.
+
+Filler removal, the stop word, the intern command and cue-phrase breaks all scan the
+same transcript. The index stores it once as parallel NumPy arrays (start/end ms,
+confidence, interned token ids) plus a CSR-style inverted index (token id -> sorted word
+positions), so that:
+
+  - all occurrences of a phrase cost O(k * len(phrase)) for k occurrences of its first token,
+  - words overlapping [a, b] cost O(log n) to locate,
+  - the nearest pause before t costs O(log n) once the pause list for a gap size exists.
+
+`save` writes one `.npy` per array (plus the vocabulary as JSON) so `load` can memory-map
+them instead of reading the whole transcript.
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_ARRAYS = ('start_ms', 'end_ms', 'confidence', 'token_ids', 'posting_offsets', 'postings')
+
+
+def normalize_token(word: str) -> str:
+    """Lower-cases a transcribed word and strips surrounding punctuation."""
+    return str(word).strip().lower().strip('.,!?;:"\'')
+
+
+class TranscriptIndex:
+    """Immutable index over words sorted by start time."""
+
+    def __init__(self, start_ms: np.ndarray, end_ms: np.ndarray, confidence: np.ndarray,
+                 token_ids: np.ndarray, vocabulary: List[str],
+                 posting_offsets: np.ndarray, postings: np.ndarray):
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.confidence = confidence
+        self.token_ids = token_ids
+        self.vocabulary = vocabulary
+        self.token_to_id = {token: i for i, token in enumerate(vocabulary)}
+        self.posting_offsets = posting_offsets
+        self.postings = postings
+        # Running maximum of end times: lets interval queries binary-search even if words overlap.
+        self._end_cummax = np.maximum.accumulate(end_ms) if len(end_ms) else end_ms
+        self._pauses: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def from_words(cls, words: List[Dict[str, Any]]) -> 'TranscriptIndex':
+        """Builds the index from {'word', 'start', 'end'[, 'probability']} dicts (seconds)."""
+        order = sorted(range(len(words)), key=lambda i: words[i]['start'])
+        start_ms = np.array([round(words[i]['start'] * 1000) for i in order], dtype=np.int32)
+        end_ms = np.array([round(words[i]['end'] * 1000) for i in order], dtype=np.int32)
+        confidence = np.array([words[i].get('probability') if words[i].get('probability') is not None else 1.0
+                               for i in order], dtype=np.float32)
+        token_to_id: Dict[str, int] = {}
+        token_ids = np.array([token_to_id.setdefault(normalize_token(words[i].get('word', '')), len(token_to_id))
+                              for i in order], dtype=np.int32)
+        vocabulary = [''] * len(token_to_id)
+        for token, i in token_to_id.items():
+            vocabulary[i] = token
+
+        # Inverted index in CSR form: postings[posting_offsets[t]:posting_offsets[t + 1]] are token t's positions.
+        postings = np.argsort(token_ids, kind='stable').astype(np.int32)
+        counts = np.bincount(token_ids, minlength=len(vocabulary)) if len(token_ids) else np.zeros(0, dtype=np.int64)
+        posting_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return cls(start_ms, end_ms, confidence, token_ids, vocabulary, posting_offsets, postings)
+
+    def __len__(self) -> int:
+        return len(self.token_ids)
+
+    def token(self, position: int) -> str:
+        return self.vocabulary[int(self.token_ids[position])]
+
+    def positions(self, token: str) -> np.ndarray:
+        """Sorted positions of a (normalized) token."""
+        token_id = self.token_to_id.get(normalize_token(token))
+        if token_id is None:
+            return np.zeros(0, dtype=np.int32)
+        return self.postings[self.posting_offsets[token_id]:self.posting_offsets[token_id + 1]]
+
+    def phrase_ids(self, phrase: str) -> Optional[List[int]]:
+        """Token ids of a phrase, or None if any of its words never occurs."""
+        ids = []
+        for token in phrase.split():
+            token_id = self.token_to_id.get(normalize_token(token))
+            if token_id is None:
+                return None
+            ids.append(token_id)
+        return ids or None
+
+    def find_phrase(self, phrase: str) -> np.ndarray:
+        """Positions of the first word of every occurrence of `phrase`."""
+        ids = self.phrase_ids(phrase)
+        if ids is None:
+            return np.zeros(0, dtype=np.int32)
+        candidates = self.postings[self.posting_offsets[ids[0]]:self.posting_offsets[ids[0] + 1]]
+        candidates = candidates[candidates + len(ids) <= len(self)]
+        for offset, token_id in enumerate(ids[1:], 1):
+            candidates = candidates[self.token_ids[candidates + offset] == token_id]
+        return candidates
+
+    def phrase_spans(self, phrase: str) -> List[Tuple[int, int]]:
+        """(start_ms, end_ms) of every occurrence of `phrase`."""
+        n = len(phrase.split())
+        return [(int(self.start_ms[p]), int(self.end_ms[p + n - 1])) for p in self.find_phrase(phrase)]
+
+    def overlapping(self, a_ms: int, b_ms: int) -> range:
+        """Positions of the words overlapping [a_ms, b_ms]."""
+        lo = int(np.searchsorted(self._end_cummax, a_ms, side='left'))
+        hi = int(np.searchsorted(self.start_ms, b_ms, side='right'))
+        return range(lo, max(lo, hi))
+
+    def _pause_positions(self, min_gap_ms: int) -> np.ndarray:
+        pauses = self._pauses.get(min_gap_ms)
+        if pauses is None:
+            gaps = self.start_ms[1:] - self._end_cummax[:-1]
+            pauses = np.flatnonzero(gaps >= min_gap_ms).astype(np.int32) + 1  # word that follows the pause
+            self._pauses[min_gap_ms] = pauses
+        return pauses
+
+    def nearest_pause_before(self, t_ms: int, min_gap_ms: int) -> Optional[Tuple[int, int, int]]:
+        """
+        The last gap of at least min_gap_ms between words that ends at or before t_ms, as
+        (pause_start_ms, pause_end_ms, position of the word after it); None if there is none.
+        """
+        pauses = self._pause_positions(min_gap_ms)
+        i = int(np.searchsorted(self.start_ms[pauses], t_ms, side='right')) - 1
+        if i < 0:
+            return None
+        position = int(pauses[i])
+        return int(self._end_cummax[position - 1]), int(self.start_ms[position]), position
+
+    def save(self, directory: str):
+        """Writes every array with np.save (memory-mappable) plus the vocabulary."""
+        os.makedirs(directory, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.vocabulary, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'TranscriptIndex':
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in _ARRAYS}
+        with open(os.path.join(directory, 'vocabulary.json'), encoding='utf-8') as f:
+            vocabulary = json.load(f)
+        return cls(arrays['start_ms'], arrays['end_ms'], arrays['confidence'], arrays['token_ids'],
+                   vocabulary, arrays['posting_offsets'], arrays['postings'])
@@ -0,0 +1,311 @@
+"""
+Incremental transcript writers (SRT, WebVTT, plain text, word-level JSON).
+
+Words are pushed in as the ASR engine decodes them (`add_words`), turned into cues by a
+`CueBuilder` and written through a sink that buffers output and flushes it in chunks, so
+memory stays flat however long the episode is. A local sink writes to
+`<path>.<pid>-<thread>.partial` (so two writers never share one) and renames it to
+`<path>` on `close`, which is what lets the admin UI show a transcript
+while a job is still transcribing; a GCS sink streams the same bytes into a resumable
+upload. Until `close`, the `.partial` JSON file is a prefix of the final document.
+"""
+import glob
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from .transcript_formats import TEXT_PARAGRAPH, VTT_HEADER, CueBuilder, json_word, srt_cue, vtt_cue
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_BYTES = 64 * 1024
+PARTIAL_SUFFIX = '.partial'
+
+
+class LocalSink:
+    """Appends to `<path>.<pid>-<thread>.partial` in chunks; `close` moves it into place."""
+
+    def __init__(self, path: str, flush_bytes: int = DEFAULT_FLUSH_BYTES):
+        self.path = path
+        self.partial_path = f"{path}.{os.getpid()}-{threading.get_ident()}{PARTIAL_SUFFIX}"
+        self.flush_bytes = flush_bytes
+        self._buffer: List[str] = []
+        self._buffered = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(self.partial_path, 'w', encoding='utf-8')
+
+    def write(self, text: str):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.flush_bytes:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._buffer, self._buffered = [], 0
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        os.replace(self.partial_path, self.path)
+
+    def abort(self):
+        """Drops the partial file (the transcript could not be finished)."""
+        self._file.close()
+        if os.path.exists(self.partial_path):
+            os.unlink(self.partial_path)
+
+
+class GCSSink:
+    """Streams into a GCS object through a resumable upload, one chunk at a time."""
+
+    def __init__(self, blob_name: str, content_type: str, chunk_size: Optional[int] = None):
+        import gcs_utils
+        self.blob_name = blob_name
+        self._writer = gcs_utils.open_blob_writer(blob_name, content_type=content_type, chunk_size=chunk_size)
+        if self._writer is None:
+            raise RuntimeError(f"Cannot open GCS object '{blob_name}' for writing.")
+
+    def write(self, text: str):
+        self._writer.write(text)  # the writer uploads each time a full chunk is buffered
+
+    def flush(self):
+        pass  # resumable uploads only accept whole chunks before the final one
+
+    def close(self):
+        self._writer.close()
+
+    def abort(self):
+        """Cancels the upload, so no truncated object is left where the transcript belongs."""
+        writer = getattr(self._writer, 'buffer', self._writer)  # blob.open('w') wraps a BlobWriter
+        if hasattr(writer, 'terminate'):
+            try:
+                writer.terminate()  # cancels the resumable session; nothing is committed
+                return
+            except Exception as e:
+                logger.warning(f"Could not cancel upload of {self.blob_name}: {e}")
+        # No way to cancel: finish the upload, then delete the object it created.
+        import gcs_utils
+        try:
+            self._writer.close()
+        except Exception as e:
+            logger.warning(f"Could not finish aborted upload of {self.blob_name}: {e}")
+        gcs_utils.delete_gcs_blob(self.blob_name)
+
+
+class TranscriptWriter:
+    """Base class: subclasses turn words into text for one format and write it to their sinks."""
+    extension = ''
+    content_type = 'text/plain'
+
+    def __init__(self, sinks: List[Any]):
+        self.sinks = sinks
+        self.words_written = 0
+
+    def _write(self, text: str):
+        for sink in self.sinks:
+            sink.write(text)
+
+    def add_words(self, words: Iterable[Dict[str, Any]]):
+        for word in words:
+            self._add(word)
+            self.words_written += 1
+
+    def _add(self, word: Dict[str, Any]):
+        raise NotImplementedError
+
+    def _finish(self):
+        pass
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        self._finish()
+        for sink in self.sinks:
+            sink.close()
+
+    def abort(self):
+        for sink in self.sinks:
+            sink.abort()
+
+
+class _CueWriter(TranscriptWriter):
+    cue_options: Dict[str, Any] = {}
+
+    def __init__(self, sinks: List[Any]):
+        super().__init__(sinks)
+        self._cues = CueBuilder(**self.cue_options)
+        self.cues_written = 0
+
+    def _add(self, word):
+        cue = self._cues.add(word)
+        if cue is not None:
+            self.cues_written += 1
+            self._write(self._format(cue))
+
+    def _finish(self):
+        cue = self._cues.finish()
+        if cue is not None:
+            self.cues_written += 1
+            self._write(self._format(cue))
+
+    def _format(self, cue: Dict[str, Any]) -> str:
+        raise NotImplementedError
+
+
+class SrtWriter(_CueWriter):
+    extension = 'srt'
+    content_type = 'application/x-subrip'
+
+    def _format(self, cue):
+        return srt_cue(self.cues_written, cue)
+
+
+class VttWriter(_CueWriter):
+    extension = 'vtt'
+    content_type = 'text/vtt'
+
+    def __init__(self, sinks):
+        super().__init__(sinks)
+        self._write(VTT_HEADER)
+
+    def _format(self, cue):
+        return vtt_cue(cue)
+
+
+class TextWriter(_CueWriter):
+    extension = 'txt'
+    cue_options = TEXT_PARAGRAPH
+
+    def _format(self, cue):
+        return cue['text'] + '\n'
+
+
+class JsonWordsWriter(TranscriptWriter):
+    """{<metadata>, "words": [...]} written one word at a time."""
+    extension = 'json'
+    content_type = 'application/json'
+
+    def __init__(self, sinks, **metadata):
+        super().__init__(sinks)
+        header = json.dumps(metadata, ensure_ascii=False)[:-1]
+        self._write((header + ', ' if metadata else '{') + '"words": [')
+
+    def _add(self, word):
+        self._write((',\n' if self.words_written else '\n') + json.dumps(json_word(word), ensure_ascii=False))
+
+    def _finish(self):
+        self._write('\n]}\n')
+
+
+WRITERS = {cls.extension: cls for cls in (SrtWriter, VttWriter, TextWriter, JsonWordsWriter)}
+
+
+class TranscriptWriterSet:
+    """Several formats fed from the same word stream; usable as an `on_words` callback."""
+
+    def __init__(self, writers: List[TranscriptWriter]):
+        self.writers = writers
+
+    def __call__(self, words: List[Dict[str, Any]]):
+        self.add_words(words)
+
+    def add_words(self, words: List[Dict[str, Any]]):
+        for writer in self.writers:
+            writer.add_words(words)
+
+    def flush(self):
+        for writer in self.writers:
+            writer.flush()
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+    def abort(self):
+        for writer in self.writers:
+            writer.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def open_transcript_writers(output_path_prefix: str, formats: Iterable[str] = ('srt', 'vtt', 'txt', 'json'),
+                            gcs_blob_prefix: Optional[str] = None, flush_bytes: int = DEFAULT_FLUSH_BYTES,
+                            **json_metadata) -> TranscriptWriterSet:
+    """
+    Opens one writer per format, writing `<output_path_prefix>.<ext>` locally and, with
+    `gcs_blob_prefix`, also streaming to `<gcs_blob_prefix>.<ext>` in the bucket.
+    `json_metadata` goes into the top level of the JSON document.
+    """
+    writers = []
+    try:
+        for fmt in formats:
+            writer_cls = WRITERS.get(fmt)
+            if writer_cls is None:
+                raise ValueError(f"Unknown transcript format '{fmt}'. Available: {', '.join(sorted(WRITERS))}")
+            sinks = [LocalSink(f"{output_path_prefix}.{fmt}", flush_bytes)]
+            if gcs_blob_prefix:
+                sinks.append(GCSSink(f"{gcs_blob_prefix}.{fmt}", writer_cls.content_type))
+            writer = writer_cls(sinks, **json_metadata) if writer_cls is JsonWordsWriter else writer_cls(sinks)
+            writers.append(writer)
+    except Exception:
+        for writer in writers:
+            writer.abort()
+        raise
+    return TranscriptWriterSet(writers)
+
+
+def transcript_started(output_path_prefix: str, fmt: str) -> bool:
+    """Whether `<output_path_prefix>.<fmt>` exists, finished or still being written."""
+    path = f"{output_path_prefix}.{fmt}"
+    return os.path.exists(path) or bool(_partial_paths(path))
+
+
+def _partial_paths(path: str) -> list:
+    """In-progress files of `path`, most recently written first."""
+    candidates = glob.glob(f"{glob.escape(path)}.*{PARTIAL_SUFFIX}")
+    return sorted(candidates, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0, reverse=True)
+
+
+def read_transcript_progress(output_path_prefix: str, fmt: str, offset: int = 0) -> Optional[Dict[str, Any]]:
+    """
+    What has been written so far of `<output_path_prefix>.<fmt>`: {'complete', 'content',
+    'next_offset'}, reading from byte `offset` so pollers only fetch what is new. None if
+    the transcript was never started.
+    """
+    path = f"{output_path_prefix}.{fmt}"
+    for candidate, complete in [(path, True)] + [(p, False) for p in _partial_paths(path)]:
+        try:
+            with open(candidate, 'rb') as f:
+                f.seek(max(0, offset))
+                data = f.read()
+        except FileNotFoundError:
+            continue
+        # A flush can end inside a multi-byte character; hold the incomplete tail back.
+        content = data.decode('utf-8', errors='ignore') if complete else _complete_utf8(data)
+        return {'complete': complete, 'content': content,
+                'next_offset': max(0, offset) + len(content.encode('utf-8'))}
+    return None
+
+
+def _complete_utf8(data: bytes) -> str:
+    for cut in range(4):
+        try:
+            return data[:len(data) - cut].decode('utf-8')
+        except UnicodeDecodeError:
+            continue
+    return data.decode('utf-8', errors='ignore')
@@ -0,0 +1,297 @@
+"""
+Speech-to-text engines.
+
+Templates pick an engine with a `transcription` block, e.g.
+
+    "transcription": {"engine": "faster-whisper", "model": "small", "beam_size": 1, "cpu_threads": 4}
+
+The default engine is faster-whisper (CTranslate2) running int8 on the CPU. By default
+`transcribe_file` gates the recording with the energy VAD (app/utils/vad.py) and hands
+the engine only packed speech chunks; with `BatchedInferencePipeline` (faster-whisper
+1.1+) those chunks are decoded in batches, otherwise sequentially. With `workers` > 1,
+long recordings are transcribed in chunks on a process pool (app/utils/parallel_transcription.py).
+openai-whisper stays available as a reference engine.
+Every engine returns the same result shape, with word timestamps in seconds
+({'word', 'start', 'end', 'probability'}) that the break engine's cue detector and the
+timeline planner consume directly.
+"""
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .asr_model_pool import get_asr_model_pool
+from .break_engine import ANALYSIS_SAMPLE_RATE, get_break_engine
+from .transcript_cache import get_transcript_cache
+from .vad import normalize_vad_settings, transcribe_speech
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSCRIPTION_SETTINGS = {
+    'engine': 'faster-whisper',
+    'model': 'base',
+    'language': None,            # None = auto-detect
+    'device': 'cpu',
+    'compute_type': 'int8',
+    'beam_size': 1,              # greedy decoding; raise for accuracy at ~linear cost
+    'cpu_threads': 0,            # 0 = let CTranslate2/torch decide
+    'batch_size': 8,             # VAD segments decoded per batch (faster-whisper batched pipeline)
+    'vad': 'energy',             # 'energy' (app/utils/vad.py gating), 'engine' (the engine's own VAD) or 'none'
+    'vad_settings': {},          # overrides for vad.DEFAULT_VAD_SETTINGS
+    'word_timestamps': True,
+    'workers': 1,                # >1: long recordings are split at pauses and chunks transcribed in parallel
+    'chunk_min_sec': 300.0,      # parallel mode: chunk length range...
+    'chunk_max_sec': 600.0,
+    'chunk_overlap_sec': 2.0,    # ...and audio decoded past each cut on both sides for stitching
+}
+
+AudioInput = Union[str, np.ndarray]
+WordsCallback = Callable[[List[Dict[str, Any]]], None]
+
+
+def normalize_transcription_settings(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Fills defaults and coerces types for a template's `transcription` block."""
+    normalized = dict(DEFAULT_TRANSCRIPTION_SETTINGS)
+    normalized.update({k: v for k, v in (settings or {}).items() if v is not None})
+    normalized['engine'] = str(normalized['engine']).strip().lower()
+    for key in ('beam_size', 'cpu_threads', 'batch_size', 'workers'):
+        normalized[key] = max(0, int(normalized[key]))
+    for key in ('beam_size', 'batch_size', 'workers'):
+        normalized[key] = max(1, normalized[key])
+    for key in ('chunk_min_sec', 'chunk_max_sec', 'chunk_overlap_sec'):
+        normalized[key] = max(0.0, float(normalized[key]))
+    normalized['vad'] = str(normalized['vad']).strip().lower()
+    normalized['vad_settings'] = normalize_vad_settings(normalized['vad_settings'])
+    normalized['word_timestamps'] = bool(normalized['word_timestamps'])
+    return normalized
+
+
+def _audio_duration_sec(audio: AudioInput) -> Optional[float]:
+    if isinstance(audio, np.ndarray):
+        return len(audio) / ANALYSIS_SAMPLE_RATE
+    return None
+
+
+# --- Engine plugins ---
+
+_ENGINE_REGISTRY: Dict[str, type] = {}
+
+
+def register_engine(cls):
+    """Class decorator registering a TranscriptionEngine subclass under its `name`."""
+    _ENGINE_REGISTRY[cls.name] = cls
+    return cls
+
+
+class TranscriptionEngine:
+    """
+    Base class for transcription engines. `transcribe` accepts a file path or 16 kHz mono
+    float32 samples and returns {'text', 'language', 'duration', 'segments', 'words',
+    'engine', 'model', 'elapsed_sec'}.
+    """
+    name = 'base'
+    reentrant = True  # whether one loaded model may serve concurrent calls (jobs run on threads)
+
+    def __init__(self, settings: Dict[str, Any]):
+        self.settings = settings
+
+    @property
+    def model_key(self) -> tuple:
+        """Settings that determine the loaded weights; engines with equal keys share one model."""
+        s = self.settings
+        return (self.name, s['model'], s['device'], s['compute_type'], s['cpu_threads'])
+
+    def _load_model(self):
+        raise NotImplementedError
+
+    @property
+    def model(self):
+        return get_asr_model_pool().get(self.model_key, self._load_model)
+
+    def _transcribe(self, audio: AudioInput, chunks: Optional[List[Tuple[float, float]]],
+                    on_words: Optional[WordsCallback]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def transcribe(self, audio: AudioInput, chunks: Optional[List[Tuple[float, float]]] = None,
+                   on_words: Optional[WordsCallback] = None) -> Dict[str, Any]:
+        """
+        Transcribes `audio`. With `chunks` ((start_sec, end_sec) clips, e.g. from vad.pack_speech)
+        only those clips are decoded and the engine's own VAD is skipped. `on_words` is called
+        with each segment's words as soon as the segment is decoded (e.g. a transcript writer).
+        """
+        pool = get_asr_model_pool()
+        pool.hold(self.model_key)
+        try:
+            start = time.perf_counter()
+            if self.reentrant:
+                result = self._transcribe(audio, chunks, on_words)
+            else:
+                with pool.exclusive(self.model_key):
+                    result = self._transcribe(audio, chunks, on_words)
+        finally:
+            pool.release(self.model_key)
+        result.update(engine=self.name, model=self.settings['model'], elapsed_sec=time.perf_counter() - start)
+        if result.get('duration'):
+            logger.info(f"Transcribed {result['duration']:.1f}s of audio with {self.name} in "
+                        f"{result['elapsed_sec']:.1f}s (RTF {result['elapsed_sec'] / result['duration']:.3f}).")
+        return result
+
+
+@register_engine
+class FasterWhisperEngine(TranscriptionEngine):
+    name = 'faster-whisper'
+
+    def _load_model(self):
+        from faster_whisper import WhisperModel
+        return WhisperModel(self.settings['model'], device=self.settings['device'],
+                            compute_type=self.settings['compute_type'],
+                            cpu_threads=self.settings['cpu_threads'])
+
+    def _pipeline(self):
+        try:
+            from faster_whisper import BatchedInferencePipeline
+        except ImportError:
+            return None
+        return BatchedInferencePipeline(model=self.model)
+
+    def _transcribe(self, audio, chunks, on_words):
+        settings = self.settings
+        options = dict(language=settings['language'], beam_size=settings['beam_size'],
+                       word_timestamps=settings['word_timestamps'])
+        use_engine_vad = chunks is None and settings['vad'] != 'none'
+        pipeline = self._pipeline() if settings['batch_size'] > 1 else None
+        if pipeline is not None:
+            if chunks is not None:
+                options['clip_timestamps'] = [{'start': s, 'end': e} for s, e in chunks]
+            segments, info = pipeline.transcribe(audio, batch_size=settings['batch_size'],
+                                                 vad_filter=use_engine_vad, **options)
+        else:
+            if settings['batch_size'] > 1:
+                logger.warning("faster-whisper has no BatchedInferencePipeline; decoding speech chunks sequentially.")
+            if chunks is not None:
+                options['clip_timestamps'] = [t for chunk in chunks for t in chunk]
+            segments, info = self.model.transcribe(audio, vad_filter=use_engine_vad, **options)
+
+        result_segments: List[Dict[str, Any]] = []
+        words: List[Dict[str, Any]] = []
+        for segment in segments:  # a generator: decoding happens while iterating
+            result_segments.append({'start': segment.start, 'end': segment.end, 'text': segment.text.strip()})
+            segment_words = [{'word': word.word.strip(), 'start': word.start, 'end': word.end,
+                              'probability': word.probability} for word in segment.words or []]
+            words.extend(segment_words)
+            if on_words is not None and segment_words:
+                on_words(segment_words)
+        return {'text': ' '.join(s['text'] for s in result_segments).strip(),
+                'language': info.language,
+                'duration': info.duration,
+                'segments': result_segments,
+                'words': words}
+
+
+@register_engine
+class OpenAIWhisperEngine(TranscriptionEngine):
+    name = 'openai-whisper'
+    reentrant = False  # decoding installs kv-cache hooks on the shared model
+
+    def _load_model(self):
+        import torch
+        import whisper
+        if self.settings['cpu_threads']:
+            torch.set_num_threads(self.settings['cpu_threads'])
+        name = self.settings['model']
+        if name not in whisper._MODELS or self.settings['device'] != 'cpu':
+            return whisper.load_model(name, device=self.settings['device'])
+        # Memory-map the checkpoint so the weights stay file-backed and shared between processes.
+        download_root = os.path.join(os.path.expanduser('~'), '.cache', 'whisper')
+        checkpoint_path = whisper._download(whisper._MODELS[name], download_root, False)
+        try:
+            checkpoint = torch.load(checkpoint_path, map_location='cpu', mmap=True, weights_only=True)
+            model = whisper.Whisper(whisper.ModelDimensions(**checkpoint['dims']))
+            model.load_state_dict(checkpoint['model_state_dict'], assign=True)
+        except TypeError:  # torch < 2.1: no mmap/assign
+            return whisper.load_model(name, device='cpu')
+        model.set_alignment_heads(whisper._ALIGNMENT_HEADS[name])
+        return model
+
+    def _transcribe(self, audio, chunks, on_words):
+        settings = self.settings
+        beam_size = settings['beam_size'] if settings['beam_size'] > 1 else None
+        clip_timestamps = [t for chunk in chunks for t in chunk] if chunks else '0'
+        raw = self.model.transcribe(audio, language=settings['language'], beam_size=beam_size,
+                                    word_timestamps=settings['word_timestamps'], fp16=False,
+                                    clip_timestamps=clip_timestamps)
+        result_segments, words = [], []
+        for segment in raw.get('segments', []):
+            result_segments.append({'start': segment['start'], 'end': segment['end'], 'text': segment['text'].strip()})
+            segment_words = [{'word': word['word'].strip(), 'start': word['start'], 'end': word['end'],
+                              'probability': word.get('probability')} for word in segment.get('words', [])]
+            words.extend(segment_words)
+            if on_words is not None and segment_words:
+                on_words(segment_words)  # openai-whisper returns all segments at once
+        duration = _audio_duration_sec(audio) or (result_segments[-1]['end'] if result_segments else 0.0)
+        return {'text': raw.get('text', '').strip(),
+                'language': raw.get('language'),
+                'duration': duration,
+                'segments': result_segments,
+                'words': words}
+
+
+def get_transcription_engine(settings: Optional[Dict[str, Any]] = None) -> TranscriptionEngine:
+    """
+    Returns an engine for a template's `transcription` settings. Engines are cheap; the
+    loaded model is shared by every engine with the same (engine, model, device,
+    compute_type, cpu_threads), so per-template beam/batch options cost no extra memory.
+    """
+    settings = normalize_transcription_settings(settings)
+    engine_cls = _ENGINE_REGISTRY.get(settings['engine'])
+    if engine_cls is None:
+        raise ValueError(f"Unknown transcription engine '{settings['engine']}'. "
+                         f"Available: {', '.join(sorted(_ENGINE_REGISTRY))}")
+    return engine_cls(settings)
+
+def _cache_result(cache, audio_hash: str, settings: Dict[str, Any], result: Dict[str, Any], audio_file_path: str):
+    try:
+        cache.put(audio_hash, settings, result)
+    except OSError as e:
+        logger.warning(f"Could not write transcript cache for {audio_file_path}: {e}")
+
+
+def transcribe_file(audio_file_path: str, settings: Optional[Dict[str, Any]] = None,
+                    use_cache: bool = True, on_words: Optional[WordsCallback] = None) -> Dict[str, Any]:
+    """
+    Transcribes a recording with the engine chosen by `settings` (a template's `transcription`
+    block). Results are served from the transcript cache when the same audio was already
+    transcribed with the same parameters. With the default energy VAD, the PCM comes from the
+    shared break-engine analysis, so a recording the job already analyzed is not decoded twice.
+    `on_words` receives the words incrementally as they are decoded (all at once on a cache hit).
+    """
+    settings = normalize_transcription_settings(settings)
+    break_engine = get_break_engine()
+    audio_hash = break_engine.content_hash(audio_file_path)
+    cache = get_transcript_cache()
+    if use_cache:
+        cached = cache.get(audio_hash, settings)
+        if cached is not None:
+            if on_words is not None and cached['words']:
+                on_words(cached['words'])
+            return cached
+
+    if settings['workers'] > 1:
+        analysis = break_engine.analyze(audio_file_path, keep_samples=True)
+        if analysis.duration_ms > settings['chunk_max_sec'] * 1000:
+            from .parallel_transcription import transcribe_parallel  # imports this module
+            result = transcribe_parallel(analysis, settings, on_words=on_words)
+            _cache_result(cache, audio_hash, settings, result, audio_file_path)
+            return result
+
+    engine = get_transcription_engine(settings)
+    if settings['vad'] == 'energy':
+        analysis = break_engine.analyze(audio_file_path, keep_samples=True)
+        result = transcribe_speech(engine, analysis, settings['vad_settings'], on_words=on_words)
+    else:
+        result = engine.transcribe(audio_file_path, on_words=on_words)
+    _cache_result(cache, audio_hash, settings, result, audio_file_path)
+    return result
+
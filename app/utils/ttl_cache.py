@@ -0,0 +1,80 @@
+"""
+Small JSON response cache with per-entry expiry, for lookups against external APIs.
+
+Entries live under <cache>/<name>/<key[:2]>/<key>.json as {'expires_at', 'value'}. A
+value of None is a valid (negative) entry, so callers can remember "not found" answers,
+usually with a shorter TTL than positive ones. Expired entries are ignored on read and
+overwritten by the next put.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+from .cache_utils import get_cache_dir, text_sha256
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Disk cache of JSON-serializable values with expiry and per-process hit/miss counters."""
+
+    def __init__(self, name: str, default_ttl_sec: float, cache_dir: Optional[str] = None):
+        self.name = name
+        self.default_ttl_sec = default_ttl_sec
+        self.cache_dir = cache_dir or get_cache_dir(name)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts) -> str:
+        return text_sha256(*parts)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def hit_rate(self) -> str:
+        total = self.hits + self.misses
+        return f"{self.hits}/{total} ({100.0 * self.hits / total:.0f}%)" if total else "0/0"
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """(True, value) for a live entry (value may be None for a cached negative), else (False, None)."""
+        path = self._path(key)
+        found, value = False, None
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+            if entry.get('expires_at', 0) > time.time():
+                found, value = True, entry.get('value')
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable {self.name} cache entry {path}: {e}")
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found, value
+
+    def put(self, key: str, value: Any, ttl_sec: Optional[float] = None):
+        path = self._path(key)
+        ttl = self.default_ttl_sec if ttl_sec is None else ttl_sec
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'expires_at': time.time() + ttl, 'value': value}, f)
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not write {self.name} cache entry {path}: {e}")
+
+    def invalidate(self, key: str) -> bool:
+        path = self._path(key)
+        if os.path.exists(path):
+            os.unlink(path)
+            return True
+        return False
@@ -0,0 +1,187 @@
+"""
+Text-to-speech audio cache.
+
+The same intro text is synthesized again and again: reruns via
+`db_jobs.recreate_job_from_existing`, a template's `gui_default_ai_intro_text` and
+recurring sponsor reads. Entries are the MP3 bytes returned by the TTS API, addressed by
+SHA-256 over (voice_id, model_id, normalized text) and stored under
+<cache>/tts/<key[:2]>/<key>.mp3. The local directory is bounded by TTS_CACHE_MAX_MB and
+evicts least recently used entries first (a hit refreshes the file's mtime).
+
+Cloud Run disks are ephemeral, so with TTS_CACHE_GCS_PREFIX set every entry is also
+written to `<prefix>/<key>.mp3` in the bucket, and a local miss is looked up there before
+the caller falls back to the API.
+"""
+import logging
+import os
+import re
+import threading
+import unicodedata
+from typing import Optional
+
+from .cache_utils import get_cache_dir, text_sha256
+
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = int(float(os.environ.get('TTS_CACHE_MAX_MB', '256')) * 1024 * 1024)
+# After an eviction pass the cache is this fraction of its limit, so puts do not evict one file at a time.
+_EVICT_TO_FRACTION = 0.9
+
+
+def normalize_tts_text(text: str) -> str:
+    """
+    Canonical form of a TTS input: Unicode NFC with whitespace runs collapsed and trimmed.
+    Case and punctuation are kept because they change the delivery.
+    """
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text or '')).strip()
+
+
+class TTSCache:
+    """Size-bounded LRU disk cache of synthesized MP3s, optionally mirrored to GCS."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 gcs_prefix: Optional[str] = None):
+        self.cache_dir = cache_dir or get_cache_dir('tts')
+        self.max_bytes = max_bytes
+        self.gcs_prefix = (gcs_prefix if gcs_prefix is not None else os.environ.get('TTS_CACHE_GCS_PREFIX', '')).strip('/')
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None  # bytes on disk, computed on first put
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str, voice_id: str, model_id: str) -> str:
+        return text_sha256(TTS_CACHE_VERSION, voice_id, model_id, normalize_tts_text(text))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.mp3")
+
+    def _blob_name(self, key: str) -> str:
+        return f"{self.gcs_prefix}/{key}.mp3"
+
+    def hit_rate(self) -> str:
+        total = self.hits + self.misses
+        return f"{self.hits}/{total} ({100.0 * self.hits / total:.0f}%)" if total else "0/0"
+
+    def get(self, text: str, voice_id: str, model_id: str) -> Optional[bytes]:
+        """Returns the cached MP3 bytes for this voice, model and text, or None."""
+        key = self.key(text, voice_id, model_id)
+        path = self._path(key)
+        data, source = None, None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # mark as recently used
+            source = 'local'
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Ignoring unreadable TTS cache entry {path}: {e}")
+        if data is None and self.gcs_prefix:
+            import gcs_utils
+            data = gcs_utils.download_blob_bytes(self._blob_name(key))
+            if data is not None:
+                source = 'GCS'
+                self._write_local(key, data)
+        with self._lock:
+            if data is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            rate = self.hit_rate()
+        logger.info(f"TTS cache {'hit (' + source + ')' if data is not None else 'miss'} for voice {voice_id} "
+                    f"({len(normalize_tts_text(text))} chars); hit rate this process {rate}.")
+        return data
+
+    def put(self, text: str, voice_id: str, model_id: str, data: bytes):
+        """Stores synthesized MP3 bytes locally (evicting old entries if needed) and in GCS if configured."""
+        if not data:
+            return
+        key = self.key(text, voice_id, model_id)
+        self._write_local(key, data)
+        if self.gcs_prefix:
+            import gcs_utils
+            gcs_utils.upload_blob_bytes(self._blob_name(key), data, content_type='audio/mpeg')
+
+    def _write_local(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.part"
+        try:
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write TTS cache entry {path}: {e}")
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.mp3'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, path
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Deletes least recently used entries until the cache is back under its target size."""
+        entries = sorted(self._entries())
+        size = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * _EVICT_TO_FRACTION)
+        removed = 0
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            size -= entry_size
+            removed += 1
+        self._size = size
+        if removed:
+            logger.info(f"TTS cache evicted {removed} least recently used entr{'y' if removed == 1 else 'ies'}; "
+                        f"{size / (1024 * 1024):.1f} MB of {self.max_bytes / (1024 * 1024):.0f} MB in use.")
+
+    def invalidate(self, text: str, voice_id: str, model_id: str) -> bool:
+        """Deletes one local entry (GCS copies are left alone); returns True if it existed."""
+        path = self._path(self.key(text, voice_id, model_id))
+        if not os.path.exists(path):
+            return False
+        size = os.path.getsize(path)
+        os.unlink(path)
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+        return True
+
+
+_cache: Optional[TTSCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    """Returns the process-wide TTS cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TTSCache()
+    return _cache
@@ -0,0 +1,193 @@
+"""
+Energy/zero-crossing voice-activity detection in front of ASR.
+
+Works entirely on the break engine's 10 ms frame features (`envelope_db`, `zcr`), so it
+costs a few vectorized passes over arrays that already exist. A frame counts as speech
+when it is clearly above the recording's noise floor, or moderately above it with the
+high zero-crossing rate of unvoiced consonants. Decisions are smoothed with onset
+padding and a hangover, short gaps are bridged and blips are dropped.
+
+Speech regions are then packed back to back (with a short spacer) into chunks of at most
+`max_chunk_sec`, which is Whisper's window, and handed to the engine as clip boundaries.
+`SpeechPack.to_original` maps timestamps on the packed audio back to the recording.
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .break_engine import AudioAnalysis
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VAD_SETTINGS = {
+    'noise_floor_percentile': 10,   # envelope percentile taken as the noise floor
+    'speech_margin_db': 12.0,       # above the floor: speech
+    'fricative_margin_db': 6.0,     # above the floor *and* zcr >= fricative_zcr: unvoiced speech
+    'fricative_zcr': 0.25,
+    'min_speech_db': -55.0,         # never speech below this absolute level
+    'onset_pad_ms': 100,
+    'hangover_ms': 300,
+    'merge_gap_ms': 500,
+    'min_speech_ms': 250,
+    'max_chunk_sec': 30.0,
+    'spacer_ms': 200,
+}
+
+
+def normalize_vad_settings(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    normalized = dict(DEFAULT_VAD_SETTINGS)
+    normalized.update({k: v for k, v in (settings or {}).items() if k in DEFAULT_VAD_SETTINGS and v is not None})
+    return normalized
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def speech_mask(analysis: AudioAnalysis, settings: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """Per-frame boolean speech decision after onset padding and hangover smoothing."""
+    settings = normalize_vad_settings(settings)
+    env = analysis.envelope_db
+    if len(env) == 0:
+        return np.zeros(0, dtype=bool)
+    floor = float(np.percentile(env, settings['noise_floor_percentile']))
+    loud = env >= max(settings['min_speech_db'], floor + settings['speech_margin_db'])
+    if analysis.zcr is not None and len(analysis.zcr) == len(env):
+        fricative = ((env >= max(settings['min_speech_db'], floor + settings['fricative_margin_db']))
+                     & (analysis.zcr >= settings['fricative_zcr']))
+        raw = loud | fricative
+    else:
+        raw = loud
+
+    # Onset pad (dilate backwards) and hangover (dilate forwards) in one cumulative-sum pass.
+    frame_ms = analysis.frame_ms
+    before = int(np.ceil(settings['onset_pad_ms'] / frame_ms))
+    after = int(np.ceil(settings['hangover_ms'] / frame_ms))
+    counts = np.concatenate(([0], np.cumsum(raw, dtype=np.int64)))
+    idx = np.arange(len(raw))
+    lo = np.clip(idx - after, 0, len(raw))
+    hi = np.clip(idx + before + 1, 0, len(raw))
+    return (counts[hi] - counts[lo]) > 0
+
+
+def detect_speech(analysis: AudioAnalysis, settings: Optional[Dict[str, Any]] = None) -> List[Tuple[int, int]]:
+    """Returns merged (start_ms, end_ms) speech regions of an analyzed recording."""
+    settings = normalize_vad_settings(settings)
+    mask = speech_mask(analysis, settings)
+    starts, ends = _runs(mask)
+    frame_ms = analysis.frame_ms
+    regions: List[List[int]] = []
+    for s, e in zip(starts * frame_ms, np.minimum(ends * frame_ms, analysis.duration_ms)):
+        if regions and s - regions[-1][1] < settings['merge_gap_ms']:
+            regions[-1][1] = int(e)
+        else:
+            regions.append([int(s), int(e)])
+    return [(s, e) for s, e in regions if e - s >= settings['min_speech_ms']]
+
+
+class SpeechPack:
+    """
+    Speech regions laid end to end in a new buffer. `pieces` holds (packed_start_ms,
+    original_start_ms, length_ms); `chunks` holds the (start_sec, end_sec) clip boundaries
+    on the packed audio, each at most max_chunk_sec long.
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int, pieces: List[Tuple[int, int, int]],
+                 chunks: List[Tuple[float, float]], original_duration_ms: int):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.pieces = pieces
+        self.chunks = chunks
+        self.original_duration_ms = original_duration_ms
+        self._packed_starts = np.array([p[0] for p in pieces], dtype=np.int64)
+
+    @property
+    def speech_ms(self) -> int:
+        return sum(p[2] for p in self.pieces)
+
+    def to_original(self, packed_sec: float) -> float:
+        """Maps a time on the packed audio back to the original recording (spacers snap to the piece end)."""
+        if not self.pieces:
+            return packed_sec
+        packed_ms = packed_sec * 1000.0
+        i = max(0, int(np.searchsorted(self._packed_starts, packed_ms, side='right')) - 1)
+        packed_start, original_start, length = self.pieces[i]
+        return (original_start + min(max(packed_ms - packed_start, 0.0), length)) / 1000.0
+
+
+def pack_speech(samples: np.ndarray, sample_rate: int, regions: List[Tuple[int, int]],
+                settings: Optional[Dict[str, Any]] = None) -> SpeechPack:
+    """Concatenates speech regions into one buffer and groups them into <= max_chunk_sec clips."""
+    settings = normalize_vad_settings(settings)
+    max_chunk_ms = int(settings['max_chunk_sec'] * 1000)
+    spacer_ms = int(settings['spacer_ms'])
+    per_ms = sample_rate / 1000.0
+
+    # Regions longer than one chunk are split so every piece fits a Whisper window.
+    split: List[Tuple[int, int]] = []
+    for start, end in regions:
+        while end - start > max_chunk_ms:
+            split.append((start, start + max_chunk_ms))
+            start += max_chunk_ms
+        split.append((start, end))
+
+    buffers, pieces, chunks = [], [], []
+    spacer = np.zeros(int(spacer_ms * per_ms), dtype=np.float32)
+    packed_ms = 0
+    chunk_start = None
+    for start, end in split:
+        length = end - start
+        if chunk_start is not None and packed_ms + length - chunk_start > max_chunk_ms:
+            chunks.append((chunk_start / 1000.0, packed_ms / 1000.0))
+            chunk_start = None
+        if chunk_start is None:
+            chunk_start = packed_ms
+        piece = samples[int(start * per_ms):int(end * per_ms)]
+        buffers.extend((piece, spacer))
+        pieces.append((packed_ms, start, length))
+        packed_ms += length + spacer_ms
+    if chunk_start is not None:
+        chunks.append((chunk_start / 1000.0, packed_ms / 1000.0))
+
+    packed = np.concatenate(buffers).astype(np.float32) if buffers else np.zeros(0, dtype=np.float32)
+    original_ms = int(round(len(samples) / per_ms))
+    return SpeechPack(packed, sample_rate, pieces, chunks, original_ms)
+
+
+def transcribe_speech(engine, analysis: AudioAnalysis, vad_settings: Optional[Dict[str, Any]] = None,
+                      on_words: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> Dict[str, Any]:
+    """
+    Runs `engine` (a TranscriptionEngine) on the speech regions of `analysis` only and returns
+    its result with every timestamp mapped back to the original recording. The analysis
+    must carry PCM samples (BreakEngine.analyze(..., keep_samples=True)). `on_words` gets
+    each decoded segment's words, already on the original timeline.
+    """
+    if analysis.samples is None:
+        raise ValueError("VAD-gated transcription needs an analysis with PCM samples.")
+    regions = detect_speech(analysis, vad_settings)
+    pack = pack_speech(analysis.samples, analysis.sample_rate, regions, vad_settings)
+    total_sec = analysis.duration_ms / 1000.0
+    speech_sec = pack.speech_ms / 1000.0
+    logger.info(f"VAD kept {speech_sec:.1f}s of {total_sec:.1f}s in {len(regions)} region(s), "
+                f"{len(pack.chunks)} chunk(s): {100.0 * (1 - speech_sec / total_sec) if total_sec else 0:.0f}% less audio for ASR.")
+    if not pack.chunks:
+        return {'text': '', 'language': None, 'duration': total_sec, 'segments': [], 'words': [],
+                'engine': engine.name, 'model': engine.settings['model'], 'elapsed_sec': 0.0,
+                'speech_sec': 0.0}
+
+    forward = None
+    if on_words is not None:
+        def forward(words):
+            on_words([dict(w, start=pack.to_original(w['start']), end=pack.to_original(w['end'])) for w in words])
+    result = engine.transcribe(pack.samples, chunks=pack.chunks, on_words=forward)
+    for segment in result['segments']:
+        segment['start'] = pack.to_original(segment['start'])
+        segment['end'] = pack.to_original(segment['end'])
+    for word in result['words']:
+        word['start'] = pack.to_original(word['start'])
+        word['end'] = pack.to_original(word['end'])
+    result['duration'] = total_sec
+    result['speech_sec'] = speech_sec
+    return result
@@ -0,0 +1,114 @@
+"""
+Precomputed waveform peaks.
+
+Peaks are min/max pairs per pixel in the audiowaveform `.dat` (version 1, 8-bit) layout,
+stored at several zoom levels so the browser never has to download or decode the
+recording itself. Each level is one `.dat` file under the peaks cache, keyed by the
+recording's content hash; the tile endpoint slices TILE_PIXELS-wide ranges out of it.
+The pyramid is built by the break engine while it already holds the decoded PCM.
+"""
+import json
+import logging
+import os
+import struct
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .cache_utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+DAT_VERSION = 1
+DAT_FLAG_8BIT = 0x1
+DAT_HEADER = struct.Struct('<iIiiI')   # version, flags, sample_rate, samples_per_pixel, length
+# Level 0 is 4 ms per pixel at 16 kHz; each further level is 4x coarser (~1 s per pixel at the top).
+PEAK_LEVELS = (64, 256, 1024, 4096, 16384)
+TILE_PIXELS = 2048
+
+
+def _peaks_dir(content_hash: str) -> str:
+    return os.path.join(get_cache_dir('peaks'), content_hash)
+
+
+def _level_path(content_hash: str, samples_per_pixel: int) -> str:
+    return os.path.join(_peaks_dir(content_hash), f"{samples_per_pixel}.dat")
+
+
+def encode_dat(peaks: np.ndarray, sample_rate: int, samples_per_pixel: int) -> bytes:
+    """Serializes an (n, 2) int8 min/max array as an audiowaveform .dat blob."""
+    header = DAT_HEADER.pack(DAT_VERSION, DAT_FLAG_8BIT, sample_rate, samples_per_pixel, len(peaks))
+    return header + np.ascontiguousarray(peaks, dtype=np.int8).tobytes()
+
+
+def build_peak_pyramid(samples: np.ndarray, levels=PEAK_LEVELS) -> Dict[int, np.ndarray]:
+    """
+    Returns {samples_per_pixel: (n, 2) int8 min/max} for mono float samples in [-1.0, 1.0].
+    Only the finest level touches the samples; coarser levels are reduced from the one below.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    pyramid = {}
+    base = levels[0]
+    n_pixels = int(np.ceil(len(samples) / base))
+    padded = np.zeros(n_pixels * base, dtype=np.float32)
+    padded[:len(samples)] = samples
+    frames = padded.reshape(n_pixels, base)
+    mins, maxs = frames.min(axis=1), frames.max(axis=1)
+
+    previous = base
+    for spp in levels:
+        factor = spp // previous
+        if factor > 1:
+            n = int(np.ceil(len(mins) / factor))
+            pad = n * factor - len(mins)
+            mins = np.concatenate((mins, np.zeros(pad, dtype=mins.dtype))).reshape(n, factor).min(axis=1)
+            maxs = np.concatenate((maxs, np.zeros(pad, dtype=maxs.dtype))).reshape(n, factor).max(axis=1)
+        pyramid[spp] = np.clip(np.round(np.stack((mins, maxs), axis=1) * 127.0), -128, 127).astype(np.int8)
+        previous = spp
+    return pyramid
+
+
+def write_peak_pyramid(content_hash: str, samples: np.ndarray, sample_rate: int, duration_ms: int):
+    """Builds and stores every zoom level of a recording, plus a small JSON index."""
+    out_dir = _peaks_dir(content_hash)
+    os.makedirs(out_dir, exist_ok=True)
+    pyramid = build_peak_pyramid(samples)
+    for spp, peaks in pyramid.items():
+        temp_path = _level_path(content_hash, spp) + '.part'
+        with open(temp_path, 'wb') as f:
+            f.write(encode_dat(peaks, sample_rate, spp))
+        os.replace(temp_path, _level_path(content_hash, spp))
+    index = {'sample_rate': sample_rate, 'duration_ms': int(duration_ms), 'tile_pixels': TILE_PIXELS,
+             'levels': [{'samples_per_pixel': spp, 'length': len(peaks)} for spp, peaks in pyramid.items()]}
+    with open(os.path.join(out_dir, 'index.json'), 'w') as f:
+        json.dump(index, f)
+    logger.info(f"Wrote waveform peaks for {content_hash[:12]} ({len(pyramid)} levels).")
+
+
+def get_peak_index(content_hash: str) -> Optional[Dict[str, Any]]:
+    """Returns the level index for a recording, or None if no peaks were generated."""
+    index_path = os.path.join(_peaks_dir(content_hash), 'index.json')
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path) as f:
+        return json.load(f)
+
+
+def read_peak_tile(content_hash: str, samples_per_pixel: int, tile: int) -> Optional[bytes]:
+    """
+    Returns tile `tile` of a level as a standalone .dat blob (header + up to TILE_PIXELS
+    min/max pairs), reading only that byte range from disk. None if the level or tile is missing.
+    """
+    path = _level_path(content_hash, samples_per_pixel)
+    if tile < 0 or not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        _, _, sample_rate, spp, length = DAT_HEADER.unpack(f.read(DAT_HEADER.size))
+        first = tile * TILE_PIXELS
+        if first >= length:
+            return None
+        count = min(TILE_PIXELS, length - first)
+        f.seek(DAT_HEADER.size + first * 2)
+        body = f.read(count * 2)
+    return DAT_HEADER.pack(DAT_VERSION, DAT_FLAG_8BIT, sample_rate, spp, count) + body
+
@@ -1,6 +1,11 @@
+import os
 import logging
-from flask import Blueprint, jsonify, render_template_string
+from flask import Blueprint, jsonify, render_template_string, request
 import db_manager
+from app.utils.timeline_planner import plan_timeline_for_job
+from app.utils.transcript_cache import get_transcript_cache
+from app.utils.transcript_writers import WRITERS, read_transcript_progress, transcript_started
+from app.utils.transcription_engine import normalize_transcription_settings
 
 logger = logging.getLogger(__name__)
 
@@ -153,4 +158,68 @@ def api_stats():
         
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
-        return jsonify({'error': 'Failed to get stats'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Failed to get stats'}), 500
+
+@admin_bp.route('/api/jobs/<int:job_id>/timeline')
+def api_job_timeline(job_id):
+    """Dry-run plan of a job's final timeline (segments, cuts, breaks), computed from metadata only"""
+    try:
+        job_details = db_manager.get_job_details(job_id)
+        if not job_details:
+            return jsonify({'error': f'Job {job_id} not found'}), 404
+        base_dir = os.path.dirname(os.path.abspath(db_manager.__file__))
+        return jsonify(plan_timeline_for_job(job_details, base_dir))
+
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error planning timeline for job {job_id}: {e}")
+        return jsonify({'error': 'Failed to plan timeline'}), 500
+
+@admin_bp.route('/api/jobs/<int:job_id>/transcript')
+def api_job_transcript(job_id):
+    """Transcript of a job so far (?format=vtt|srt|txt|json, ?offset=<bytes already read>&timeline=<timeline they came from>), readable while the job runs"""
+    try:
+        fmt = request.args.get('format', 'vtt')
+        if fmt not in WRITERS:
+            return jsonify({'error': f"format must be one of {', '.join(sorted(WRITERS))}"}), 400
+        offset = request.args.get('offset', 0, type=int)
+        offset_timeline = request.args.get('timeline')
+        job_details = db_manager.get_job_details(job_id)
+        if not job_details:
+            return jsonify({'error': f'Job {job_id} not found'}), 404
+        if not job_details.get('job_base_output_dir') or not job_details.get('output_base_filename'):
+            return jsonify({'error': f'Job {job_id} has no output location'}), 404
+        prefix = os.path.join(job_details['job_base_output_dir'], job_details['output_base_filename'])
+
+        # The final-episode transcript once it is being written; before that, the live
+        # transcript of the raw recording (its own timeline, only written as VTT).
+        # An offset into one file means nothing in the other: when the timeline changed since
+        # the poller's last read, start over from the top and tell it to drop what it has.
+        timeline, path_prefix = 'episode', prefix
+        if fmt == 'vtt' and not transcript_started(prefix, fmt):
+            timeline, path_prefix = 'recording', prefix + '.recording'
+        reset = bool(offset_timeline) and offset_timeline != timeline
+        progress = read_transcript_progress(path_prefix, fmt, 0 if reset else offset)
+        if progress is None:
+            return jsonify({'status': job_details.get('status'), 'available': False})
+        return jsonify(dict(progress, status=job_details.get('status'), available=True, timeline=timeline, reset=reset))
+
+    except Exception as e:
+        logger.error(f"Error reading transcript for job {job_id}: {e}")
+        return jsonify({'error': 'Failed to read transcript'}), 500
+
+@admin_bp.route('/api/transcripts/<string:audio_hash>', methods=['DELETE'])
+def api_invalidate_transcripts(audio_hash):
+    """Drops cached transcripts of a recording: all of them, or only those matching a JSON transcription settings body"""
+    try:
+        if len(audio_hash) != 64 or not all(c in '0123456789abcdef' for c in audio_hash):
+            return jsonify({'error': 'audio_hash must be a SHA-256 hex digest'}), 400
+        settings = request.get_json(silent=True)
+        cache = get_transcript_cache()
+        removed = cache.invalidate(audio_hash, normalize_transcription_settings(settings) if settings else None)
+        return jsonify({'removed': removed})
+
+    except Exception as e:
+        logger.error(f"Error invalidating transcripts for {audio_hash}: {e}")
+        return jsonify({'error': 'Failed to invalidate transcripts'}), 500
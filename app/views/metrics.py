@@ -0,0 +1,22 @@
+import logging
+from flask import Blueprint, Response
+from app.utils.metrics import get_metrics_registry
+from app.utils.rate_limiter import get_rate_limiter
+from app.utils.resilience import register_metrics as register_resilience_metrics
+
+logger = logging.getLogger(__name__)
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """Prometheus text exposition of the app's metrics (including node-wide external API latency, breakers and rate-limit waits)"""
+    try:
+        # Register the node-wide metrics even if this process has made no API calls yet.
+        get_rate_limiter()
+        register_resilience_metrics()
+        return Response(get_metrics_registry().render(), mimetype='text/plain; version=0.0.4')
+
+    except Exception as e:
+        logger.error(f"Rendering metrics failed: {e}")
+        return Response('# metrics unavailable\n', status=500, mimetype='text/plain')
@@ -1,12 +1,12 @@
 import os
 from flask import Blueprint, request, render_template, redirect, url_for, flash, current_app
 from werkzeug.utils import secure_filename
-from datetime import datetime
 import tempfile
 import pytz
 
 import db_manager
 import gcs_utils
+from app.utils.image_pipeline import DERIVATIVES, ImageValidationError, get_image_pipeline, variant_name
 
 podcasts_bp = Blueprint('podcasts', __name__, template_folder='../templates')
 
@@ -19,6 +19,38 @@ def allowed_image_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_IMAGE_EXTENSIONS']
 
+def cover_art_blob_names(cover_art_path):
+    """GCS blobs for a stored cover art name: the master plus, for pipeline-processed art, its derivatives."""
+    blob_names = [f"assets/cover_art/{cover_art_path}"]
+    if variant_name(cover_art_path):
+        blob_names.extend(f"assets/cover_art/{variant_name(cover_art_path, v)}" for v in DERIVATIVES)
+    return blob_names
+
+def ingest_cover_art(cover_art_file):
+    """
+    Runs an uploaded cover art through the image pipeline and uploads the master and its
+    derivatives to GCS. Returns the master's content-hashed name, or None if the upload
+    failed. Raises ImageValidationError for files that are not usable images.
+    """
+    filename = secure_filename(cover_art_file.filename)
+    temp_filepath = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{filename}") as temp_file:
+            cover_art_file.save(temp_file.name)
+            temp_filepath = temp_file.name
+        paths = get_image_pipeline().ingest(temp_filepath)
+        for path in paths.values():
+            if not gcs_utils.upload_file_to_gcs(path, f"assets/cover_art/{os.path.basename(path)}"):
+                return None
+        return os.path.basename(paths['master'])
+    finally:
+        if temp_filepath and os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+
+def cover_art_preview_url(cover_art_path):
+    """Signed URL for the thumbnail of the cover art (the original for art stored before the pipeline)."""
+    return gcs_utils.generate_signed_url(f"assets/cover_art/{variant_name(cover_art_path, 'thumb') or cover_art_path}")
+
 @podcasts_bp.route('/podcasts/new', methods=['GET', 'POST'])
 def new_podcast():
     if request.method == 'POST':
@@ -31,28 +63,15 @@ def new_podcast():
         cover_art_file = request.files.get('cover_art_file')
         if cover_art_file and cover_art_file.filename:
             if allowed_image_file(cover_art_file.filename):
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                filename = secure_filename(cover_art_file.filename)
-                unique_filename = f"{timestamp}_{filename}"
-                
-                temp_filepath = None
                 try:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{filename}") as temp_file:
-                        cover_art_file.save(temp_file.name)
-                        temp_filepath = temp_file.name
-                    
-                    gcs_destination_blob = f"assets/cover_art/{unique_filename}"
-                    gcs_uri = gcs_utils.upload_file_to_gcs(temp_filepath, gcs_destination_blob)
-
-                    if gcs_uri:
-                        cover_art_path = unique_filename # Store just the filename part
-                    else:
-                        raise Exception("GCS upload failed.")
-                finally:
-                    if temp_filepath and os.path.exists(temp_filepath):
-                        os.remove(temp_filepath)
+                    cover_art_path = ingest_cover_art(cover_art_file) # Store just the filename part
+                except ImageValidationError as e:
+                    flash(f'Invalid cover art image: {e}', 'error')
+                    return render_template('edit_podcast.html', podcast=request.form, form_action='new', timezones=pytz.common_timezones)
+                if not cover_art_path:
+                    raise Exception("GCS upload failed.")
             else:
-                flash('Invalid cover art file type. Allowed types are png, jpg, jpeg, gif.', 'error')
+                flash('Invalid cover art file type. Allowed types are png, jpg, jpeg, gif, webp.', 'error')
                 return render_template('edit_podcast.html', podcast=request.form, form_action='new', timezones=pytz.common_timezones)
 
         podcast_id = db_manager.add_podcast_project(
@@ -81,12 +100,11 @@ def edit_podcast(podcast_id):
         flash('Podcast not found.', 'error')
         return redirect(url_for('podcasts.list_podcasts'))
 
-    # For GET requests, generate a signed URL for the cover art if it exists
+    # For GET requests, generate a signed URL for the cover art thumbnail if it exists
     cover_art_url = None
     if request.method == 'GET' and podcast.get('default_cover_art_path'):
         try:
-            blob_name = f"assets/cover_art/{podcast.get('default_cover_art_path')}"
-            cover_art_url = gcs_utils.generate_signed_url(blob_name)
+            cover_art_url = cover_art_preview_url(podcast.get('default_cover_art_path'))
             if not cover_art_url:
                 flash(f"Could not generate preview URL for cover art '{podcast.get('default_cover_art_path')}'.", 'warning')
         except Exception as e:
@@ -105,29 +123,22 @@ def edit_podcast(podcast_id):
         cover_art_file = request.files.get('cover_art_file')
         if cover_art_file and cover_art_file.filename:
             if allowed_image_file(cover_art_file.filename):
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                filename = secure_filename(cover_art_file.filename)
-                unique_filename = f"{timestamp}_{filename}"
-                
-                temp_filepath = None
                 try:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{filename}") as temp_file:
-                        cover_art_file.save(temp_file.name)
-                        temp_filepath = temp_file.name
-                    
-                    gcs_destination_blob = f"assets/cover_art/{unique_filename}"
-                    gcs_uri = gcs_utils.upload_file_to_gcs(temp_filepath, gcs_destination_blob)
-
-                    if gcs_uri:
-                        # If upload is successful, delete the old cover art from GCS
-                        if podcast.get('default_cover_art_path'):
-                            gcs_utils.delete_gcs_blob(f"assets/cover_art/{podcast.get('default_cover_art_path')}")
-                        cover_art_path = unique_filename # Update to new filename
-                finally:
-                    if temp_filepath and os.path.exists(temp_filepath):
-                        os.remove(temp_filepath)
+                    new_cover_art_path = ingest_cover_art(cover_art_file)
+                except ImageValidationError as e:
+                    flash(f'Invalid cover art image: {e}', 'error')
+                    return redirect(url_for('podcasts.edit_podcast', podcast_id=podcast_id))
+                if new_cover_art_path:
+                    # If upload is successful, delete the old cover art from GCS. Names are content hashes, so
+                    # keep it if the same image was re-uploaded or another podcast uses the same image.
+                    old_cover_art_path = podcast.get('default_cover_art_path')
+                    if old_cover_art_path and old_cover_art_path != new_cover_art_path and \
+                            not db_manager.is_cover_art_in_use(old_cover_art_path, exclude_podcast_id=podcast_id):
+                        for blob_name in cover_art_blob_names(old_cover_art_path):
+                            gcs_utils.delete_gcs_blob(blob_name)
+                    cover_art_path = new_cover_art_path # Update to new filename
             else:
-                flash('Invalid cover art file type. Allowed types are png, jpg, jpeg, gif.', 'error')
+                flash('Invalid cover art file type. Allowed types are png, jpg, jpeg, gif, webp.', 'error')
                 return redirect(url_for('podcasts.edit_podcast', podcast_id=podcast_id))
 
 
@@ -0,0 +1,28 @@
+import logging
+import time
+from flask import Blueprint, jsonify, request
+import db_manager  # injects the database connection into db_transcript_search
+import db_transcript_search
+
+logger = logging.getLogger(__name__)
+
+search_bp = Blueprint('search', __name__)
+
+MAX_RESULTS = 100
+
+@search_bp.route('/search')
+def search():
+    """Transcript search across all episodes: ?q=<words or "a phrase">&limit=<n>, returns episode + timestamp hits"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': "Query parameter 'q' is required"}), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), MAX_RESULTS))
+    try:
+        start = time.perf_counter()
+        results = db_transcript_search.search_transcripts(query, limit=limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        return jsonify({'query': query, 'count': len(results), 'elapsed_ms': round(elapsed_ms, 1), 'results': results})
+
+    except Exception as e:
+        logger.error(f"Transcript search failed for '{query}': {e}")
+        return jsonify({'error': 'Search failed'}), 500
@@ -0,0 +1,66 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+# Add the parent directory to sys.path to allow imports from sibling modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import db_manager
+import db_transcript_search
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def load_episode_words(mp3_path: str, transcribe: bool) -> Optional[List[Dict[str, Any]]]:
+    """
+    Word-level transcript of a processed episode: the <prefix>.json written next to the MP3
+    at job completion, or (with --transcribe) a fresh ASR pass over the MP3 itself.
+    """
+    json_path = os.path.splitext(mp3_path)[0] + '.json'
+    if os.path.exists(json_path):
+        with open(json_path, encoding='utf-8') as f:
+            return json.load(f).get('words', [])
+    if transcribe and os.path.exists(mp3_path):
+        from app.utils.transcription_engine import transcribe_file
+        return transcribe_file(mp3_path)['words']
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Index the transcripts of existing episodes (the 'episodes' table) for /search.")
+    parser.add_argument("--force", action="store_true", help="Re-index episodes that are already in the search index.")
+    parser.add_argument("--transcribe", action="store_true",
+                        help="Transcribe episodes that have no transcript JSON next to their MP3 (slow).")
+    args = parser.parse_args()
+
+    indexed = skipped = missing = failed = 0
+    for episode in db_manager.get_all_episodes():
+        mp3_path = episode.get('processed_mp3_path')
+        if not mp3_path:
+            missing += 1
+            continue
+        if not args.force and db_transcript_search.is_indexed(mp3_path):
+            skipped += 1
+            continue
+        try:
+            words = load_episode_words(mp3_path, args.transcribe)
+            if words is None:
+                logger.warning(f"No transcript found for episode {episode.get('episode_number')} ({mp3_path}).")
+                missing += 1
+                continue
+            db_transcript_search.index_episode_transcript(mp3_path, words,
+                                                          episode_number=episode.get('episode_number'),
+                                                          episode_topic=episode.get('episode_topic'))
+            indexed += 1
+        except Exception as e:
+            logger.error(f"Failed to index episode {episode.get('episode_number')} ({mp3_path}): {e}", exc_info=True)
+            failed += 1
+
+    logger.info(f"Backfill finished: {indexed} indexed, {skipped} already indexed, "
+                f"{missing} without transcript, {failed} failed.")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
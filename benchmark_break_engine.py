@@ -0,0 +1,108 @@
+"""
+Benchmark harness for the break-detection engine.
+
+Generates a synthetic "speech with pauses" recording and times:
+  - the legacy path (pydub decode + pydub.silence.detect_silence on every call)
+  - a cold engine run (decode + envelope + detectors)
+  - a warm engine run from the on-disk analysis cache (no decode)
+  - re-detection with new slider settings on an in-memory analysis
+
+Usage: python benchmark_break_engine.py --minutes 20 --repeat 3 [--skip-legacy]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.break_engine import BreakEngine
+
+SAMPLE_RATE = 44100
+
+
+def synthesize_recording(path: str, minutes: float, seed: int = 7):
+    """Writes a mono 16-bit WAV of noise 'syllables' with a long pause roughly every minute."""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * SAMPLE_RATE)
+    t = np.arange(total) / SAMPLE_RATE
+    syllables = 0.5 * (1 + np.sin(2 * np.pi * 4.0 * t))  # ~4 syllables/s
+    signal = rng.normal(0, 0.2, total) * syllables
+    pos = 0
+    while pos < total:
+        pos += int(rng.uniform(45, 75) * SAMPLE_RATE)
+        gap = int(rng.uniform(1.6, 3.0) * SAMPLE_RATE)
+        signal[pos:pos + gap] *= 0.001
+        # Short breath pauses that should *not* become breaks.
+        for _ in range(10):
+            p = int(rng.uniform(0, total - SAMPLE_RATE))
+            signal[p:p + int(0.4 * SAMPLE_RATE)] *= 0.001
+    pcm = (np.clip(signal, -1, 1) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1); wf.setsampwidth(2); wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(pcm.tobytes())
+
+
+def timed(fn, repeat: int):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--minutes', type=float, default=10.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-legacy', action='store_true', help="pydub's detect_silence is very slow on long files")
+    args = parser.parse_args()
+
+    settings = {'silence_threshold': -40, 'min_silence_len': 1500}
+    with tempfile.TemporaryDirectory() as work_dir:
+        audio_path = os.path.join(work_dir, 'synthetic.wav')
+        synthesize_recording(audio_path, args.minutes)
+        cache_dir = os.path.join(work_dir, 'cache')
+        os.makedirs(cache_dir)
+        rows = []
+
+        if not args.skip_legacy:
+            from pydub import AudioSegment
+            from pydub.silence import detect_silence
+
+            def legacy():
+                audio = AudioSegment.from_file(audio_path)
+                return detect_silence(audio, min_silence_len=1500, silence_thresh=-40)
+            elapsed, silences = timed(legacy, args.repeat)
+            rows.append(('legacy pydub decode + detect_silence', elapsed, len(silences)))
+
+        def cold():
+            for name in os.listdir(cache_dir):
+                os.remove(os.path.join(cache_dir, name))
+            return BreakEngine(cache_dir=cache_dir).detect_file(audio_path, settings)
+        elapsed, breaks = timed(cold, args.repeat)
+        rows.append(('engine cold (decode + analyze + detect)', elapsed, len(breaks)))
+
+        elapsed, breaks = timed(lambda: BreakEngine(cache_dir=cache_dir).detect_file(audio_path, settings), args.repeat)
+        rows.append(('engine warm (disk analysis cache)', elapsed, len(breaks)))
+
+        engine = BreakEngine(cache_dir=cache_dir)
+        analysis = engine.analyze(audio_path)
+        retuned = dict(settings, silence_threshold=-45, min_silence_len=1200)
+        elapsed, breaks = timed(lambda: engine.detect(analysis, retuned), args.repeat)
+        rows.append(('engine re-detect (new sliders, in memory)', elapsed, len(breaks)))
+
+    print(f"\nBreak engine benchmark: {args.minutes:.1f} min synthetic recording, best of {args.repeat}")
+    print(f"{'case':<45}{'seconds':>10}{'breaks':>8}")
+    for name, elapsed, count in rows:
+        print(f"{name:<45}{elapsed:>10.3f}{count:>8}")
+
+
+if __name__ == '__main__':
+    main()
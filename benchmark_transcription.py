@@ -0,0 +1,190 @@
+"""
+Realtime-factor benchmark for the transcription engines.
+
+Builds a small synthetic speech corpus with espeak-ng (or espeak), concatenates it into
+one recording with pauses between sentences and stretches of dead air, and transcribes
+it with each engine configuration (with and without the energy VAD gate). Reports model load time, transcription time, realtime factor
+(RTF = processing seconds / audio seconds; lower is faster) and word error rate against
+the known script. Engines whose package is not installed are skipped.
+
+Usage: python benchmark_transcription.py --model base --minutes 5 --threads 4 [--beam-size 1]
+
+With --workers 1,2,4,8 it instead measures parallel chunked transcription
+(app/utils/parallel_transcription.py): wall-clock time, speedup over one worker and
+parallel efficiency for each worker count, e.g.
+
+    python benchmark_transcription.py --minutes 60 --workers 1,2,4,8 --chunk-min 300 --chunk-max 600
+"""
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.break_engine import ANALYSIS_SAMPLE_RATE, AudioAnalysis
+from app.utils.parallel_transcription import transcribe_parallel
+from app.utils.transcription_engine import get_transcription_engine, normalize_transcription_settings
+from app.utils.vad import transcribe_speech
+
+SENTENCES = [
+    "Welcome back to the show, today we are talking about science fiction movies.",
+    "The first film on our list was released in nineteen eighty two.",
+    "It was not a hit at the box office, but it found its audience on home video.",
+    "We will take a short break and then come back with listener questions.",
+    "Our producer asked whether the sequel was better than the original.",
+    "Honestly, I think the soundtrack carries most of the second half.",
+    "Let us know what you think by sending us a message on the website.",
+    "Next week we are reviewing three horror movies from the seventies.",
+]
+
+
+def _tts_binary():
+    for name in ('espeak-ng', 'espeak'):
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def _read_wav_16k(path: str) -> np.ndarray:
+    with wave.open(path, 'rb') as wf:
+        rate = wf.getframerate()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype='<i2').astype(np.float32) / 32768.0
+    if rate != ANALYSIS_SAMPLE_RATE:
+        positions = np.arange(0, len(pcm), rate / ANALYSIS_SAMPLE_RATE)
+        pcm = np.interp(positions, np.arange(len(pcm)), pcm).astype(np.float32)
+    return pcm
+
+
+def synthesize_corpus(work_dir: str, minutes: float):
+    """Returns (16 kHz float32 samples, reference text) of roughly `minutes` of speech."""
+    binary = _tts_binary()
+    if binary is None:
+        raise SystemExit("espeak-ng (or espeak) is required to synthesize the speech corpus.")
+    clips = []
+    for i, sentence in enumerate(SENTENCES):
+        path = os.path.join(work_dir, f"sentence_{i}.wav")
+        subprocess.run([binary, '-s', '160', '-w', path, sentence], check=True, capture_output=True)
+        clips.append(_read_wav_16k(path))
+
+    pause = np.zeros(int(0.6 * ANALYSIS_SAMPLE_RATE), dtype=np.float32)
+    rng = np.random.default_rng(7)
+    dead_air = (rng.normal(0, 0.001, int(8 * ANALYSIS_SAMPLE_RATE))).astype(np.float32)
+    target = int(minutes * 60 * ANALYSIS_SAMPLE_RATE)
+    pieces, words, length, i = [], [], 0, 0
+    while length < target:
+        clip = clips[i % len(clips)]
+        gap = dead_air if i % 6 == 5 else pause
+        pieces.extend((clip, gap))
+        words.append(SENTENCES[i % len(SENTENCES)])
+        length += len(clip) + len(gap)
+        i += 1
+    return np.concatenate(pieces), ' '.join(words)
+
+
+def _tokens(text: str):
+    return re.findall(r"[a-z']+", text.lower())
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = _tokens(reference), _tokens(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / max(1, len(ref))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--minutes', type=float, default=5.0)
+    parser.add_argument('--threads', type=int, default=0, help='CPU threads (0 = library default)')
+    parser.add_argument('--beam-size', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--workers', help='comma-separated worker counts: benchmark parallel chunked transcription')
+    parser.add_argument('--engine', default='faster-whisper', help='engine for the --workers benchmark')
+    parser.add_argument('--chunk-min', type=float, default=300.0)
+    parser.add_argument('--chunk-max', type=float, default=600.0)
+    args = parser.parse_args()
+    if args.workers:
+        return scaling_benchmark(args)
+
+    configs = [
+        ('faster-whisper int8 batched', {'engine': 'faster-whisper', 'batch_size': args.batch_size, 'vad': 'none'}),
+        ('faster-whisper int8 batched + VAD', {'engine': 'faster-whisper', 'batch_size': args.batch_size}),
+        ('faster-whisper int8 sequential', {'engine': 'faster-whisper', 'batch_size': 1, 'vad': 'none'}),
+        ('faster-whisper int8 sequential + VAD', {'engine': 'faster-whisper', 'batch_size': 1}),
+        ('openai-whisper fp32', {'engine': 'openai-whisper', 'vad': 'none'}),
+        ('openai-whisper fp32 + VAD', {'engine': 'openai-whisper'}),
+    ]
+    with tempfile.TemporaryDirectory() as work_dir:
+        samples, reference = synthesize_corpus(work_dir, args.minutes)
+    audio_sec = len(samples) / ANALYSIS_SAMPLE_RATE
+    analysis = AudioAnalysis.from_samples(samples)
+
+    rows = []
+    for name, overrides in configs:
+        settings = dict(overrides, model=args.model, cpu_threads=args.threads, beam_size=args.beam_size, language='en')
+        engine = get_transcription_engine(settings)
+        try:
+            start = time.perf_counter()
+            engine.model
+            load_sec = time.perf_counter() - start
+        except ImportError as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        if engine.settings['vad'] == 'energy':
+            result = transcribe_speech(engine, analysis, engine.settings['vad_settings'])
+        else:
+            result = engine.transcribe(samples)
+        rows.append((name, load_sec, result['elapsed_sec'], result['elapsed_sec'] / audio_sec,
+                     word_error_rate(reference, result['text'])))
+
+    print(f"\nTranscription benchmark: {audio_sec / 60:.1f} min synthetic speech, model '{args.model}', "
+          f"beam {args.beam_size}, threads {args.threads or 'default'}")
+    print(f"{'engine':<38}{'load s':>8}{'run s':>9}{'RTF':>8}{'WER':>7}")
+    for name, load_sec, run_sec, rtf, wer in rows:
+        print(f"{name:<38}{load_sec:>8.1f}{run_sec:>9.1f}{rtf:>8.3f}{wer:>7.1%}")
+
+
+def scaling_benchmark(args):
+    """Wall-clock scaling of parallel chunked transcription over worker counts."""
+    worker_counts = [int(n) for n in args.workers.split(',') if n.strip()]
+    with tempfile.TemporaryDirectory() as work_dir:
+        samples, reference = synthesize_corpus(work_dir, args.minutes)
+    audio_sec = len(samples) / ANALYSIS_SAMPLE_RATE
+    analysis = AudioAnalysis.from_samples(samples)
+
+    rows = []
+    for workers in worker_counts:
+        # cpu_threads 0 lets each run split the machine's cores between its workers.
+        settings = normalize_transcription_settings({
+            'engine': args.engine, 'model': args.model, 'beam_size': args.beam_size, 'batch_size': args.batch_size,
+            'cpu_threads': args.threads, 'language': 'en', 'workers': workers,
+            'chunk_min_sec': args.chunk_min, 'chunk_max_sec': args.chunk_max})
+        result = transcribe_parallel(analysis, settings)
+        rows.append((workers, result['chunks'], result['elapsed_sec'], word_error_rate(reference, result['text'])))
+
+    print(f"\nParallel transcription scaling: {audio_sec / 60:.1f} min synthetic speech, {args.engine} '{args.model}', "
+          f"chunks {args.chunk_min:.0f}-{args.chunk_max:.0f}s, {os.cpu_count()} CPU(s)")
+    print(f"{'workers':>8}{'chunks':>8}{'wall s':>9}{'RTF':>8}{'speedup':>9}{'effic.':>8}{'WER':>7}")
+    base_workers, base_wall = (rows[0][0], rows[0][2]) if rows else (1, 0.0)  # speedup is relative to the first count
+    for workers, chunks, wall, wer in rows:
+        speedup = base_wall / wall if wall else 0.0
+        efficiency = speedup * base_workers / workers
+        print(f"{workers:>8}{chunks:>8}{wall:>9.1f}{wall / audio_sec:>8.3f}{speedup:>8.2f}x{efficiency:>8.0%}{wer:>7.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,7 @@ class Config:
     TEMPLATES_FOLDER = os.path.join(basedir, 'app', 'templates')
     COVER_ART_FOLDER = os.path.join(basedir, 'app', 'static', 'assets', 'cover_art')
     ALLOWED_EXTENSIONS = {'mp3', 'wav', 'm4a'}
-    ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     MAX_CONTENT_LENGTH = 1 * 1024 * 1024 * 1024  # 1 GB upload limit
 
     # Google Cloud Storage bucket name
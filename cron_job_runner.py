@@ -1,8 +1,11 @@
+import argparse
+import contextvars
 import logging
 import subprocess
 import sys
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the parent directory to sys.path to allow imports from sibling modules
 # This assumes cron_job_runner.py is in the same directory as db_manager.py
@@ -66,5 +69,68 @@ def main():
 
     logger.info("Cron job runner finished.")
 
+def _warm_asr_models(preload_specs):
+    """Loads (or touches) the preloaded models in this process so the jobs it runs find them warm."""
+    from app.utils.transcription_engine import get_transcription_engine
+    for spec in preload_specs:
+        engine_name, _, model_name = spec.partition(':')
+        try:
+            get_transcription_engine({'engine': engine_name, 'model': model_name or 'base'}).model
+        except Exception as e:
+            logger.error(f"Could not preload ASR model '{spec}': {e}")
+
+def run_worker(poll_interval, concurrency, preload_specs):
+    """
+    Long-lived worker: keeps the ASR models loaded in this process and runs each pending
+    job on one of `concurrency` threads here, so every job uses the already-loaded model.
+    Jobs are not forked: the ASR runtimes' thread pools do not survive a fork. Preloaded
+    models are unloaded after the pool's idle timeout and reloaded when jobs return.
+    """
+    import run_podcast_job
+    from app.utils.asr_model_pool import get_asr_model_pool
+
+    db_manager.init_db()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='podcast-job')
+    running = {}
+    logger.info(f"Worker started (pid {os.getpid()}, concurrency {concurrency}, preload {preload_specs or 'none'}).")
+    _warm_asr_models(preload_specs)
+
+    while True:
+        for job_id, future in list(running.items()):
+            if future.done():
+                error = future.exception()
+                if error is not None:
+                    logger.error(f"Job {job_id} raised outside its own error handling: {error}")
+                else:
+                    logger.info(f"Job {job_id} finished.")
+                del running[job_id]
+
+        pending_job_ids = [job_id for job_id in get_pending_jobs() if job_id not in running]
+        free_slots = concurrency - len(running)
+        if pending_job_ids and free_slots > 0:
+            _warm_asr_models(preload_specs)
+            for job_id in pending_job_ids[:free_slots]:
+                logger.info(f"Processing job ID: {job_id}")
+                # A fresh context per job keeps its job id and enrichment stage to itself.
+                running[job_id] = executor.submit(contextvars.copy_context().run, run_podcast_job.run_job, job_id)
+        elif not running:
+            get_asr_model_pool().unload_idle()
+
+        time.sleep(poll_interval)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run pending podcast jobs.")
+    parser.add_argument("--worker", action="store_true",
+                        help="Stay running, keep ASR models warm and run jobs on threads of this process")
+    parser.add_argument("--poll-interval", type=float, default=15.0, help="Seconds between checks for pending jobs (worker mode)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Jobs run at the same time (worker mode)")
+    parser.add_argument("--preload", action="append",
+                        help="engine:model to load before running jobs, e.g. faster-whisper:small (repeatable; "
+                             "defaults to $ASR_PRELOAD_MODELS or faster-whisper:base)")
+    args = parser.parse_args()
+    if args.worker:
+        preload_specs = args.preload if args.preload is not None else [
+            spec.strip() for spec in os.environ.get('ASR_PRELOAD_MODELS', 'faster-whisper:base').split(',') if spec.strip()]
+        run_worker(args.poll_interval, max(1, args.concurrency), preload_specs)
+    else:
+        main()
\ No newline at end of file
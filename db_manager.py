@@ -382,4 +382,12 @@ try:
     db_api_settings.IS_CLOUD_ENV = IS_CLOUD_ENV
     logger.info("Injected database dependencies into db_api_settings module.")
 except ImportError:
-    logger.warning("db_api_settings module not found. Skipping dependency injection.")
\ No newline at end of file
+    logger.warning("db_api_settings module not found. Skipping dependency injection.")
+
+try:
+    import db_transcript_search
+    db_transcript_search.managed_db_connection = managed_db_connection
+    db_transcript_search.IS_CLOUD_ENV = IS_CLOUD_ENV
+    logger.info("Injected database dependencies into db_transcript_search module.")
+except ImportError:
+    logger.warning("db_transcript_search module not found. Skipping dependency injection.")
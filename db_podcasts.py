@@ -59,6 +59,17 @@ def get_all_podcast_projects() -> List[Dict[str, Any]]:
         logger.error(f"Database error fetching all podcast projects: {e}")
     return projects
 
+def is_cover_art_in_use(cover_art_path: str, exclude_podcast_id: Optional[int] = None) -> bool:
+    """Whether any podcast project (other than `exclude_podcast_id`) uses this cover art name. True on errors."""
+    try:
+        with managed_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM podcasts WHERE default_cover_art_path = %s AND id <> %s LIMIT 1",
+                           (cover_art_path, exclude_podcast_id if exclude_podcast_id is not None else -1))
+            return cursor.fetchone() is not None
+    except psycopg2.Error as e:
+        logger.error(f"Database error checking cover art '{cover_art_path}': {e}")
+        return True
+
 def update_podcast_project(podcast_id: int, title: Optional[str] = None, author: Optional[str] = None,
                            description: Optional[str] = None, default_cover_art_path: Optional[str] = None,
                            default_template_path: Optional[str] = None,
@@ -0,0 +1,209 @@
+"""
+Full-text search over episode transcripts.
+
+Each indexed episode is one row in `transcript_documents` plus its transcript split into
+short timed segments (a few sentences each), so a hit points at a moment in the episode.
+Local mode uses an SQLite FTS5 table (bm25 ranking); in the cloud the segments live in
+PostgreSQL with a generated tsvector column behind a GIN index (ts_rank ranking).
+"""
+import logging
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.utils.transcript_formats import iter_cues, vtt_timestamp
+
+logger = logging.getLogger(__name__)
+
+# These will be injected from db_manager.py
+managed_db_connection = None
+IS_CLOUD_ENV = None
+
+# Long enough that phrases rarely straddle two segments, short enough to give a useful timestamp.
+SEARCH_SEGMENT = {'max_chars': 240, 'max_duration_ms': 15000, 'max_gap_ms': 2000}
+PG_TEXT_SEARCH_CONFIG = 'english'
+MARK_START, MARK_END = '<mark>', '</mark>'
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _ph() -> str:
+    return '%s' if IS_CLOUD_ENV else '?'
+
+
+def ensure_search_schema():
+    """Creates the search tables (and indexes) once per process."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        with managed_db_connection() as conn:
+            cursor = conn.cursor()
+            if IS_CLOUD_ENV:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS transcript_documents (
+                        id SERIAL PRIMARY KEY,
+                        episode_ref TEXT UNIQUE NOT NULL,
+                        episode_number VARCHAR(20),
+                        episode_topic TEXT,
+                        word_count INTEGER,
+                        indexed_at TIMESTAMPTZ DEFAULT NOW()
+                    )
+                """)
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS transcript_segments (
+                        id BIGSERIAL PRIMARY KEY,
+                        document_id INTEGER NOT NULL REFERENCES transcript_documents(id) ON DELETE CASCADE,
+                        start_ms INTEGER NOT NULL,
+                        end_ms INTEGER NOT NULL,
+                        text TEXT NOT NULL,
+                        tsv tsvector GENERATED ALWAYS AS (to_tsvector('{PG_TEXT_SEARCH_CONFIG}', text)) STORED
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS transcript_segments_tsv_idx ON transcript_segments USING GIN (tsv)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS transcript_segments_document_idx ON transcript_segments (document_id)")
+            else:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS transcript_documents (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        episode_ref TEXT UNIQUE NOT NULL,
+                        episode_number TEXT,
+                        episode_topic TEXT,
+                        word_count INTEGER,
+                        indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                cursor.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS transcript_segments_fts USING fts5(
+                        text,
+                        document_id UNINDEXED,
+                        start_ms UNINDEXED,
+                        end_ms UNINDEXED,
+                        tokenize = 'unicode61 remove_diacritics 2'
+                    )
+                """)
+            conn.commit()
+        _schema_ready = True
+        logger.info("Transcript search schema checked/created.")
+
+
+def transcript_segments(words: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Word-level transcript ({'word', 'start', 'end'} in seconds) -> searchable timed segments."""
+    return [{'start_ms': int(cue['start_ms']), 'end_ms': int(cue['end_ms']), 'text': cue['text']}
+            for cue in iter_cues(words, **SEARCH_SEGMENT)]
+
+
+def index_episode_transcript(episode_ref: str, words: List[Dict[str, Any]],
+                             episode_number: Optional[str] = None, episode_topic: Optional[str] = None) -> int:
+    """
+    (Re)indexes one episode's transcript. `episode_ref` identifies the episode (its processed
+    MP3 path, as stored in `episodes.processed_mp3_path`). Returns the number of segments indexed.
+    """
+    ensure_search_schema()
+    segments = transcript_segments(words)
+    p = _ph()
+    with managed_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            INSERT INTO transcript_documents (episode_ref, episode_number, episode_topic, word_count)
+            VALUES ({p}, {p}, {p}, {p})
+            ON CONFLICT (episode_ref) DO UPDATE SET
+                episode_number = excluded.episode_number,
+                episode_topic = excluded.episode_topic,
+                word_count = excluded.word_count
+        """, (episode_ref, episode_number, episode_topic, len(words)))
+        cursor.execute(f"SELECT id FROM transcript_documents WHERE episode_ref = {p}", (episode_ref,))
+        document_id = cursor.fetchone()[0]
+        rows = [(document_id, s['start_ms'], s['end_ms'], s['text']) for s in segments]
+        if IS_CLOUD_ENV:
+            cursor.execute("DELETE FROM transcript_segments WHERE document_id = %s", (document_id,))
+            cursor.executemany("INSERT INTO transcript_segments (document_id, start_ms, end_ms, text) VALUES (%s, %s, %s, %s)", rows)
+        else:
+            cursor.execute("DELETE FROM transcript_segments_fts WHERE document_id = ?", (document_id,))
+            cursor.executemany("INSERT INTO transcript_segments_fts (document_id, start_ms, end_ms, text) VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+    logger.info(f"Indexed {len(segments)} transcript segment(s) ({len(words)} words) for '{episode_ref}'.")
+    return len(segments)
+
+
+def is_indexed(episode_ref: str) -> bool:
+    ensure_search_schema()
+    with managed_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT 1 FROM transcript_documents WHERE episode_ref = {_ph()}", (episode_ref,))
+        return cursor.fetchone() is not None
+
+
+def remove_episode_transcript(episode_ref: str) -> bool:
+    """Drops an episode from the index."""
+    ensure_search_schema()
+    p = _ph()
+    with managed_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT id FROM transcript_documents WHERE episode_ref = {p}", (episode_ref,))
+        row = cursor.fetchone()
+        if not row:
+            return False
+        if not IS_CLOUD_ENV:  # FTS5 tables take no foreign keys, so no cascade
+            cursor.execute("DELETE FROM transcript_segments_fts WHERE document_id = ?", (row[0],))
+        cursor.execute(f"DELETE FROM transcript_documents WHERE id = {p}", (row[0],))
+        conn.commit()
+        return True
+
+
+def _fts5_query(query: str) -> str:
+    """User text -> FTS5 query: every word or "quoted phrase" must match; FTS syntax is neutralized."""
+    terms = []
+    for phrase, word in re.findall(r'"([^"]+)"|(\S+)', query):
+        term = (phrase or word).replace('"', '""').strip()
+        if term:
+            terms.append(f'"{term}"')
+    return ' '.join(terms)
+
+
+def search_transcripts(query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Segments matching `query` (words must all occur; "quoted phrases" match exactly), best
+    first: [{'episode_ref', 'episode_number', 'episode_topic', 'start_ms', 'end_ms',
+    'timestamp', 'snippet', 'score'}]. Matches in `snippet` are wrapped in <mark>.
+    """
+    ensure_search_schema()
+    if not query or not query.strip():
+        return []
+    with managed_db_connection() as conn:
+        cursor = conn.cursor()
+        if IS_CLOUD_ENV:
+            cursor.execute(f"""
+                SELECT d.episode_ref, d.episode_number, d.episode_topic, s.start_ms, s.end_ms,
+                       ts_headline('{PG_TEXT_SEARCH_CONFIG}', s.text, q,
+                                   'StartSel={MARK_START}, StopSel={MARK_END}, HighlightAll=true'),
+                       ts_rank(s.tsv, q) AS score
+                FROM transcript_segments s
+                JOIN transcript_documents d ON d.id = s.document_id,
+                     websearch_to_tsquery('{PG_TEXT_SEARCH_CONFIG}', %s) q
+                WHERE s.tsv @@ q
+                ORDER BY score DESC, d.id, s.start_ms
+                LIMIT %s
+            """, (query, limit))
+        else:
+            fts_query = _fts5_query(query)
+            if not fts_query:
+                return []
+            cursor.execute(f"""
+                SELECT d.episode_ref, d.episode_number, d.episode_topic, f.start_ms, f.end_ms,
+                       highlight(transcript_segments_fts, 0, '{MARK_START}', '{MARK_END}'),
+                       -bm25(transcript_segments_fts) AS score
+                FROM transcript_segments_fts f
+                JOIN transcript_documents d ON d.id = f.document_id
+                WHERE transcript_segments_fts MATCH ?
+                ORDER BY bm25(transcript_segments_fts), d.id, f.start_ms
+                LIMIT ?
+            """, (fts_query, limit))
+        rows = cursor.fetchall()
+    return [{'episode_ref': ref, 'episode_number': number, 'episode_topic': topic,
+             'start_ms': int(start_ms), 'end_ms': int(end_ms), 'timestamp': vtt_timestamp(start_ms)[:8],
+             'snippet': snippet, 'score': round(float(score), 6)}
+            for ref, number, topic, start_ms, end_ms, snippet, score in rows]
@@ -69,21 +69,22 @@ def generate_signed_url(blob_name: str, expiration_minutes: int = 60) -> Optiona
 
 def delete_gcs_blob(blob_name: str) -> bool:
     """Deletes a blob from the GCS bucket."""
-    if not GCS_BUCKET_NAME:
+    bucket_name = _bucket_name()
+    if not bucket_name:
         logger.error("GCS_BUCKET_NAME is not configured. Cannot delete blob.")
         return False
     
     try:
         client = _get_gcs_client()
-        bucket = client.bucket(GCS_BUCKET_NAME)
+        bucket = client.bucket(bucket_name)
         blob = bucket.blob(blob_name)
         
         if blob.exists():
-            logger.info(f"Deleting blob 'gs://{GCS_BUCKET_NAME}/{blob_name}'...")
+            logger.info(f"Deleting blob 'gs://{bucket_name}/{blob_name}'...")
             blob.delete()
             logger.info("Deletion successful.")
         else:
-            logger.warning(f"Blob 'gs://{GCS_BUCKET_NAME}/{blob_name}' not found for deletion.")
+            logger.warning(f"Blob 'gs://{bucket_name}/{blob_name}' not found for deletion.")
         return True
     except Exception as e:
         logger.error(f"Failed to delete blob {blob_name} from GCS: {e}", exc_info=True)
@@ -115,4 +116,64 @@ def download_gcs_blob(source_blob_name: str, destination_file_path: str) -> bool
         return True
     except Exception as e:
         logger.error(f"Failed to download blob {source_blob_name} from GCS: {e}", exc_info=True)
-        return False
\ No newline at end of file
+        return False
+
+def open_blob_writer(destination_blob_name: str, content_type: str = 'text/plain',
+                     chunk_size: Optional[int] = None):
+    """
+    Opens a GCS object for streaming text writes (a resumable upload that sends each chunk
+    as soon as it is full). Returns the file-like writer, or None if it cannot be opened.
+    Job processes do not run the app's config, so the bucket falls back to GCS_BUCKET_NAME
+    from the environment.
+    """
+    bucket_name = _bucket_name()
+    if not bucket_name:
+        logger.error("GCS_BUCKET_NAME is not configured. Cannot open blob for writing.")
+        return None
+
+    try:
+        client = _get_gcs_client()
+        blob = client.bucket(bucket_name).blob(destination_blob_name)
+        # Resumable chunks must be multiples of 256 KiB.
+        chunk_size = chunk_size or 4 * 256 * 1024
+        logger.info(f"Streaming to 'gs://{bucket_name}/{destination_blob_name}' in {chunk_size // 1024} KiB chunks...")
+        return blob.open('w', content_type=content_type, chunk_size=chunk_size)
+    except Exception as e:
+        logger.error(f"Failed to open blob {destination_blob_name} for writing: {e}", exc_info=True)
+        return None
+
+def _bucket_name() -> Optional[str]:
+    return GCS_BUCKET_NAME or os.environ.get('GCS_BUCKET_NAME')
+
+def download_blob_bytes(source_blob_name: str) -> Optional[bytes]:
+    """
+    Returns the contents of a (small) GCS object, or None if it does not exist or cannot be
+    read. A missing object is an expected outcome for cache lookups and is not logged as an error.
+    """
+    bucket_name = _bucket_name()
+    if not bucket_name:
+        return None
+
+    try:
+        blob = _get_gcs_client().bucket(bucket_name).blob(source_blob_name)
+        return blob.download_as_bytes()
+    except Exception as e:
+        if type(e).__name__ == 'NotFound':
+            return None
+        logger.error(f"Failed to download blob {source_blob_name} from GCS: {e}", exc_info=True)
+        return None
+
+def upload_blob_bytes(destination_blob_name: str, data: bytes, content_type: str = 'application/octet-stream') -> bool:
+    """Uploads `data` as a GCS object. Returns True on success."""
+    bucket_name = _bucket_name()
+    if not bucket_name:
+        logger.error("GCS_BUCKET_NAME is not configured. Cannot upload bytes.")
+        return False
+
+    try:
+        blob = _get_gcs_client().bucket(bucket_name).blob(destination_blob_name)
+        blob.upload_from_string(data, content_type=content_type)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to upload bytes to {destination_blob_name} in GCS: {e}", exc_info=True)
+        return False
@@ -1,8 +1,12 @@
 import argparse
+import contextvars
+import json
 import logging
 import os
 import sys
 import re
+import threading
+from concurrent.futures import Future
 from typing import Optional, Tuple, List, Any
 from datetime import datetime
 import time
@@ -14,8 +18,17 @@ _SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(_SCRIPT_DIR)
 
 import db_manager
+import db_transcript_search
 import gcs_utils # Import the GCS utility
 from enhanced_audio_processor import EnhancedAudioProcessor
+from app.utils.break_engine import AudioAnalysis, get_break_engine, job_break_settings
+from app.utils.enrichment import EnrichmentStage
+from app.utils.external_api_clients import ElevenLabsClient, GeminiClient, OMDbClient
+from app.utils.image_pipeline import get_image_pipeline, variant_name
+from app.utils.timeline_planner import plan_timeline_for_job
+from app.utils.time_map import edits_from_timed_events, remap_transcript
+from app.utils.transcript_writers import open_transcript_writers
+from app.utils.transcription_engine import transcribe_file
 from podcast_template import PodcastTemplate
 
 # Set up logging
@@ -23,6 +36,10 @@ from podcast_template import PodcastTemplate
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stdout)
 logger = logging.getLogger(__name__)
 
+# The job whose code is running in the current context. The worker (cron_job_runner.py --worker)
+# runs several jobs on threads of one process, and every job adds its handler to the root logger.
+_current_job_id: contextvars.ContextVar = contextvars.ContextVar('current_job_id', default=None)
+
 # Custom logging handler to write logs to the database for a specific job
 class DatabaseLogHandler(logging.Handler):
     """A logging handler that writes logs to the database."""
@@ -30,6 +47,11 @@ class DatabaseLogHandler(logging.Handler):
         super().__init__() # Call parent constructor
         self.job_id = job_id
 
+    def filter(self, record):
+        # Skip records from other jobs' threads; records from shared threads (no job context) go to every job.
+        job_id = _current_job_id.get()
+        return (job_id is None or job_id == self.job_id) and super().filter(record)
+
     def emit(self, record):
         # Use db_manager to add the log entry
         db_manager.add_job_log(self.job_id, record.levelname, self.format(record))
@@ -84,47 +106,29 @@ def parse_details_from_path_fallback(filepath: str) -> Tuple[Optional[str], Opti
         logger.error(f"Error parsing recording details from path '{filepath}': {e}", exc_info=True)
         return None, None
 
-def analyze_audio_for_commercial_breaks(audio_file_path: str, commercial_settings: dict) -> Any:
+def analyze_audio_for_commercial_breaks(recording_analysis: AudioAnalysis, commercial_settings: dict) -> Any:
     """
-    Analyzes an audio file to identify potential commercial break locations.
+    Identifies potential commercial break locations in an already analyzed recording.
 
     Args:
-        audio_file_path: The path to the audio file.
+        recording_analysis: The shared AudioAnalysis of the recording (see app.utils.break_engine).
         commercial_settings: A dictionary containing the settings for commercial break analysis.
+                             The job's 'commercial_breaks_*' keys are mapped onto the engine schema.
 
     Returns:
-        A list of potential commercial break locations, or None if an error occurs.  The
-        exact format of this return will depend on the underlying implementation in EnhancedAudioProcessor.
+        A list of break dicts ('time_ms', 'start_ms', 'end_ms', 'sources', ...), or None if
+        analysis is disabled or an error occurs.
     """
     try:
-        processor = EnhancedAudioProcessor()  # You might need to adjust instantiation if constructor requires params
-
-        # Extract commercial break parameters from the settings dictionary
-        commercial_breaks_enabled = commercial_settings.get('commercial_breaks_enabled', False)
-        commercial_breaks_count = commercial_settings.get('commercial_breaks_count', 2)
-        commercial_breaks_min_duration_between_sec = commercial_settings.get('commercial_breaks_min_duration_between_sec', 600)
-        commercial_breaks_max_duration_between_sec = commercial_settings.get('commercial_breaks_max_duration_between_sec', 1200)
-        commercial_breaks_min_silence_ms = commercial_settings.get('commercial_breaks_min_silence_ms', 500)
-        commercial_breaks_cue_phrases = commercial_settings.get('commercial_breaks_cue_phrases', "")
-        commercial_breaks_audio_keys = commercial_settings.get('commercial_breaks_audio_keys', "")
-
-        if not commercial_breaks_enabled:
+        if not commercial_settings.get('commercial_breaks_enabled', False):
             logger.info("Commercial break analysis is disabled.")
             return None
 
-        logger.info(f"Analyzing audio file '{audio_file_path}' for commercial breaks.")
-        commercial_break_locations = processor.find_commercial_break_locations(
-            audio_file_path,
-            commercial_breaks_count=commercial_breaks_count,
-            commercial_breaks_min_duration_between_sec=commercial_breaks_min_duration_between_sec,
-            commercial_breaks_max_duration_between_sec=commercial_breaks_max_duration_between_sec,
-            commercial_breaks_min_silence_ms=commercial_breaks_min_silence_ms,
-            commercial_breaks_cue_phrases=commercial_breaks_cue_phrases,
-            commercial_breaks_audio_keys=commercial_breaks_audio_keys
-        )
+        logger.info(f"Analyzing '{recording_analysis.source_path}' for commercial breaks.")
+        commercial_break_locations = get_break_engine().detect(recording_analysis, job_break_settings(commercial_settings))
 
         if commercial_break_locations:
-            logger.info(f"Found commercial break locations: {commercial_break_locations}")
+            logger.info(f"Found commercial break locations (s): {[brk['time_sec'] for brk in commercial_break_locations]}")
         else:
             logger.info("No commercial break locations found.")
 
@@ -135,6 +139,85 @@ def analyze_audio_for_commercial_breaks(audio_file_path: str, commercial_setting
         return None
 
 
+LIVE_TRANSCRIPT_SUFFIX = '.recording'
+
+
+def _transcripts_gcs_prefix(output_path_prefix: str) -> Optional[str]:
+    """GCS object prefix for transcripts when TRANSCRIPTS_GCS_PREFIX is set (e.g. 'transcripts')."""
+    gcs_root = os.environ.get('TRANSCRIPTS_GCS_PREFIX')
+    return f"{gcs_root.rstrip('/')}/{os.path.basename(output_path_prefix)}" if gcs_root else None
+
+
+# One transcription per output prefix at a time: the show-notes task transcribes in the background
+# while the cue-phrase detection or the final transcripts may ask for the same recording.
+_transcriptions: dict = {}
+_transcriptions_lock = threading.Lock()
+
+
+def transcribe_recording(recording_path: str, template: PodcastTemplate, output_path_prefix: str) -> dict:
+    """
+    Transcribes the recording, streaming a WebVTT of it (recording timeline) to
+    `<prefix>.recording.vtt` as segments are decoded, so the admin UI can follow a long
+    transcription. Served from the transcript cache when possible. A call made while
+    another thread is transcribing the same recording waits for that result.
+    """
+    live_prefix = output_path_prefix + LIVE_TRANSCRIPT_SUFFIX
+    with _transcriptions_lock:
+        in_flight = _transcriptions.get(live_prefix)
+        if in_flight is None:
+            _transcriptions[live_prefix] = future = Future()
+    if in_flight is not None:
+        logger.info("Waiting for the transcription already running for this recording.")
+        return in_flight.result()
+
+    try:
+        if os.path.exists(f"{live_prefix}.vtt"):
+            result = transcribe_file(recording_path, template.transcription)
+        else:
+            with open_transcript_writers(live_prefix, formats=('vtt',), flush_bytes=4096) as live:
+                result = transcribe_file(recording_path, template.transcription, on_words=live)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _transcriptions_lock:
+            _transcriptions.pop(live_prefix, None)
+
+
+def write_final_transcripts(job_details: dict, recording_path: str, template: PodcastTemplate,
+                            output_path_prefix: str, timed_events: Optional[list] = None,
+                            final_duration_ms: Optional[int] = None) -> List[str]:
+    """
+    Writes SRT/VTT/text/JSON transcripts of the final episode without transcribing it: the
+    (cached) transcript of the original recording is remapped through the planned edits
+    (intro offset, pause/filler/stop-word cuts, commercials inserted at breaks). If the
+    processor's `timed_events` carry an edit list (see edits_from_timed_events), that is
+    used instead; the processor does not report one yet.
+    The files are written incrementally (and streamed to GCS when TRANSCRIPTS_GCS_PREFIX
+    is set), and the episode is added to the transcript search index. Returns the written paths.
+    """
+    transcript = transcribe_recording(recording_path, template, output_path_prefix)
+    plan = plan_timeline_for_job(job_details, _SCRIPT_DIR, transcript_words=transcript['words'])
+    edits = edits_from_timed_events(timed_events)
+    words = remap_transcript(transcript['words'], plan, edits)
+    formats = ('srt', 'vtt', 'txt', 'json')
+    with open_transcript_writers(output_path_prefix, formats, gcs_blob_prefix=_transcripts_gcs_prefix(output_path_prefix),
+                                 language=transcript.get('language'),
+                                 duration_ms=final_duration_ms or plan['final_duration_ms']) as writers:
+        writers.add_words(words)
+    paths = [f"{output_path_prefix}.{fmt}" for fmt in formats]
+    logger.info(f"Wrote final-episode transcripts ({len(words)} words remapped through the "
+                f"{'applied' if edits is not None else 'planned'} edits, no second ASR pass): {paths}")
+    try:
+        db_transcript_search.index_episode_transcript(f"{output_path_prefix}.mp3", words,
+                                                      episode_number=job_details.get('episode_number'),
+                                                      episode_topic=job_details.get('episode_topic'))
+    except Exception as e:
+        logger.error(f"Could not index the transcript for search: {e}", exc_info=True)
+    return paths
+
 def run_job(job_id: int):
     # Add the database handler to the root logger. All loggers inherit from it.
     db_log_handler = DatabaseLogHandler(job_id=job_id)
@@ -142,6 +225,8 @@ def run_job(job_id: int):
     db_log_handler.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
     root_logger = logging.getLogger()
     root_logger.addHandler(db_log_handler)
+    job_context_token = _current_job_id.set(job_id)
+    enrichment = None
     
     try:
         logger.info(f"Attempting to run job ID: {job_id}")
@@ -406,8 +491,46 @@ def run_job(job_id: int):
             # Get podcast-specific timezone for Spreaker client
             podcast_specific_timezone = podcast_project_details.get('default_publish_timezone') if podcast_project_details else None
 
+            # --- Enrichment: start the network-bound calls now, while the audio is analyzed ---
+            # The processor's own client calls with the same arguments pick up these results.
+            enrichment = EnrichmentStage(template_config.get('enrichment_timeouts_sec')).start()
+            if download_poster_val and omdb_effectively_enabled and episode_topic:
+                enrichment.prefetch(OMDbClient(omdb_key_effective).search_movie_poster, episode_topic)
+            if ai_intro_text_val and voice_id_val:
+                enrichment.prefetch(ElevenLabsClient(elevenlabs_key_effective).generate_audio, ai_intro_text_val, voice_id_val)
+
             # --- NEW: Analyze audio for commercial breaks ---
-            commercial_break_locations = analyze_audio_for_commercial_breaks(uploaded_recording_path, commercial_settings)
+            # The recording is decoded once by the shared break engine; a preview run on the same
+            # file (same content hash) has already cached the analysis, so this is usually free.
+            if commercial_settings['commercial_breaks_audio_keys']:
+                template_audio_files = podcast_template_obj.audio_files
+                commercial_settings['commercial_breaks_audio_keys'] = [
+                    template_audio_files.get(key.strip(), key.strip())
+                    for key in str(commercial_settings['commercial_breaks_audio_keys']).split(',') if key.strip()]
+            # Only decoded (or read from the analysis cache) when breaks are wanted; nothing else in the job needs it.
+            recording_analysis = None
+            commercial_break_locations = None
+            if commercial_settings['commercial_breaks_enabled']:
+                recording_analysis = get_break_engine().analyze(uploaded_recording_path)
+                if commercial_settings['commercial_breaks_cue_phrases']:
+                    # Cue-phrase detection needs words. Reruns on the same recording get them from the
+                    # transcript cache (hit/miss and hit rate are logged into this job's log).
+                    recording_analysis.words = transcribe_recording(uploaded_recording_path, podcast_template_obj, output_path_prefix)['words']
+                commercial_break_locations = analyze_audio_for_commercial_breaks(recording_analysis, commercial_settings)
+            else:
+                logger.info("Commercial break analysis is disabled.")
+
+            # Show notes need a transcript, so transcription and the Gemini call run as one background
+            # task while the audio is processed. It is only pulled forward when the job transcribes
+            # anyway, so the final transcripts later come from the transcript cache.
+            if generate_show_notes_val and use_gemini_for_summary_val and gemini_effectively_enabled and \
+                    (generate_transcript_val or (recording_analysis is not None and recording_analysis.words is not None)):
+                def show_notes_inputs():
+                    transcript_text = transcribe_recording(uploaded_recording_path, podcast_template_obj, output_path_prefix)['text']
+                    return (transcript_text, f"Episode {episode_number}", episode_topic), {}
+                enrichment.prefetch_after(show_notes_inputs,
+                                          GeminiClient(gemini_key_effective,
+                                                       fallback_summary=template_config.get('show_notes_fallback_summary')).generate_content)
 
             logger.info(f"Job {job_id}: Calling process_complex_podcast with Spreaker option: '{spreaker_publish_option_val}'")
             # Unpack all returned values correctly
@@ -463,10 +586,60 @@ def run_job(job_id: int):
                     cover_art_folder = os.path.join(_SCRIPT_DIR, 'assets', 'cover_art')
                     processed_poster_path = os.path.join(cover_art_folder, default_cover_art_filename)
                     logger.info(f"OMDb poster failed or was disabled, using default project cover art: {processed_poster_path}")
+                    upload_variant = variant_name(default_cover_art_filename, 'upload')
+                    if upload_variant:
+                        # Already processed at ingest: use its upload-size derivative as is, no re-encode.
+                        local_variant = os.path.join(cover_art_folder, upload_variant)
+                        poster_dest = f"{output_path_prefix}_poster.jpg"
+                        if os.path.exists(local_variant):
+                            processed_poster_path = local_variant
+                        elif gcs_utils.download_gcs_blob(f"assets/cover_art/{upload_variant}", poster_dest):
+                            processed_poster_path = poster_dest
+                    elif os.path.exists(processed_poster_path):
+                        # Cover art from before the image pipeline: Spreaker gets its upload-size derivative (cached).
+                        processed_poster_path = get_image_pipeline().export_variant(
+                            processed_poster_path, 'upload', f"{output_path_prefix}_poster.jpg")
 
             if final_audio:
                 output_mp3_path = f"{output_path_prefix}.mp3"
                 processor.export_audio(final_audio, output_mp3_path)
                 logger.info(f"Job {job_id} completed. Output: {output_mp3_path}. Tags generated: {generated_tags}")
-
-                # Record scheduled episode to local DB if Spreaker upload was attempted and successful (indicated by spreaker_episode_id)
\ No newline at end of file
+                if generate_transcript_val:
+                    try:
+                        write_final_transcripts(job_details, uploaded_recording_path, podcast_template_obj, output_path_prefix,
+                                                timed_events=timed_events, final_duration_ms=len(final_audio))
+                    except Exception as e:
+                        logger.error(f"Job {job_id}: could not write final transcripts: {e}", exc_info=True)
+
+                # Record scheduled episode to local DB if Spreaker upload was attempted and successful (indicated by spreaker_episode_id)
+                if resolved_spreaker_episode_id:
+                    db_manager.record_scheduled_episode(
+                        episode_number, processed_episode_topic or episode_topic, resolved_spreaker_episode_id,
+                        resolved_publish_time_utc, output_mp3_path,
+                        poster_path=processed_poster_path, show_notes_path=processed_sn_path,
+                        tags_list=generated_tags)
+                db_manager.update_job_status(job_id, "completed")
+            else:
+                logger.error(f"Job {job_id}: processing produced no audio.")
+                db_manager.update_job_status(job_id, "failed", "Processing produced no audio")
+
+        except Exception as e:
+            logger.error(f"Error processing job {job_id}: {e}", exc_info=True)
+            db_manager.update_job_status(job_id, "failed", str(e))
+
+    finally:
+        if enrichment is not None:
+            enrichment.close()  # reports the wall-clock time saved into this job's log
+        root_logger.removeHandler(db_log_handler)
+        _current_job_id.reset(job_context_token)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a single podcast processing job.")
+    parser.add_argument("job_id", type=int, help="ID of the job in the processing_jobs table")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the planned final timeline as JSON without processing any audio")
+    args = parser.parse_args()
+    if args.dry_run:
+        print(json.dumps(plan_timeline_for_job(db_manager.get_job_details(args.job_id), _SCRIPT_DIR), indent=2))
+    else:
+        run_job(args.job_id)
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(tmp_path, monkeypatch):
+    """Keeps every cache (transcripts, rate limits, breakers, metrics...) inside the test's temp dir."""
+    from app.utils import cache_utils
+    monkeypatch.setattr(cache_utils, 'CACHE_ROOT', str(tmp_path / 'cache'))
@@ -0,0 +1,68 @@
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+
+import db_transcript_search as search
+
+
+@pytest.fixture(autouse=True)
+def sqlite_db(monkeypatch):
+    conn = sqlite3.connect(':memory:')
+
+    @contextmanager
+    def managed_db_connection():
+        yield conn
+
+    monkeypatch.setattr(search, 'managed_db_connection', managed_db_connection)
+    monkeypatch.setattr(search, 'IS_CLOUD_ENV', False)
+    monkeypatch.setattr(search, '_schema_ready', False)
+    yield conn
+    conn.close()
+
+
+def spoken(text, start_sec=0.0):
+    words, t = [], start_sec
+    for token in text.split():
+        words.append({'word': token, 'start': t, 'end': t + 0.3})
+        t += 0.4
+    return words
+
+
+def test_search_finds_the_segment_and_its_timestamp():
+    words = spoken('Welcome back to the show.') + spoken('Today we talk about the Matrix sequels.', start_sec=65.0)
+    assert search.index_episode_transcript('ep1.mp3', words, episode_number='1', episode_topic='Matrix') == 2
+
+    [hit] = search.search_transcripts('matrix')
+
+    assert (hit['episode_ref'], hit['episode_number'], hit['episode_topic']) == ('ep1.mp3', '1', 'Matrix')
+    assert (hit['start_ms'], hit['timestamp']) == (65_000, '00:01:05')
+    assert '<mark>Matrix</mark>' in hit['snippet']
+
+
+def test_all_words_must_match_and_quotes_match_phrases():
+    search.index_episode_transcript('ep1.mp3', spoken('the red pill or the blue pill'))
+    search.index_episode_transcript('ep2.mp3', spoken('a pill that is red'))
+    assert {h['episode_ref'] for h in search.search_transcripts('red pill')} == {'ep1.mp3', 'ep2.mp3'}
+    assert [h['episode_ref'] for h in search.search_transcripts('"red pill"')] == ['ep1.mp3']
+    assert search.search_transcripts('red spoon') == []
+
+
+def test_fts_syntax_in_user_input_is_neutralized():
+    search.index_episode_transcript('ep1.mp3', spoken('NEAR the end OR not'))
+    assert [h['episode_ref'] for h in search.search_transcripts('near OR')] == ['ep1.mp3']
+    assert search.search_transcripts('"') == []
+    assert search.search_transcripts('   ') == []
+
+
+def test_reindexing_replaces_and_removal_drops_segments():
+    search.index_episode_transcript('ep1.mp3', spoken('first take'))
+    search.index_episode_transcript('ep1.mp3', spoken('second take'))
+    assert search.search_transcripts('first') == []
+    assert [h['episode_ref'] for h in search.search_transcripts('second')] == ['ep1.mp3']
+    assert search.is_indexed('ep1.mp3')
+
+    assert search.remove_episode_transcript('ep1.mp3')
+    assert not search.is_indexed('ep1.mp3')
+    assert search.search_transcripts('second') == []
+    assert not search.remove_episode_transcript('ep1.mp3')
@@ -0,0 +1,49 @@
+from app.utils.filler_matcher import FillerMatcher
+from app.utils.transcript_index import TranscriptIndex
+
+
+def index_of(text, low_confidence=()):
+    words = [{'word': w, 'start': float(i), 'end': i + 0.5, 'probability': 0.2 if i in low_confidence else 0.9}
+             for i, w in enumerate(text.split())]
+    return TranscriptIndex.from_words(words)
+
+
+def found(matcher, text, **kwargs):
+    return matcher.find(index_of(text, **kwargs))
+
+
+def test_multi_word_fillers_are_matched_with_punctuation_and_case_ignored():
+    matcher = FillerMatcher(['um', 'you know', 'sort of'], context_rules={})
+    assert found(matcher, 'Um, it was, you know, sort of fine') == [(0, 0, 'um'), (3, 4, 'you know'),
+                                                                   (5, 6, 'sort of')]
+
+
+def test_partial_phrase_does_not_match():
+    matcher = FillerMatcher(['you know'], context_rules={})
+    assert found(matcher, 'you see I know') == []
+
+
+def test_overlapping_matches_keep_the_longest_phrase():
+    matcher = FillerMatcher(['i mean', 'i mean like', 'like'], context_rules={})
+    assert found(matcher, 'so i mean like whatever') == [(1, 3, 'i mean like')]
+    # Suffix-sharing patterns are found through failure links in the same pass.
+    assert sorted(m[2] for m in matcher.matches(index_of('i mean like'))) == [0, 1, 2]
+
+
+def test_context_rules_keep_meaningful_words():
+    matcher = FillerMatcher(['like', 'you know', 'so'])
+    assert found(matcher, 'I like it') == []                   # 'like' after 'i' and before 'it'
+    assert found(matcher, 'do you know where') == []           # question, not a filler
+    assert found(matcher, 'it was so much fun') == []          # 'so' before 'much'
+    assert found(matcher, 'it was like huge') == [(2, 2, 'like')]
+    assert found(matcher, 'and you know we left') == [(1, 2, 'you know')]
+
+
+def test_low_confidence_matches_are_not_cut():
+    matcher = FillerMatcher(['um', 'you know'], context_rules={})
+    assert found(matcher, 'um you know', low_confidence={2}) == [(0, 0, 'um')]
+
+
+def test_cut_intervals_span_the_whole_phrase():
+    matcher = FillerMatcher(['you know'], context_rules={})
+    assert matcher.cut_intervals(index_of('well you know yes')) == [(1_000, 2_500)]
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import parallel_transcription
+from app.utils.parallel_transcription import plan_chunks, stitch_boundary
+
+
+def word(text, start, end):
+    return {'word': text, 'start': start, 'end': end}
+
+
+@pytest.fixture
+def speech(monkeypatch):
+    """Makes plan_chunks see the given speech regions instead of running the VAD."""
+    def use(regions):
+        monkeypatch.setattr(parallel_transcription, 'detect_speech', lambda analysis, settings=None: regions)
+    return use
+
+
+def test_short_recording_is_one_chunk(speech):
+    speech([(0, 30_000)])
+    assert plan_chunks(SimpleNamespace(duration_ms=30_000), 20, 40) == [(0, 30_000)]
+
+
+def test_cuts_go_in_the_middle_of_the_longest_pause_in_each_window(speech):
+    speech([(0, 25_000), (27_000, 33_000), (34_000, 60_000), (61_000, 70_000), (73_000, 100_000)])
+    # Window 20-40 s: the 2 s pause at 25-27 s beats the 1 s pause at 33-34 s.
+    assert plan_chunks(SimpleNamespace(duration_ms=100_000), 20, 40) == [
+        (0, 26_000), (26_000, 60_500), (60_500, 100_000)]
+
+
+def test_hard_cuts_without_pauses_never_leave_a_stub(speech):
+    speech([(0, 100_000)])
+    assert plan_chunks(SimpleNamespace(duration_ms=100_000), 20, 40) == [
+        (0, 40_000), (40_000, 80_000), (80_000, 100_000)]
+    speech([(0, 85_000)])
+    chunks = plan_chunks(SimpleNamespace(duration_ms=85_000), 20, 40)
+    assert chunks == [(0, 40_000), (40_000, 65_000), (65_000, 85_000)]
+    assert all(end - start >= 20_000 for start, end in chunks)
+
+
+def test_agreeing_overlap_is_joined_in_the_middle_of_the_shared_run():
+    left = [word('a', 28.0, 28.4), word('b', 28.5, 28.9), word('the', 29.1, 29.4), word('quick', 29.5, 29.9),
+            word('brown', 30.0, 30.4), word('fox', 30.5, 30.9)]
+    right = [word('The', 29.12, 29.4), word('quick', 29.52, 29.9), word('brown', 30.02, 30.4),
+             word('fox', 30.5, 30.9), word('jumps', 31.0, 31.3)]
+
+    kept_left, kept_right = stitch_boundary(left, right, cut_ms=30_000, overlap_ms=1_000)
+
+    assert [w['word'] for w in kept_left + kept_right] == ['a', 'b', 'the', 'quick', 'brown', 'fox', 'jumps']
+    assert kept_right[0] is right[2]
+
+
+def test_disagreeing_overlap_falls_back_to_word_midpoints():
+    left = [word('x', 29.5, 29.7), word('y', 30.1, 30.3)]
+    right = [word('p', 29.6, 29.8), word('q', 30.2, 30.4)]
+    kept_left, kept_right = stitch_boundary(left, right, cut_ms=30_000, overlap_ms=1_000)
+    assert ([w['word'] for w in kept_left], [w['word'] for w in kept_right]) == (['x'], ['q'])
+
+
+def test_matching_words_too_far_apart_are_not_an_anchor():
+    left = [word('so', 29.2, 29.4), word('then', 29.5, 29.7)]
+    right = [word('so', 30.2, 30.4), word('then', 30.5, 30.7)]  # a repetition one second later
+    kept_left, kept_right = stitch_boundary(left, right, cut_ms=30_000, overlap_ms=1_000)
+    assert [w['word'] for w in kept_left + kept_right] == ['so', 'then', 'so', 'then']
@@ -0,0 +1,49 @@
+import pytest
+
+from app.utils.rate_limiter import RateLimiter, RateLimitTimeout, configured_limits
+
+take = RateLimiter._take
+
+
+def test_take_from_a_full_bucket():
+    assert take(tokens=4.0, updated_at=100.0, now=100.0, rate=0.5, burst=4.0, amount=1.0) == (3.0, 0.0)
+
+
+def test_take_refills_by_elapsed_time_up_to_burst():
+    assert take(tokens=0.0, updated_at=100.0, now=104.0, rate=0.5, burst=4.0, amount=1.0) == (1.0, 0.0)
+    assert take(tokens=3.0, updated_at=0.0, now=1_000.0, rate=0.5, burst=4.0, amount=1.0) == (3.0, 0.0)
+
+
+def test_take_from_an_empty_bucket_reports_the_wait():
+    tokens, wait = take(tokens=0.25, updated_at=100.0, now=100.0, rate=0.5, burst=4.0, amount=1.0)
+    assert (tokens, wait) == (0.25, pytest.approx(1.5))
+
+
+def test_clock_going_backwards_does_not_drain_the_bucket():
+    assert take(tokens=2.0, updated_at=100.0, now=90.0, rate=1.0, burst=4.0, amount=1.0) == (1.0, 0.0)
+
+
+def test_sqlite_buckets_allow_the_burst_then_time_out(tmp_path):
+    limiter = RateLimiter(path=str(tmp_path / 'buckets.sqlite3'), limits={'omdb': (0.01, 2.0)}, backend='sqlite')
+    assert limiter.acquire('omdb') == pytest.approx(0.0, abs=0.1)
+    assert limiter.acquire('omdb') == pytest.approx(0.0, abs=0.1)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire('omdb', timeout_sec=1.0)
+    # The state is in the file, so another limiter (another process) sees the empty bucket.
+    other = RateLimiter(path=str(tmp_path / 'buckets.sqlite3'), limits={'omdb': (0.01, 2.0)}, backend='sqlite')
+    with pytest.raises(RateLimitTimeout):
+        other.acquire('omdb', timeout_sec=1.0)
+
+
+def test_unknown_and_disabled_providers_never_wait(tmp_path):
+    limiter = RateLimiter(path=str(tmp_path / 'buckets.sqlite3'), limits={'gemini': (0.0, 1.0)}, backend='sqlite')
+    assert limiter.acquire('gemini') == 0.0
+    assert limiter.acquire('somewhere-else') == 0.0
+
+
+def test_configured_limits_overrides(monkeypatch):
+    monkeypatch.setenv('RATE_LIMIT_GEMINI', '2:5')
+    monkeypatch.setenv('RATE_LIMIT_OMDB', 'fast')
+    limits = configured_limits()
+    assert limits['gemini'] == (2.0, 5.0)
+    assert limits['omdb'] == (5.0, 10.0)  # malformed: default kept
@@ -0,0 +1,75 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import resilience
+from app.utils.resilience import CircuitBreakers, CircuitOpenError, is_failure
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(t=1_000.0)
+    monkeypatch.setattr(resilience, 'time', SimpleNamespace(time=lambda: now.t, perf_counter=time.perf_counter))
+    return now
+
+
+@pytest.fixture
+def breakers(tmp_path):
+    return CircuitBreakers(path=str(tmp_path / 'breakers.sqlite3'), failure_threshold=3, reset_sec=60)
+
+
+def fail(breakers, times):
+    for _ in range(times):
+        breakers.record('gemini', success=False)
+
+
+def test_opens_after_consecutive_failures(breakers, clock):
+    fail(breakers, 2)
+    breakers.before_call('gemini')  # still closed
+    breakers.record('gemini', success=True)
+    fail(breakers, 2)
+    assert not breakers.is_open('gemini')  # the success reset the count
+    fail(breakers, 1)
+    assert breakers.is_open('gemini')
+    with pytest.raises(CircuitOpenError):
+        breakers.before_call('gemini')
+    breakers.before_call('omdb')  # other providers are unaffected
+
+
+def test_half_open_trial_success_closes(breakers, clock):
+    fail(breakers, 3)
+    clock.t += 61
+    breakers.before_call('gemini')  # the trial call
+    with pytest.raises(CircuitOpenError):
+        breakers.before_call('gemini')  # concurrent callers keep failing fast
+    breakers.record('gemini', success=True)
+    assert not breakers.is_open('gemini')
+    breakers.before_call('gemini')
+
+
+def test_half_open_trial_failure_reopens(breakers, clock):
+    fail(breakers, 3)
+    clock.t += 61
+    breakers.before_call('gemini')
+    fail(breakers, 1)
+    clock.t += 30
+    with pytest.raises(CircuitOpenError):
+        breakers.before_call('gemini')
+
+
+def test_state_is_shared_through_the_file(breakers, tmp_path, clock):
+    fail(breakers, 3)
+    other_process = CircuitBreakers(path=str(tmp_path / 'breakers.sqlite3'), failure_threshold=3, reset_sec=60)
+    assert other_process.is_open('gemini')
+    [(_, _, _, samples)] = list(other_process.metric_families())
+    assert samples == [('external_api_circuit_open', {'provider': 'gemini'}, 1.0)]
+
+
+def test_client_errors_do_not_count():
+    for status, counts in ((400, False), (404, False), (429, True), (503, True)):
+        exc = Exception(f"HTTP {status}")
+        exc.response = SimpleNamespace(status_code=status)
+        assert is_failure(exc) is counts
+    assert is_failure(ValueError('bad input')) is False
+    assert is_failure(TimeoutError()) is True
@@ -0,0 +1,66 @@
+import pytest
+
+from app.utils.time_map import TimeMap, edits_from_timed_events, remap_transcript
+
+
+def word(text, start, end):
+    return {'word': text, 'start': start, 'end': end, 'probability': 0.9}
+
+
+def test_remap_across_cut_insertion_and_intro_offset():
+    # 60 s recording after a 5 s intro; 2 s cut at 10-12 s; a 30 s commercial at 20 s.
+    time_map = TimeMap.from_edits(60_000, cuts=[(10_000, 12_000)], insertions=[(20_000, 30_000)], offset_ms=5_000)
+    words = [word('before', 1.0, 1.5), word('cut', 10.5, 11.0), word('after', 15.0, 15.5),
+             word('late', 25.0, 25.5)]
+
+    remapped = time_map.remap_words(words)
+
+    assert [w['word'] for w in remapped] == ['before', 'after', 'late']
+    assert remapped[0]['start'] == pytest.approx(6.0)             # + intro
+    assert remapped[1]['start'] == pytest.approx(18.0)            # + intro - cut
+    assert remapped[2]['start'] == pytest.approx(5 + 25 - 2 + 30)  # + intro - cut + commercial
+    assert time_map.final_duration_ms == 5_000 + 60_000 - 2_000 + 30_000
+
+
+def test_word_at_insertion_point_lands_after_inserted_material():
+    time_map = TimeMap.from_edits(10_000, insertions=[(4_000, 1_000)])
+    assert time_map.map_ms([3_999, 4_000]) == pytest.approx([3_999, 5_000])
+
+
+def test_partially_cut_word_is_clipped_and_overlapping_cuts_merge():
+    time_map = TimeMap.from_edits(10_000, cuts=[(2_000, 3_000), (2_500, 4_000)])
+    assert time_map.cuts == [(2_000, 4_000)]
+    [clipped] = time_map.remap_words([word('edge', 1.5, 2.5)])
+    assert (clipped['start'], clipped['end']) == pytest.approx((1.5, 2.0))
+
+
+def test_insertion_inside_a_cut_moves_to_the_cut_start():
+    time_map = TimeMap.from_edits(10_000, cuts=[(2_000, 4_000)], insertions=[(3_000, 500)])
+    assert time_map.map_ms(4_000) == pytest.approx(2_500)
+
+
+def test_edits_from_timed_events():
+    events = [{'type': 'recording_start', 'final_ms': 5_000}, {'type': 'cut', 'start_ms': 10_000, 'end_ms': 12_000},
+              {'type': 'insertion', 'original_ms': 20_000, 'duration_ms': 30_000}, {'type': 'music', 'at': 1}]
+    assert edits_from_timed_events(events) == {'cuts': [(10_000, 12_000)], 'insertions': [(20_000, 30_000)],
+                                               'offset_ms': 5_000}
+    assert edits_from_timed_events([{'type': 'music'}]) is None
+    assert edits_from_timed_events(None) is None
+
+
+def _plan():
+    return {'recording': {'original_duration_ms': 60_000},
+            'segments': [{'type': 'intro', 'start_ms': 0}, {'type': 'recording', 'start_ms': 5_000}],
+            'cuts': [{'start_ms': 10_000, 'end_ms': 12_000, 'reason': 'pause'}],
+            'breaks': [{'original_ms': 20_000, 'inserted_ms': 30_000}]}
+
+
+def test_plan_breaks_become_insertions():
+    [remapped] = remap_transcript([word('late', 25.0, 25.5)], _plan())
+    assert remapped['start'] == pytest.approx(5 + 25 - 2 + 30)
+
+
+def test_applied_edits_take_precedence_over_the_plan():
+    edits = {'cuts': [], 'insertions': [(20_000, 10_000)], 'offset_ms': None}  # offset falls back to the plan
+    [remapped] = remap_transcript([word('late', 25.0, 25.5)], _plan(), edits)
+    assert remapped['start'] == pytest.approx(5 + 25 + 10)
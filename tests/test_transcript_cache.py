@@ -0,0 +1,26 @@
+from app.utils.transcript_cache import TranscriptCache
+from app.utils.transcription_engine import normalize_transcription_settings
+
+RESULT = {'text': 'hello there', 'language': 'en', 'duration': 1.0,
+          'words': [{'word': 'hello', 'start': 0.0, 'end': 0.4, 'probability': 0.9},
+                    {'word': 'there', 'start': 0.5, 'end': 0.9, 'probability': 0.8}],
+          'segments': [{'text': 'hello there', 'start': 0.0, 'end': 0.9}]}
+
+
+def test_round_trip(tmp_path):
+    cache = TranscriptCache(cache_dir=str(tmp_path))
+    settings = normalize_transcription_settings({})
+    cache.put('a' * 64, settings, RESULT)
+    cached = cache.get('a' * 64, settings)
+    assert [w['word'] for w in cached['words']] == ['hello', 'there']
+    assert cached['words'][1]['start'] == 0.5
+
+
+def test_output_changing_settings_are_part_of_the_key(tmp_path):
+    cache = TranscriptCache(cache_dir=str(tmp_path))
+    cache.put('a' * 64, normalize_transcription_settings({}), RESULT)
+    for override in ({'word_timestamps': False}, {'beam_size': 5}, {'compute_type': 'float32'},
+                     {'model': 'small'}, {'language': 'en'}):
+        assert cache.get('a' * 64, normalize_transcription_settings(override)) is None, override
+    # Settings that only change speed share the entry.
+    assert cache.get('a' * 64, normalize_transcription_settings({'cpu_threads': 4, 'workers': 2})) is not None
@@ -0,0 +1,61 @@
+import numpy as np
+
+from app.utils.transcript_index import TranscriptIndex
+
+
+def words(*spans):
+    return [{'word': w, 'start': s, 'end': e, 'probability': 0.8} for w, s, e in spans]
+
+
+def sample_index():
+    # Out of order on purpose: the index sorts by start time.
+    return TranscriptIndex.from_words(words(
+        ('know.', 1.5, 1.8), ('You', 1.0, 1.4), ('what', 2.0, 2.3), ('you', 5.0, 5.2),
+        ('know', 5.3, 5.6), ('Um', 0.0, 0.4), ('okay', 9.0, 9.5)))
+
+
+def test_tokens_are_sorted_and_normalized():
+    index = sample_index()
+    assert [index.token(p) for p in range(len(index))] == ['um', 'you', 'know', 'what', 'you', 'know', 'okay']
+    assert index.positions('YOU').tolist() == [1, 4]
+    assert index.positions('missing').tolist() == []
+
+
+def test_phrase_queries():
+    index = sample_index()
+    assert index.find_phrase('you know').tolist() == [1, 4]
+    assert index.phrase_spans('you know') == [(1_000, 1_800), (5_000, 5_600)]
+    assert index.find_phrase('know okay').tolist() == [5]
+    assert index.find_phrase('okay you').tolist() == []   # would run past the end
+    assert index.find_phrase('you never').tolist() == []
+
+
+def test_overlapping_and_nearest_pause():
+    index = sample_index()
+    assert list(index.overlapping(1_700, 2_100)) == [2, 3]
+    assert list(index.overlapping(3_000, 4_000)) == []
+    # Gaps >= 2 s: 2.3 -> 5.0 and 5.6 -> 9.0.
+    assert index.nearest_pause_before(8_000, 2_000) == (2_300, 5_000, 4)
+    assert index.nearest_pause_before(9_000, 2_000) == (5_600, 9_000, 6)
+    assert index.nearest_pause_before(4_000, 2_000) is None
+
+
+def test_save_and_memory_mapped_load_round_trip(tmp_path):
+    index = sample_index()
+    index.save(str(tmp_path / 'index'))
+
+    loaded = TranscriptIndex.load(str(tmp_path / 'index'))
+
+    assert isinstance(loaded.start_ms, np.memmap)
+    assert loaded.vocabulary == index.vocabulary
+    for name in ('start_ms', 'end_ms', 'confidence', 'token_ids', 'posting_offsets', 'postings'):
+        assert np.array_equal(getattr(loaded, name), getattr(index, name))
+    assert loaded.find_phrase('you know').tolist() == [1, 4]
+    assert loaded.nearest_pause_before(8_000, 2_000) == (2_300, 5_000, 4)
+
+
+def test_empty_transcript():
+    index = TranscriptIndex.from_words([])
+    assert len(index) == 0
+    assert index.find_phrase('um').tolist() == []
+    assert list(index.overlapping(0, 1_000)) == []